@@ -2,6 +2,8 @@ from .classifier_instance_resolver import ClassifierInstanceResolver
 from .composite_classifier_instance_resolver import \
     CompositeClassifierInstanceResolver
 from .local_classifier_instance_resolver import LocalClassifierInstanceResolver
+from .overlay_classifier_instance_resolver import \
+    OverlayClassifierInstanceResolver
 from .unresolved_classifier_instance_exception import \
     UnresolvedClassifierInstanceException
 
@@ -9,5 +11,6 @@ __all__ = [
     "ClassifierInstanceResolver",
     "CompositeClassifierInstanceResolver",
     "LocalClassifierInstanceResolver",
+    "OverlayClassifierInstanceResolver",
     "UnresolvedClassifierInstanceException",
 ]
@@ -0,0 +1,89 @@
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Tuple
+
+from lionweb.api.classifier_instance_resolver import ClassifierInstanceResolver
+
+if TYPE_CHECKING:
+    from lionweb.model import ClassifierInstance
+
+
+class OverlayClassifierInstanceResolver(ClassifierInstanceResolver):
+    """
+    Resolver looking instances up in several layers of dictionaries, without calling a resolver per
+    layer. Layers are given from the highest priority to the lowest: when several layers contain the
+    same ID, the instance of the first one wins. Instances added later are overlaid on top of all
+    layers.
+
+    Layers are neither copied nor modified: they are read-only fallbacks, consulted in order, so
+    creating an overlay over large dictionaries costs nothing, and instances later put in them are
+    visible through it. Added instances go to a dictionary owned by the overlay.
+    """
+
+    def __init__(self, *layers: Mapping[str, "ClassifierInstance"]):
+        self._added: Dict[str, "ClassifierInstance"] = {}
+        self._layers: Tuple[Mapping[str, "ClassifierInstance"], ...] = layers
+        self._fallback_resolvers: List[ClassifierInstanceResolver] = []
+
+    @classmethod
+    def from_resolvers(
+        cls, *resolvers: ClassifierInstanceResolver
+    ) -> "OverlayClassifierInstanceResolver":
+        """
+        Create an overlay equivalent to a CompositeClassifierInstanceResolver of the given resolvers.
+        The dictionaries backing resolvers become layers of the overlay. From the first resolver which is
+        not backed by one, resolvers are instead consulted in order when no layer contains the
+        requested ID.
+        """
+        from lionweb.api.local_classifier_instance_resolver import \
+            LocalClassifierInstanceResolver
+        from lionweb.serialization.map_based_resolver import MapBasedResolver
+
+        layers: List[Mapping[str, "ClassifierInstance"]] = []
+        fallback_resolvers: List[ClassifierInstanceResolver] = []
+        for resolver in resolvers:
+            if fallback_resolvers:
+                fallback_resolvers.append(resolver)
+            elif isinstance(resolver, MapBasedResolver):
+                layers.append(resolver.instances_by_id)
+            elif isinstance(resolver, LocalClassifierInstanceResolver):
+                layers.append(resolver.instances)
+            elif (
+                isinstance(resolver, OverlayClassifierInstanceResolver)
+                and not resolver._fallback_resolvers
+            ):
+                layers.append(resolver._added)
+                layers.extend(resolver._layers)
+            else:
+                fallback_resolvers.append(resolver)
+        overlay = cls(*layers)
+        overlay._fallback_resolvers = fallback_resolvers
+        return overlay
+
+    def add(
+        self, instance: "ClassifierInstance"
+    ) -> "OverlayClassifierInstanceResolver":
+        if instance.id is None:
+            raise ValueError("Instances without ID cannot be resolved")
+        self._added[instance.id] = instance
+        return self
+
+    def resolve(self, instance_id: str) -> Optional["ClassifierInstance"]:
+        instance = self._added.get(instance_id)
+        if instance is not None:
+            return instance
+        for layer in self._layers:
+            instance = layer.get(instance_id)
+            if instance is not None:
+                return instance
+        for resolver in self._fallback_resolvers:
+            instance = resolver.resolve(instance_id)
+            if instance is not None:
+                return instance
+        return None
+
+    def __repr__(self) -> str:
+        layers = [list(self._added.keys())] + [
+            list(layer.keys()) for layer in self._layers
+        ]
+        return f"{self.__class__.__name__}({layers}, fallback_resolvers={self._fallback_resolvers!r})"
+
+    __str__ = __repr__
@@ -1,5 +1,7 @@
 from .bulk_import import BulkImport
 from .client import Client
+from .id_pool import IdPool
+from .node_cache import NodeCache
 from .repository_archives import load_repository_archive
 
-__all__ = ["Client", "BulkImport", "load_repository_archive"]
+__all__ = ["Client", "BulkImport", "IdPool", "NodeCache", "load_repository_archive"]
@@ -1,11 +1,30 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Union
 
 from lionweb import LionWebVersion
 from lionweb.language import Containment
 from lionweb.model import ClassifierInstance
+from lionweb.model.impl.dynamic_classifier_instance import \
+    DynamicClassifierInstance
+from lionweb.model.impl.m3node import M3Node
 from lionweb.serialization import (JsonSerialization, MetaPointer,
+                                   SerializationChunk,
                                    SerializedClassifierInstance,
                                    create_standard_json_serialization)
+from lionweb.serialization.data.language_version import LanguageVersion
+
+from .id_pool import IdPool
+
+# Sizes, in bytes, of the parts of the JSON representation of a node which do not depend on its
+# content, used to estimate the size of the nodes
+_NODE_SIZE = 120
+_META_POINTER_SIZE = 45
+_PROPERTY_SIZE = 30
+_FEATURE_SIZE = 35
+_REFERENCE_ENTRY_SIZE = 40
+
+
+def _string_size(value: Optional[str]) -> int:
+    return 4 if value is None else len(value) + 2
 
 
 class BulkImport:
@@ -25,13 +44,22 @@ class BulkImport:
         self,
         attach_points: Optional[List["BulkImport.AttachPoint"]] = None,
         nodes: Optional[List[ClassifierInstance]] = None,
+        id_pool: Optional[IdPool] = None,
     ) -> None:
         """
         If `nodes` is a list of ClassifierInstance, serialize them into
         SerializedClassifierInstance immediately (matching the Java behavior).
+
+        When an `id_pool` is given, nodes without an ID added through add_node, and their descendants,
+        get IDs reserved by the repository from the pool.
         """
         self._attach_points: List[BulkImport.AttachPoint] = attach_points or []
-        self._nodes: List[SerializedClassifierInstance] = []
+        # Nodes are appended to a single chunk, whose used languages are kept up to date
+        self._chunk = SerializationChunk()
+        self._considered_meta_pointers: Set[MetaPointer] = set()
+        self._languages: Set[LanguageVersion] = set()
+        self._estimated_size = 0
+        self._id_pool = id_pool
 
         nodes = nodes or []
         if nodes:
@@ -41,32 +69,96 @@ class BulkImport:
             serialized_chunk = (
                 json_serialization.serialize_nodes_to_serialization_chunk(nodes)
             )
-            self._nodes = list(serialized_chunk.get_classifier_instances())
+            self.add_nodes(serialized_chunk.classifier_instances)
 
     # --- mutation API ---
 
     def add_node(self, classifier_instance: ClassifierInstance) -> None:
         """Serialize the given ClassifierInstance and append all resulting serialized instances."""
+        if self._id_pool is not None:
+            self.assign_ids(classifier_instance)
         json_serialization = self._get_json_serialization(
             classifier_instance.get_classifier().get_lionweb_version()
         )
-        serialized_chunk = json_serialization.serialize_nodes_to_serialization_chunk(
-            classifier_instance
+        self._add(json_serialization.serialize_node(classifier_instance))
+        for annotation_instance in classifier_instance.get_annotations():
+            self._add(
+                json_serialization.serialize_annotation_instance(annotation_instance)
+            )
+
+    def assign_ids(self, classifier_instance: ClassifierInstance) -> None:
+        """Give IDs from the pool to the given instance and to its descendants which have none."""
+        if self._id_pool is None:
+            raise ValueError("No ID pool was specified for this BulkImport")
+        instances: List[ClassifierInstance] = []
+        ClassifierInstance.collect_self_and_descendants(
+            classifier_instance, True, instances
         )
-        self._nodes.extend(serialized_chunk.get_classifier_instances())
+        without_id: List[Union[DynamicClassifierInstance, M3Node]] = []
+        for instance in instances:
+            if instance.id is not None:
+                continue
+            if not isinstance(instance, (DynamicClassifierInstance, M3Node)):
+                raise ValueError(
+                    f"Cannot assign an ID to {instance}: its ID cannot be set"
+                )
+            without_id.append(instance)
+        if without_id:
+            for instance, id in zip(without_id, self._id_pool.take(len(without_id))):
+                instance.set_id(id)
 
     def add_nodes(
         self, classifier_instances: List[SerializedClassifierInstance]
     ) -> None:
         """Append already-serialized classifier instances as-is."""
-        self._nodes.extend(classifier_instances)
+        for classifier_instance in classifier_instances:
+            self._add(classifier_instance)
+
+    def _add(self, classifier_instance: SerializedClassifierInstance) -> None:
+        self._chunk.classifier_instances.append(classifier_instance)
+        size = _NODE_SIZE + _string_size(classifier_instance.id)
+        size += _string_size(classifier_instance.parent_node_id)
+        size += self._consider(classifier_instance.classifier)
+        for property_value in classifier_instance.properties:
+            size += _PROPERTY_SIZE + self._consider(property_value.meta_pointer)
+            size += _string_size(property_value.value)
+        for containment_value in classifier_instance.containments:
+            size += _FEATURE_SIZE + self._consider(containment_value.meta_pointer)
+            for child_id in containment_value.children_ids:
+                size += _string_size(child_id) + 2
+        for reference_value in classifier_instance.references:
+            size += _FEATURE_SIZE + self._consider(reference_value.meta_pointer)
+            for entry in reference_value.value:
+                size += _REFERENCE_ENTRY_SIZE + _string_size(entry.reference)
+                size += _string_size(entry.resolve_info)
+        for annotation_id in classifier_instance.annotations:
+            size += _string_size(annotation_id) + 2
+        self._estimated_size += size
+
+    def _consider(self, meta_pointer: MetaPointer) -> int:
+        """Record the language of the given MetaPointer as used and return its estimated size."""
+        if meta_pointer not in self._considered_meta_pointers:
+            self._considered_meta_pointers.add(meta_pointer)
+            language = LanguageVersion.from_meta_pointer(meta_pointer)
+            if language not in self._languages:
+                self._languages.add(language)
+                self._chunk.add_language(language)
+        return (
+            _META_POINTER_SIZE
+            + len(meta_pointer.language or "")
+            + len(meta_pointer.version or "")
+            + len(meta_pointer.key or "")
+        )
 
     def add_attach_point(self, attach_point: "BulkImport.AttachPoint") -> None:
         self._attach_points.append(attach_point)
 
     def clear(self) -> None:
         self._attach_points.clear()
-        self._nodes.clear()
+        self._chunk = SerializationChunk()
+        self._considered_meta_pointers.clear()
+        self._languages.clear()
+        self._estimated_size = 0
 
     # --- accessors ---
 
@@ -74,18 +166,32 @@ class BulkImport:
         return self._attach_points
 
     def get_nodes(self) -> List[SerializedClassifierInstance]:
-        return self._nodes
+        return self._chunk.classifier_instances
+
+    def get_languages(self) -> List[LanguageVersion]:
+        return self._chunk.languages
+
+    def get_serialization_chunk(
+        self, lion_web_version: LionWebVersion
+    ) -> SerializationChunk:
+        """Return the chunk the nodes are appended to. It is not copied."""
+        self._chunk.serialization_format_version = lion_web_version.value
+        return self._chunk
 
     def number_of_nodes(self) -> int:
-        return len(self._nodes)
+        return len(self._chunk.classifier_instances)
+
+    def estimated_size(self) -> int:
+        """Approximate size, in bytes, of the JSON representation of the nodes."""
+        return self._estimated_size
 
     def is_empty(self) -> bool:
-        return len(self._nodes) == 0
+        return len(self._chunk.classifier_instances) == 0
 
     # --- dunder conveniences (optional) ---
 
     def __len__(self) -> int:
-        return len(self._nodes)
+        return len(self._chunk.classifier_instances)
 
     def __bool__(self) -> bool:
         return not self.is_empty()
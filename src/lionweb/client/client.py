@@ -1,16 +1,27 @@
-from typing import TYPE_CHECKING, List, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Deque, Iterator, List, Optional, cast
 
 import requests
 from pydantic import BaseModel
 
 from lionweb.lionweb_version import LionWebVersion
+from lionweb.model.impl.lazy_proxy_node import LazyProxyLoader
+from lionweb.model.impl.proxy_node import ProxyNode
 from lionweb.model.node import Node
 from lionweb.serialization import create_standard_json_serialization
 from lionweb.serialization.json_serialization import JsonSerialization
+from lionweb.serialization.low_level_json_serialization import JsonElement
 from lionweb.serialization.unavailable_node_policy import UnavailableNodePolicy
+from lionweb.utils.instrumentation import Instrumentation
+
+from .id_pool import IdPool
+from .node_cache import NodeCache
 
 if TYPE_CHECKING:
     from lionweb.model import ClassifierInstance
+    from lionweb.model.change_tracking import ChangeCheckpoint, ModelChanges
 
     from .bulk_import import BulkImport
 
@@ -32,6 +43,8 @@ class Client:
         serialization: Optional[JsonSerialization] = None,
         unavailable_parent_policy: UnavailableNodePolicy = UnavailableNodePolicy.PROXY_NODES,
         unavailable_children_policy: UnavailableNodePolicy = UnavailableNodePolicy.PROXY_NODES,
+        node_cache: Optional[NodeCache] = None,
+        instrumentation: Optional[Instrumentation] = None,
     ):
         if not isinstance(client_id, str):
             raise ValueError(f"client_id should be a string, but it is {client_id}")
@@ -51,10 +64,79 @@ class Client:
             self._serialization = serialization
         self._serialization.unavailable_parent_policy = unavailable_parent_policy
         self._serialization.unavailable_children_policy = unavailable_children_policy
+        self._node_cache = node_cache
+        self._id_pool: Optional[IdPool] = None
+        self._instrumentation: Optional[Instrumentation] = None
+        if instrumentation is not None:
+            self.set_instrumentation(instrumentation)
 
     def serialization(self) -> JsonSerialization:
         return self._serialization
 
+    def node_cache(self) -> Optional[NodeCache]:
+        return self._node_cache
+
+    def instrumentation(self) -> Optional[Instrumentation]:
+        return self._instrumentation
+
+    def set_instrumentation(self, instrumentation: Optional[Instrumentation]) -> None:
+        """
+        Measure the requests sent to the repository and the serialization of their content. Requests
+        are timed as client.<operation>, and the bytes sent and received are counted.
+        """
+        self._instrumentation = instrumentation
+        self._serialization.instrumentation = instrumentation
+
+    @contextmanager
+    def instrumented(
+        self, instrumentation: Optional[Instrumentation] = None
+    ) -> Iterator[Instrumentation]:
+        """
+        Measure the operations performed within the with block, using the given Instrumentation or a
+        new one.
+        """
+        previous = self._instrumentation
+        self.set_instrumentation(instrumentation or Instrumentation())
+        try:
+            yield cast(Instrumentation, self._instrumentation)
+        finally:
+            self.set_instrumentation(previous)
+
+    def id_pool(self) -> Optional[IdPool]:
+        return self._id_pool
+
+    def enable_id_pool(
+        self,
+        block_size: int = 1000,
+        low_water_mark: Optional[int] = None,
+        background_refill: bool = True,
+    ) -> IdPool:
+        """
+        Make ids() hand out IDs from a pool, which reserves them from the repository block_size at a
+        time.
+        """
+        self._id_pool = IdPool(
+            self._fetch_ids, block_size, low_water_mark, background_refill
+        )
+        return self._id_pool
+
+    def enable_lazy_proxies(self, batch_size: int = 100) -> LazyProxyLoader:
+        """
+        Make the proxies created for unavailable nodes load them from the repository on first access.
+        Retrieving the top levels of a tree with a depth_limit, the rest of it is then retrieved on
+        demand, a batch of sibling proxies at a time.
+        """
+        loader = LazyProxyLoader(
+            lambda ids: [
+                n
+                for n in self.retrieve(ids, depth_limit=0)
+                if not isinstance(n, ProxyNode)
+            ],
+            batch_size,
+        )
+        self._serialization.proxy_factory = loader
+        return loader
+
     def set_repository_name(self, repository_name):
         self._repository_name = repository_name
 
@@ -140,9 +222,13 @@ class Client:
             "clientId": self._client_id,
         }
         data = self._serialization.serialize_trees_to_json_element(nodes)
-        response = requests.post(url, params=query_params, json=data, headers=headers)
+        response = self._post(
+            "create_partitions", url, params=query_params, json=data, headers=headers
+        )
         if response.status_code != 200:
             raise ValueError("Error:", response.status_code, response.text)
+        if self._node_cache is not None:
+            self._node_cache.invalidate_subtrees([cast(str, n.id) for n in nodes])
 
     def delete_partitions(self, node_ids: List[str]):
         if len(node_ids) == 0:
@@ -154,13 +240,24 @@ class Client:
             "repository": self._repository_name,
             "clientId": self._client_id,
         }
-        response = requests.post(
-            url, params=query_params, json=node_ids, headers=headers
+        response = self._post(
+            "delete_partitions",
+            url,
+            params=query_params,
+            json=node_ids,
+            headers=headers,
         )
         if response.status_code != 200:
             raise ValueError("Error:", response.status_code, response.text)
+        if self._node_cache is not None:
+            self._node_cache.invalidate_subtrees(node_ids)
 
     def ids(self, count: Optional[int] = None) -> List[str]:
+        if count and self._id_pool is not None:
+            return self._id_pool.take(count)
+        return self._fetch_ids(count)
+
+    def _fetch_ids(self, count: Optional[int] = None) -> List[str]:
         url = f"{self._server_url}/bulk/ids"
         headers = {"Content-Type": "application/json"}
         query_params = {
@@ -169,28 +266,98 @@ class Client:
         }
         if count:
             query_params["count"] = str(count)
-        response = requests.post(url, params=query_params, headers=headers)
+        response = self._post("ids", url, params=query_params, headers=headers)
         if response.status_code != 200:
             raise ValueError("Error:", response.status_code, response.text)
         return response.json()["ids"]
 
     def store(self, nodes: List["ClassifierInstance"]):
+        self._store(nodes, self._serialization.serialize_trees_to_json_element(nodes))
+
+    def store_changes(
+        self, checkpoint: "ChangeCheckpoint", nodes: List["ClassifierInstance"]
+    ) -> "ModelChanges":
+        """
+        Store only the nodes of the given trees which are new or changed since the checkpoint, and
+        advance the checkpoint. Nodes removed from the trees need not be sent: their former parents
+        changed, and no longer list them among their children. Return the changes stored.
+        """
+        changes = checkpoint.changes(nodes)
+        if not changes.is_empty():
+            self._store(
+                nodes, self._serialization.serialize_changes_to_json_element(changes)
+            )
+        checkpoint.advance(changes)
+        return changes
+
+    def _store(self, nodes: List["ClassifierInstance"], data: JsonElement):
         url = f"{self._server_url}/bulk/store"
         headers = {"Content-Type": "application/json"}
         query_params = {
             "repository": self._repository_name,
             "clientId": self._client_id,
         }
-        data = self._serialization.serialize_trees_to_json_element(nodes)
-        response = requests.post(url, params=query_params, json=data, headers=headers)
+        response = self._post(
+            "store", url, params=query_params, json=data, headers=headers
+        )
         if response.status_code != 200:
             raise ValueError("Error:", response.status_code, response.text)
+        if self._node_cache is not None:
+            # The stored nodes replace whatever was cached for their trees
+            self._node_cache.invalidate_subtrees([cast(str, n.id) for n in nodes])
+            for n in nodes:
+                self._node_cache.put_tree(n)
 
     def retrieve(self, ids: List[str], depth_limit: Optional[int] = None):
         if not self._is_list_of_strings(ids):
             raise ValueError(f"ids should be a list of strings, but we got {ids}")
-        data = self._retrieve_raw(ids, depth_limit=depth_limit)
-        nodes = self._serialization.deserialize_json_to_nodes(data["chunk"])
+        if self._node_cache is None:
+            data = self._retrieve_raw(ids, depth_limit=depth_limit)
+            nodes = self._serialization.deserialize_json_to_nodes(data["chunk"])
+            return nodes
+
+        # Serve from the cache the subtrees it fully contains and fetch the others
+        nodes = []
+        missing_ids = []
+        for node_id in ids:
+            subtree = self._node_cache.loaded_subtree(node_id, depth_limit)
+            if subtree is None:
+                missing_ids.append(node_id)
+            else:
+                nodes.extend(subtree)
+        if missing_ids:
+            data = self._retrieve_raw(missing_ids, depth_limit=depth_limit)
+            nodes.extend(self._deserialize_using_node_cache(data["chunk"]))
+        # Requested subtrees may overlap
+        unique_nodes = {id(n): n for n in nodes}
+        return list(unique_nodes.values())
+
+    def _deserialize_using_node_cache(self, chunk) -> List["ClassifierInstance"]:
+        """
+        Deserialize the chunk resolving the nodes it refers to, but does not contain, to the live cached
+        instances instead of proxies. The deserialized nodes are then cached, replacing any previous
+        instance with the same ID.
+        """
+        from lionweb.api.composite_classifier_instance_resolver import \
+            CompositeClassifierInstanceResolver
+
+        node_cache = cast(NodeCache, self._node_cache)
+        nodes = self._serialization.deserialize_json_to_nodes(
+            chunk,
+            CompositeClassifierInstanceResolver(
+                self._serialization.instance_resolver, node_cache
+            ),
+        )
+        node_cache.replace_all(nodes)
+        for n in nodes:
+            parent = n.get_parent()
+            if (
+                parent is not None
+                and not isinstance(parent, ProxyNode)
+                and not any(child is n for child in parent.get_children())
+            ):
+                # The cached parent does not know about this child, so it is stale
+                node_cache.invalidate([cast(str, parent.id)])
         return nodes
 
     def _retrieve_raw(self, ids: List[str], depth_limit: Optional[int] = None):
@@ -208,8 +375,8 @@ class Client:
                     f"depth_limit should be an int, but it is {depth_limit}"
                 )
             query_params["depthLimit"] = str(depth_limit)
-        response = requests.post(
-            url, params=query_params, json={"ids": ids}, headers=headers
+        response = self._post(
+            "retrieve", url, params=query_params, json={"ids": ids}, headers=headers
         )
         # Check response
         if response.status_code == 200:
@@ -218,6 +385,19 @@ class Client:
         else:
             raise ValueError("Error:", response.status_code, response.text)
 
+    def _post(self, operation: str, url: str, **kwargs) -> requests.Response:
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return requests.post(url, **kwargs)
+        with instrumentation.phase(f"client.{operation}"):
+            response = requests.post(url, **kwargs)
+        request_body = response.request.body
+        instrumentation.count(
+            "client.bytes_out", len(request_body) if request_body else 0
+        )
+        instrumentation.count("client.bytes_in", len(response.content))
+        return response
+
     def _is_list_of_strings(self, value):
         return isinstance(value, list) and all(isinstance(item, str) for item in value)
 
@@ -257,14 +437,62 @@ class Client:
 
     def retrieve_partition(self, id: str, depth_limit: Optional[int] = None):
         res = self.retrieve([id], depth_limit=depth_limit)
-        roots = [n for n in res if res.get_parent() is None]
+        roots = [
+            n for n in res if not isinstance(n, ProxyNode) and n.get_parent() is None
+        ]
         if len(roots) != 1:
-            raise ValueError()
+            raise ValueError(f"Expected one root, but found {len(roots)}")
         return roots[0]
 
-    def retrieve_node(self, id: str, depth_limit: Optional[int] = None):
-        from lionweb.model.impl.proxy_node import ProxyNode
+    def iterate_partition(
+        self, id: str, batch_size: int = 100, max_in_flight: int = 4
+    ) -> Iterator["ClassifierInstance"]:
+        """
+        Iterate over the nodes of a partition level by level. See iterate_subtrees.
+        """
+        return self.iterate_subtrees([id], batch_size, max_in_flight)
 
+    def iterate_subtrees(
+        self, ids: List[str], batch_size: int = 100, max_in_flight: int = 4
+    ) -> Iterator["ClassifierInstance"]:
+        """
+        Iterate over the nodes of the subtrees with the given roots, level by level. Nodes are retrieved
+        without their descendants, in batches of up to batch_size, and the children of each retrieved
+        node are retrieved next. At most max_in_flight retrievals are run concurrently.
+
+        Nodes are yielded as soon as their batch is deserialized, with proxies in place of their parent
+        and children, so only the IDs of the nodes still to be retrieved are kept in memory.
+        """
+        if not self._is_list_of_strings(ids):
+            raise ValueError(f"ids should be a list of strings, but we got {ids}")
+        if batch_size <= 0:
+            raise ValueError("batch_size should be positive")
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight should be positive")
+        pending_ids = deque(ids)
+        in_flight: Deque[Future] = deque()
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            while pending_ids or in_flight:
+                while pending_ids and len(in_flight) < max_in_flight:
+                    batch = [
+                        pending_ids.popleft()
+                        for _ in range(min(batch_size, len(pending_ids)))
+                    ]
+                    in_flight.append(executor.submit(self._retrieve_raw, batch, 0))
+                chunk = in_flight.popleft().result()["chunk"]
+                for serialized_node in chunk["nodes"]:
+                    for containment in serialized_node.get("containments", []):
+                        pending_ids.extend(containment["children"])
+                    pending_ids.extend(serialized_node.get("annotations", []))
+                if self._node_cache is None:
+                    nodes = self._serialization.deserialize_json_to_nodes(chunk)
+                else:
+                    nodes = self._deserialize_using_node_cache(chunk)
+                for n in nodes:
+                    if not isinstance(n, ProxyNode):
+                        yield n
+
+    def retrieve_node(self, id: str, depth_limit: Optional[int] = None):
         retrieved_nodes = self.retrieve([id], depth_limit=depth_limit)
         if not retrieved_nodes:
             raise ValueError(f"Node id {id} not found")
@@ -334,9 +562,7 @@ class Client:
 
         serialized_chunk_as_json = (
             LowLevelJsonSerialization().serialize_to_json_element(
-                LowLevelJsonSerialization.group_nodes_into_serialization_block(
-                    bulk_import.get_nodes(), self._lionweb_version
-                )
+                bulk_import.get_serialization_chunk(self._lionweb_version)
             )
         )
 
@@ -350,6 +576,13 @@ class Client:
         }
 
         url = f"{self._server_url}/additional/bulkImport"
-        response = requests.post(url, params=query_params, json=body, headers=headers)
+        response = self._post(
+            "bulk_import", url, params=query_params, json=body, headers=headers
+        )
         if response.status_code != 200:
             raise ValueError("Error:", response.status_code, response.text)
+        if self._node_cache is not None:
+            # The containers got new children
+            self._node_cache.invalidate(
+                [ap.container for ap in bulk_import.get_attach_points()]
+            )
@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional
+
+
+class IdPool:
+    """
+    Thread-safe pool of node IDs reserved by a repository. IDs are fetched in blocks of block_size and
+    handed out in the order the repository returned them. When fewer than low_water_mark IDs are left,
+    the next block is fetched in a background thread, so that callers rarely wait for a round trip.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[int], List[str]],
+        block_size: int = 1000,
+        low_water_mark: Optional[int] = None,
+        background_refill: bool = True,
+    ):
+        if block_size <= 0:
+            raise ValueError("block_size should be positive")
+        self._fetch = fetch
+        self.block_size = block_size
+        self.low_water_mark = (
+            block_size // 4 if low_water_mark is None else low_water_mark
+        )
+        if self.low_water_mark < 0 or self.low_water_mark >= block_size:
+            raise ValueError("low_water_mark should be between 0 and block_size")
+        self.background_refill = background_refill
+        self.fetches = 0
+        self._ids: Deque[str] = deque()
+        self._refilling = False
+        self._condition = threading.Condition()
+
+    def take(self, count: int = 1) -> List[str]:
+        """
+        Return count IDs, fetching them from the repository if the pool does not contain enough.
+        """
+        if count < 0:
+            raise ValueError("count should not be negative")
+        with self._condition:
+            while len(self._ids) < count:
+                if self._refilling:
+                    self._condition.wait()
+                else:
+                    self._refill(max(self.block_size, count - len(self._ids)))
+            result = [self._ids.popleft() for _ in range(count)]
+            if (
+                self.background_refill
+                and not self._refilling
+                and len(self._ids) < self.low_water_mark
+            ):
+                self._refilling = True
+                threading.Thread(target=self._refill_in_background, daemon=True).start()
+            return result
+
+    def take_one(self) -> str:
+        return self.take(1)[0]
+
+    def available(self) -> int:
+        with self._condition:
+            return len(self._ids)
+
+    def _refill(self, count: int) -> None:
+        # Called holding the lock, which is released while waiting for the repository
+        self._refilling = True
+        self._condition.release()
+        try:
+            ids = self._fetch(count)
+        finally:
+            self._condition.acquire()
+            self._refilling = False
+            self._condition.notify_all()
+        self.fetches += 1
+        if not ids:
+            raise ValueError("The repository did not provide any ID")
+        self._ids.extend(ids)
+
+    def _refill_in_background(self) -> None:
+        try:
+            ids = self._fetch(self.block_size)
+        except Exception:
+            # The IDs will be fetched again, synchronously, when they are needed
+            ids = []
+        with self._condition:
+            if ids:
+                self.fetches += 1
+            self._ids.extend(ids)
+            self._refilling = False
+            self._condition.notify_all()
@@ -0,0 +1,260 @@
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, cast
+
+from lionweb.api.classifier_instance_resolver import ClassifierInstanceResolver
+from lionweb.model.impl.dynamic_annotation_instance import \
+    DynamicAnnotationInstance
+from lionweb.model.impl.dynamic_classifier_instance import \
+    DynamicClassifierInstance
+from lionweb.model.impl.dynamic_node import DynamicNode
+from lionweb.model.impl.proxy_node import ProxyNode
+from lionweb.model.node import Node
+
+if TYPE_CHECKING:
+    from lionweb.model import ClassifierInstance
+    from lionweb.model.annotation_instance import AnnotationInstance
+
+
+class NodeCache(ClassifierInstanceResolver):
+    """
+    Identity map of the nodes retrieved by a Client, by node ID. When more than max_size nodes are
+    cached, the least recently used ones are evicted.
+
+    The cache can serve a retrieval only when all the nodes of the requested subtree, within the
+    requested depth, are cached. Evicting or invalidating a node therefore makes every subtree
+    containing it unavailable.
+
+    The cache can be used by concurrent retrievals: its operations are guarded by a lock.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        if max_size <= 0:
+            raise ValueError("max_size should be positive")
+        self.max_size = max_size
+        self._nodes: "OrderedDict[str, ClassifierInstance]" = OrderedDict()
+        # IDs of the cached nodes referring to each node, and IDs of the nodes each cached node refers
+        # to, as indexed when it was cached
+        self._referrers: Dict[str, Set[str]] = {}
+        self._referred: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, instance_id: str) -> Optional["ClassifierInstance"]:
+        with self._lock:
+            node = self._nodes.get(instance_id)
+            if node is not None:
+                self._nodes.move_to_end(instance_id)
+            return node
+
+    def put(self, node: "ClassifierInstance") -> None:
+        if node.id is None or isinstance(node, ProxyNode):
+            return
+        with self._lock:
+            self._unindex_references(node.id)
+            self._nodes[node.id] = node
+            self._nodes.move_to_end(node.id)
+            self._index_references(node.id, node)
+            while len(self._nodes) > self.max_size:
+                evicted_id, _ = self._nodes.popitem(last=False)
+                self._unindex_references(evicted_id)
+
+    def put_all(self, nodes: Iterable["ClassifierInstance"]) -> None:
+        with self._lock:
+            for node in nodes:
+                self.put(node)
+
+    def replace_all(self, nodes: Iterable["ClassifierInstance"]) -> None:
+        """
+        Cache the given nodes in place of the cached instances with the same IDs. The cached nodes
+        holding one of those previous instances, as parent, child, annotation or reference target,
+        are updated to hold the new one instead, so that the cached trees do not mix stale and fresh
+        instances. Holders which are not cached, such as nodes evicted earlier, are not updated.
+
+        The holders are found from the previous instances, through their parent, children and
+        annotations, and through the references indexed when the nodes were cached: references
+        added to cached nodes afterwards are not updated.
+        """
+        nodes = list(nodes)
+        with self._lock:
+            # Previous instances, by Python id, and the nodes replacing them
+            replacements: Dict[int, "ClassifierInstance"] = {}
+            # The new nodes may hold previous instances too, when they were resolved to them
+            holders: Dict[int, "ClassifierInstance"] = {id(n): n for n in nodes}
+            for node in nodes:
+                previous = self._nodes.get(node.id) if node.id is not None else None
+                if previous is None or previous is node:
+                    continue
+                replacements[id(previous)] = node
+                for holder in self._neighbours(previous):
+                    holders[id(holder)] = holder
+                for referrer_id in self._referrers.get(cast(str, node.id), ()):
+                    referrer = self._nodes.get(referrer_id)
+                    if referrer is not None:
+                        holders[id(referrer)] = referrer
+            self.put_all(nodes)
+            if replacements:
+                for holder in holders.values():
+                    if holder.id is not None and self._nodes.get(holder.id) is holder:
+                        _replace_held_instances(holder, replacements)
+
+    @staticmethod
+    def _neighbours(node: "ClassifierInstance") -> List["ClassifierInstance"]:
+        neighbours: List["ClassifierInstance"] = []
+        if isinstance(node, DynamicNode) and node.parent is not None:
+            neighbours.append(node.parent)
+        if isinstance(node, DynamicAnnotationInstance) and node.annotated is not None:
+            neighbours.append(node.annotated)
+        if isinstance(node, DynamicClassifierInstance):
+            for children in node.containment_values.values():
+                neighbours.extend(children)
+            neighbours.extend(node.annotations)
+        return [n for n in neighbours if not isinstance(n, ProxyNode)]
+
+    def _index_references(self, node_id: str, node: "ClassifierInstance") -> None:
+        if not isinstance(node, DynamicClassifierInstance):
+            return
+        referred_ids = {
+            reference_value.referred.id
+            for reference_values in node.reference_values.values()
+            for reference_value in reference_values
+            if reference_value.referred is not None
+            and reference_value.referred.id is not None
+        }
+        if not referred_ids:
+            return
+        self._referred[node_id] = referred_ids
+        for referred_id in referred_ids:
+            self._referrers.setdefault(referred_id, set()).add(node_id)
+
+    def _unindex_references(self, node_id: str) -> None:
+        for referred_id in self._referred.pop(node_id, ()):
+            referrers = self._referrers[referred_id]
+            referrers.discard(node_id)
+            if not referrers:
+                del self._referrers[referred_id]
+
+    def put_tree(self, root: "ClassifierInstance") -> None:
+        """
+        Cache the given node and all its descendants, stopping at proxies.
+        """
+        if isinstance(root, ProxyNode):
+            return
+        self.put(root)
+        for child in root.get_children():
+            self.put_tree(child)
+
+    def loaded_subtree(
+        self, node_id: str, depth_limit: Optional[int] = None
+    ) -> Optional[List["ClassifierInstance"]]:
+        """
+        Return the cached node with the given ID and its descendants up to depth_limit, or None when any
+        of them is not loaded.
+        """
+        with self._lock:
+            node = self.resolve(node_id)
+            if node is None:
+                self.misses += 1
+                return None
+            collected: List["ClassifierInstance"] = []
+            if self._collect(node, depth_limit, collected):
+                self.hits += 1
+                return collected
+            self.misses += 1
+            return None
+
+    def _collect(
+        self,
+        node: "ClassifierInstance",
+        depth_limit: Optional[int],
+        collected: List["ClassifierInstance"],
+    ) -> bool:
+        if node.id is None or self._nodes.get(node.id) is not node:
+            return False
+        collected.append(node)
+        if depth_limit == 0:
+            return True
+        child_depth_limit = None if depth_limit is None else depth_limit - 1
+        for child in node.get_children():
+            if not self._collect(child, child_depth_limit, collected):
+                return False
+        return True
+
+    def invalidate(self, node_ids: Iterable[str]) -> None:
+        with self._lock:
+            for node_id in node_ids:
+                self._nodes.pop(node_id, None)
+                self._unindex_references(node_id)
+
+    def invalidate_subtrees(self, root_ids: Iterable[str]) -> None:
+        """
+        Remove the nodes with the given IDs and all the cached nodes descending from them.
+        """
+        roots: Set[str] = set(root_ids)
+        if not roots:
+            return
+        with self._lock:
+            to_remove = []
+            for node_id, node in self._nodes.items():
+                ancestor: Optional["ClassifierInstance"] = node
+                while ancestor is not None and not isinstance(ancestor, ProxyNode):
+                    if ancestor.id in roots:
+                        to_remove.append(node_id)
+                        break
+                    ancestor = ancestor.get_parent()
+                if isinstance(ancestor, ProxyNode) and ancestor.id in roots:
+                    to_remove.append(node_id)
+            self.invalidate(to_remove)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._nodes.clear()
+            self._referrers.clear()
+            self._referred.clear()
+
+    def __contains__(self, node_id: str) -> bool:
+        with self._lock:
+            return node_id in self._nodes
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._nodes)
+
+
+def _replace_held_instances(
+    holder: "ClassifierInstance", replacements: Dict[int, "ClassifierInstance"]
+) -> None:
+    # The fields are updated directly: the holders are brought up to date with the repository, they
+    # are not changed, so they must not be reported as changed to lionweb.model.change_tracking
+    if isinstance(holder, DynamicNode):
+        parent = holder.parent
+        if parent is not None and id(parent) in replacements:
+            holder.parent = cast(Node, replacements[id(parent)])
+    if isinstance(holder, DynamicAnnotationInstance):
+        annotated = holder.annotated
+        if annotated is not None and id(annotated) in replacements:
+            holder.annotated = replacements[id(annotated)]
+    if not isinstance(holder, DynamicClassifierInstance):
+        return
+    replaced_descendants = False
+    for children in holder.containment_values.values():
+        for index, child in enumerate(children):
+            if id(child) in replacements:
+                children[index] = cast(Node, replacements[id(child)])
+                replaced_descendants = True
+    for reference_values in holder.reference_values.values():
+        for reference_value in reference_values:
+            referred = reference_value.referred
+            if referred is not None and id(referred) in replacements:
+                reference_value.referred = replacements[id(referred)]
+    annotations = holder.annotations
+    for index, annotation in enumerate(annotations):
+        if id(annotation) in replacements:
+            annotations[index] = cast(
+                "AnnotationInstance", replacements[id(annotation)]
+            )
+            replaced_descendants = True
+    if replaced_descendants:
+        # The content hash cached on the holder covers the previous instances
+        holder._invalidate_content_hash()
@@ -1,12 +1,20 @@
 import zipfile
+from typing import Optional
 
 from lionweb.client import BulkImport, Client
 from lionweb.serialization import LowLevelJsonSerialization
 
 
 def load_repository_archive(
-    client: Client, archive_path: str, upload_threshold=250_000
+    client: Client,
+    archive_path: str,
+    upload_threshold=250_000,
+    upload_size_threshold: Optional[int] = None,
 ):
+    """
+    Upload the nodes in the given archive. Nodes are uploaded when more than upload_threshold are
+    collected or, if upload_size_threshold is specified, when their estimated size exceeds it.
+    """
     import time
 
     def upload(bulk_import: BulkImport) -> int:
@@ -35,7 +43,10 @@ def load_repository_archive(
                     f"  [{ordinal}/{len(file_list)}] Adding {len(chunk.classifier_instances)} nodes from {filename}"
                 )
                 bulk_import.add_nodes(chunk.classifier_instances)
-                if bulk_import.number_of_nodes() > upload_threshold:
+                if bulk_import.number_of_nodes() > upload_threshold or (
+                    upload_size_threshold is not None
+                    and bulk_import.estimated_size() > upload_size_threshold
+                ):
                     total_nodes += upload(bulk_import)
             ordinal += 1
     total_nodes += upload(bulk_import)
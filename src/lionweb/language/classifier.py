@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import List, Optional, Set, TypeVar
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, TypeVar
 
 from lionweb.language.language_entity import LanguageEntity
 from lionweb.language.namespace_provider import NamespaceProvider
@@ -7,9 +7,58 @@ from lionweb.lionweb_version import LionWebVersion
 from lionweb.model.impl.m3node import M3Node
 from lionweb.serialization.data.metapointer import MetaPointer
 
+if TYPE_CHECKING:
+    from lionweb.language.containment import Containment
+    from lionweb.language.feature import Feature
+    from lionweb.language.property import Property
+    from lionweb.language.reference import Reference
+
 T = TypeVar("T", bound=M3Node)
 
 
+class _FeatureIndex:
+    """
+    Lookup tables over all the features of a classifier, inherited ones included. The index is built
+    lazily and discarded as soon as any M3Node changes.
+    """
+
+    def __init__(self, classifier: "Classifier"):
+        from lionweb.language.containment import Containment
+        from lionweb.language.property import Property
+        from lionweb.language.reference import Reference
+
+        self.generation = M3Node.structure_generation
+        self.features = classifier.all_features()
+        self.features_by_key: Dict[str, List["Feature"]] = {}
+        self.features_by_name: Dict[str, "Feature"] = {}
+        self.properties_by_name: Dict[str, "Property"] = {}
+        self.containments_by_name: Dict[str, "Containment"] = {}
+        self.references_by_name: Dict[str, "Reference"] = {}
+        self.properties_by_meta_pointer: Dict[MetaPointer, "Property"] = {}
+        self.containments_by_meta_pointer: Dict[MetaPointer, "Containment"] = {}
+        self.references_by_meta_pointer: Dict[MetaPointer, "Reference"] = {}
+        for feature in self.features:
+            key = feature.get_key()
+            if key is not None:
+                self.features_by_key.setdefault(key, []).append(feature)
+            name = feature.get_name()
+            if name is not None:
+                self.features_by_name.setdefault(name, feature)
+            meta_pointer = MetaPointer.from_feature(feature)
+            if isinstance(feature, Property):
+                if name is not None:
+                    self.properties_by_name.setdefault(name, feature)
+                self.properties_by_meta_pointer.setdefault(meta_pointer, feature)
+            elif isinstance(feature, Containment):
+                if name is not None:
+                    self.containments_by_name.setdefault(name, feature)
+                self.containments_by_meta_pointer.setdefault(meta_pointer, feature)
+            elif isinstance(feature, Reference):
+                if name is not None:
+                    self.references_by_name.setdefault(name, feature)
+                self.references_by_meta_pointer.setdefault(meta_pointer, feature)
+
+
 class Classifier(LanguageEntity[T], NamespaceProvider):
     from lionweb.language.containment import Containment
     from lionweb.language.feature import Feature
@@ -31,12 +80,34 @@ class Classifier(LanguageEntity[T], NamespaceProvider):
             raise ValueError(
                 f"Expected lion_web_version to be an instance of LionWebVersion or None but got {lion_web_version}"
             )
+        self._feature_index: Optional[_FeatureIndex] = None
         super().__init__(
             lion_web_version=lion_web_version, language=language, name=name, id=id
         )
 
+    def _get_feature_index(self) -> _FeatureIndex:
+        index = self._feature_index
+        if index is None or index.generation != M3Node.structure_generation:
+            index = _FeatureIndex(self)
+            self._feature_index = index
+        return index
+
     def get_feature_by_name(self, name: str) -> Optional[Feature]:
-        return next((f for f in self.all_features() if f.get_name() == name), None)
+        return self._get_feature_index().features_by_name.get(name)
+
+    def has_feature(self, feature: Feature) -> bool:
+        """
+        Check if the given feature is one of the features of this classifier, inherited ones
+        included. This is equivalent to `feature in self.all_features()`, but it runs in constant
+        time on the same features used to define the classifier.
+        """
+        key = feature.get_key()
+        if key is None:
+            return False
+        candidates = self._get_feature_index().features_by_key.get(key)
+        if not candidates:
+            return False
+        return any(c is feature for c in candidates) or feature in candidates
 
     @abstractmethod
     def direct_ancestors(self) -> List["Classifier"]:
@@ -110,16 +181,7 @@ class Classifier(LanguageEntity[T], NamespaceProvider):
         if property_name is None:
             raise ValueError("property_name should not be null")
 
-        from lionweb.language.property import Property
-
-        return next(
-            (
-                p
-                for p in self.all_features()
-                if isinstance(p, Property) and p.get_name() == property_name
-            ),
-            None,
-        )
+        return self._get_feature_index().properties_by_name.get(property_name)
 
     def require_property_by_name(self, property_name: str) -> "Property":
         property = self.get_property_by_name(property_name)
@@ -131,16 +193,7 @@ class Classifier(LanguageEntity[T], NamespaceProvider):
         if reference_name is None:
             raise ValueError("reference_name should not be null")
 
-        from lionweb.language.reference import Reference
-
-        return next(
-            (
-                p
-                for p in self.all_features()
-                if isinstance(p, Reference) and p.get_name() == reference_name
-            ),
-            None,
-        )
+        return self._get_feature_index().references_by_name.get(reference_name)
 
     def require_reference_by_name(self, reference_name: str) -> "Reference":
         reference = self.get_reference_by_name(reference_name)
@@ -152,49 +205,19 @@ class Classifier(LanguageEntity[T], NamespaceProvider):
         if containment_name is None:
             raise ValueError("containment_name should not be null")
 
-        from lionweb.language.containment import Containment
-
-        return next(
-            (
-                p
-                for p in self.all_features()
-                if isinstance(p, Containment) and p.get_name() == containment_name
-            ),
-            None,
-        )
+        return self._get_feature_index().containments_by_name.get(containment_name)
 
     def get_property_by_meta_pointer(
         self, meta_pointer: MetaPointer
     ) -> Optional[Property]:
-        return next(
-            (
-                p
-                for p in self.all_properties()
-                if MetaPointer.from_feature(p) == meta_pointer
-            ),
-            None,
-        )
+        return self._get_feature_index().properties_by_meta_pointer.get(meta_pointer)
 
     def get_containment_by_meta_pointer(
         self, meta_pointer: MetaPointer
     ) -> Optional[Containment]:
-        return next(
-            (
-                c
-                for c in self.all_containments()
-                if MetaPointer.from_feature(c) == meta_pointer
-            ),
-            None,
-        )
+        return self._get_feature_index().containments_by_meta_pointer.get(meta_pointer)
 
     def get_reference_by_meta_pointer(
         self, meta_pointer: MetaPointer
     ) -> Optional[Reference]:
-        return next(
-            (
-                r
-                for r in self.all_references()
-                if MetaPointer.from_feature(r) == meta_pointer
-            ),
-            None,
-        )
+        return self._get_feature_index().references_by_meta_pointer.get(meta_pointer)
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 if TYPE_CHECKING:
     from lionweb.language.concept import Concept
@@ -8,6 +8,26 @@ from lionweb.language.enumeration_literal import EnumerationLiteral
 from lionweb.language.language import Language
 from lionweb.language.namespace_provider import NamespaceProvider
 from lionweb.lionweb_version import LionWebVersion
+from lionweb.model.impl.m3node import M3Node
+
+
+class _LiteralIndex:
+    """
+    Lookup tables over the literals of an enumeration. The index is built lazily and discarded as soon
+    as any M3Node changes.
+    """
+
+    def __init__(self, enumeration: "Enumeration"):
+        self.generation = M3Node.structure_generation
+        self.literals_by_key: Dict[str, EnumerationLiteral] = {}
+        self.literals_by_name: Dict[str, EnumerationLiteral] = {}
+        for literal in enumeration.literals:
+            key = literal.key
+            if key is not None:
+                self.literals_by_key.setdefault(key, literal)
+            name = literal.get_name()
+            if name is not None:
+                self.literals_by_name.setdefault(name, literal)
 
 
 class Enumeration(DataType, NamespaceProvider):
@@ -19,6 +39,7 @@ class Enumeration(DataType, NamespaceProvider):
         id: Optional[str] = None,
         key: Optional[str] = None,
     ):
+        self._literal_index: Optional[_LiteralIndex] = None
         super().__init__(
             lion_web_version=lion_web_version, language=language, name=name, id=id
         )
@@ -43,8 +64,15 @@ class Enumeration(DataType, NamespaceProvider):
 
         return LionCore.get_enumeration(self.get_lionweb_version())
 
+    def _get_literal_index(self) -> _LiteralIndex:
+        index = self._literal_index
+        if index is None or index.generation != M3Node.structure_generation:
+            index = _LiteralIndex(self)
+            self._literal_index = index
+        return index
+
     def get_literal_by_name(self, name) -> Optional["EnumerationLiteral"]:
-        return next(
-            (literal for literal in self.literals if literal.get_name() == name),
-            None,
-        )
+        return self._get_literal_index().literals_by_name.get(name)
+
+    def get_literal_by_key(self, key) -> Optional["EnumerationLiteral"]:
+        return self._get_literal_index().literals_by_key.get(key)
@@ -0,0 +1,116 @@
+from dataclasses import dataclass, field
+from typing import AbstractSet, List, Set, Tuple
+
+from lionweb.model.classifier_instance import ClassifierInstance
+from lionweb.model.impl.abstract_classifier_instance import \
+    AbstractClassifierInstance
+
+
+@dataclass
+class ModelChanges:
+    """
+    The changes to some trees since a checkpoint: the nodes which are new or were changed, in the
+    order of the trees, and the ids of the nodes which are no longer in them.
+    """
+
+    changed: List[ClassifierInstance] = field(default_factory=list)
+    deleted_ids: List[str] = field(default_factory=list)
+    # The ids of all the nodes in the trees, those of the nodes which were proxies, and the stamp of
+    # the last change considered
+    node_ids: Set[str] = field(default_factory=set)
+    proxy_ids: Set[str] = field(default_factory=set)
+    stamp: int = 0
+
+    def is_empty(self) -> bool:
+        return not self.changed and not self.deleted_ids
+
+
+class ChangeCheckpoint:
+    """
+    Records the state of some trees, so that the nodes changed since then can be found later. Changes
+    to properties, children, references, annotations and parents made through the methods of
+    DynamicNode, DynamicAnnotationInstance and M3Node are detected. Changes made by modifying the
+    lists returned by their getters, or the ReferenceValues they contain, are not.
+
+    Nodes are not compared with a copy of their previous state: each mutation stamps the node with an
+    increasing counter, and the nodes stamped after the checkpoint are reported as changed. A node
+    changed and then restored is therefore reported too.
+
+    Proxies are not loaded: the nodes of LazyProxyNodes loaded after the checkpoint, and their
+    descendants, are only reported when they are changed.
+    """
+
+    def __init__(self, roots: List[ClassifierInstance]):
+        self.stamp = _current_stamp()
+        self.node_ids: Set[str] = set()
+        self.proxy_ids: Set[str] = set()
+        _collect(roots, self.node_ids, self.proxy_ids)
+
+    def changes(self, roots: List[ClassifierInstance]) -> ModelChanges:
+        """
+        Return the changes to the given trees since the checkpoint. Nodes moved from other trees, or
+        which were not in the trees at the time of the checkpoint, are reported as changed.
+        """
+        stamp = _current_stamp()
+        changes = ModelChanges(stamp=stamp)
+        for node, stored in _collect(
+            roots, changes.node_ids, changes.proxy_ids, self.proxy_ids
+        ):
+            # The descendants of proxies not loaded at the time of the checkpoint were in the trees
+            new = not stored and node.id not in self.node_ids
+            if new or getattr(node, "_change_stamp", 0) > self.stamp:
+                changes.changed.append(node)
+        changes.deleted_ids = sorted(self.node_ids - changes.node_ids)
+        return changes
+
+    def advance(self, changes: ModelChanges) -> None:
+        """
+        Move the checkpoint to the state in which the given changes were computed, typically once
+        they have been stored.
+        """
+        self.stamp = changes.stamp
+        self.node_ids = changes.node_ids
+        self.proxy_ids = changes.proxy_ids
+
+
+def _current_stamp() -> int:
+    # Taking a value from the counter guarantees that mutations after this point get a higher stamp
+    return next(AbstractClassifierInstance._change_counter)
+
+
+def _collect(
+    roots: List[ClassifierInstance],
+    node_ids: Set[str],
+    proxy_ids: Set[str],
+    stored_ids: AbstractSet[str] = frozenset(),
+) -> List[Tuple[ClassifierInstance, bool]]:
+    """
+    Return the nodes of the given trees, annotations included, in the order of
+    ClassifierInstance.collect_self_and_descendants, each with whether it is or descends from a node
+    with one of stored_ids, and add their ids to node_ids. Proxies are not returned and their
+    descendants are not visited, but their ids are added to node_ids and proxy_ids: the nodes of
+    LazyProxyNodes are not loaded, and those already loaded are visited in place of their proxies.
+    """
+    from lionweb.model.impl.lazy_proxy_node import LazyProxyNode
+    from lionweb.model.impl.proxy_node import ProxyNode
+
+    nodes: List[Tuple[ClassifierInstance, bool]] = []
+    stack: List[Tuple[ClassifierInstance, bool]] = [
+        (root, False) for root in reversed(roots)
+    ]
+    while stack:
+        node, stored = stack.pop()
+        if isinstance(node, LazyProxyNode) and node.is_loaded():
+            node = node.node()
+        if node.id is not None:
+            node_ids.add(node.id)
+            stored = stored or node.id in stored_ids
+        if isinstance(node, ProxyNode):
+            proxy_ids.add(node.get_id())
+            continue
+        nodes.append((node, stored))
+        stack.extend((child, stored) for child in reversed(node.get_children()))
+        stack.extend(
+            (annotation, stored) for annotation in reversed(node.get_annotations())
+        )
+    return nodes
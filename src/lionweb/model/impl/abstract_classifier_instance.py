@@ -1,5 +1,7 @@
+import itertools
 from abc import ABC
-from typing import TYPE_CHECKING, Generic, List, Optional, TypeVar
+from typing import (TYPE_CHECKING, Any, ClassVar, Generic, Iterator, List,
+                    Optional, Tuple, TypeVar)
 
 from lionweb.model.classifier_instance import ClassifierInstance
 
@@ -17,6 +19,14 @@ class AbstractClassifierInstance(Generic[T], ClassifierInstance[T], ABC):
             DynamicAnnotationInstance
         from lionweb.model.reference_value import ReferenceValue
 
+    # Mutations stamp the instance with the next value of this counter, so that the instances changed
+    # since a checkpoint can be found, see lionweb.model.change_tracking
+    _change_counter: ClassVar[Iterator[int]] = itertools.count(1)
+    _change_stamp: int = 0
+    # The content hash of the subtree rooted at the instance, with the serialization used to compute
+    # it, see lionweb.serialization.content_hash
+    _content_hash: Optional[Tuple[Any, bytes]] = None
+
     def __init__(self):
         from lionweb.model.annotation_instance import AnnotationInstance
 
@@ -43,11 +53,13 @@ class AbstractClassifierInstance(Generic[T], ClassifierInstance[T], ABC):
             instance.set_annotated(self)
         if instance not in self.annotations:
             self.annotations.append(instance)
+            self._mark_changed()
 
     def remove_annotation(self, instance: "AnnotationInstance") -> None:
         if instance not in self.annotations:
             raise ValueError("Annotation instance not found")
         self.annotations.remove(instance)
+        self._mark_changed()
         from lionweb.model.impl.dynamic_annotation_instance import \
             DynamicAnnotationInstance
 
@@ -57,6 +69,7 @@ class AbstractClassifierInstance(Generic[T], ClassifierInstance[T], ABC):
     def try_to_remove_annotation(self, instance: "AnnotationInstance") -> None:
         if instance in self.annotations:
             self.annotations.remove(instance)
+            self._mark_changed()
             from lionweb.model.impl.dynamic_annotation_instance import \
                 DynamicAnnotationInstance
 
@@ -69,8 +82,10 @@ class AbstractClassifierInstance(Generic[T], ClassifierInstance[T], ABC):
         child = kwargs["child"]
         for containment in self.get_classifier().all_containments():
             children = self.get_children(containment)
-            if child in children:
-                children.remove(child)
+            index = self._index_of_child(children, child)
+            if index >= 0:
+                del children[index]
+                self._mark_changed()
                 from lionweb.model.has_settable_parent import HasSettableParent
 
                 if isinstance(child, HasSettableParent):
@@ -78,11 +93,12 @@ class AbstractClassifierInstance(Generic[T], ClassifierInstance[T], ABC):
                 return
 
     def remove_child_by_index(self, containment: "Containment", index: int) -> None:
-        if containment not in self.get_classifier().all_containments():
+        if not self.get_classifier().has_feature(containment):
             raise ValueError("Containment not belonging to this concept")
         children = self.get_children(containment)
         if index < len(children):
             del children[index]
+            self._mark_changed()
         else:
             raise ValueError(
                 f"Invalid index {index}, children count is {len(children)}"
@@ -93,17 +109,46 @@ class AbstractClassifierInstance(Generic[T], ClassifierInstance[T], ABC):
     def remove_reference_value_by_index(
         self, reference: "Reference", index: int
     ) -> None:
-        if reference not in self.get_classifier().all_references():
+        if not self.get_classifier().has_feature(reference):
             raise ValueError("Reference not belonging to this concept")
         del self.get_reference_values(reference)[index]
+        self._mark_changed()
 
     def remove_reference_value(
         self, reference: "Reference", reference_value: Optional["ReferenceValue"]
     ) -> None:
-        if reference not in self.get_classifier().all_references():
+        if not self.get_classifier().has_feature(reference):
             raise ValueError("Reference not belonging to this concept")
         if reference_value not in self.get_reference_values(reference):
             raise ValueError(
                 f"Reference value not found under reference {reference.get_name()}"
             )
         self.get_reference_values(reference).remove(reference_value)
+        self._mark_changed()
+
+    # Protected methods
+
+    def _mark_changed(self) -> None:
+        self._change_stamp = next(AbstractClassifierInstance._change_counter)
+        self._invalidate_content_hash()
+
+    def _invalidate_content_hash(self) -> None:
+        # The hash of an instance covers its descendants, so those of its ancestors are stale too.
+        # An instance never has a cached hash while one of its descendants has none, hence the walk
+        # can stop at the first ancestor without one
+        node: Any = self
+        while getattr(node, "_content_hash", None) is not None:
+            node._content_hash = None
+            node = node.get_parent()
+
+    @staticmethod
+    def _index_of_child(children: List[Any], child: Any) -> int:
+        """
+        Return the position of the given child in the list, or -1 if it is not there.
+        Children are matched by identity: structural equality on nodes is expensive and two distinct
+        nodes may compare equal.
+        """
+        for i, c in enumerate(children):
+            if c is child:
+                return i
+        return -1
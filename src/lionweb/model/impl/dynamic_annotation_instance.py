@@ -1,7 +1,7 @@
-from typing import TYPE_CHECKING, Optional, cast
+from typing import TYPE_CHECKING, Any, Mapping, Optional, cast
 
 if TYPE_CHECKING:
-    from lionweb.language import Annotation
+    from lionweb.language import Annotation, Property
 
 from lionweb.model.annotation_instance import AnnotationInstance
 from lionweb.model.classifier_instance import ClassifierInstance
@@ -17,11 +17,14 @@ class DynamicAnnotationInstance(DynamicClassifierInstance, AnnotationInstance):
         id: str,
         annotation: Optional["Annotation"] = None,
         annotated: Optional[ClassifierInstance] = None,
+        properties_values: Optional[Mapping["Property", Any]] = None,
     ):
         super().__init__()
         self._id = id
         self.annotation = annotation
         self.annotated: Optional[ClassifierInstance] = None
+        if properties_values:
+            self.set_property_values_unchecked(properties_values)
         if annotated:
             self.set_annotated(annotated)
 
@@ -41,6 +44,7 @@ class DynamicAnnotationInstance(DynamicClassifierInstance, AnnotationInstance):
             self.annotated.try_to_remove_annotation(self)
 
         self.annotated = annotated
+        self._mark_changed()
 
         if self.annotated and isinstance(self.annotated, AbstractClassifierInstance):
             self.annotated.add_annotation(self)
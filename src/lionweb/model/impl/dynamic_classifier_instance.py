@@ -1,4 +1,5 @@
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union, cast
+from typing import (TYPE_CHECKING, Any, Dict, Iterable, List, Mapping,
+                    Optional, Union, cast)
 
 from lionweb.language.containment import Containment
 from lionweb.language.reference import Reference
@@ -34,48 +35,43 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
     # Public methods for properties
 
     def get_property_value(self, property: Union[str, "Property"]) -> Optional[object]:
-        from lionweb.language import Classifier
         from lionweb.language.lioncore_builtins import LionCoreBuiltins
 
         if property is None:
             raise ValueError("Property should not be null")
+        classifier = self.get_classifier()
         if isinstance(property, str):
             property_name = property
-            property_tmp = cast(Classifier, self.get_classifier()).get_property_by_name(
-                property_name
-            )
+            property_tmp = classifier.get_property_by_name(property_name)
             if property_tmp is None:
                 raise ValueError(f"Property {property_name} was not found")
             else:
                 property = property_tmp
         if property.key is None:
             raise ValueError("Property.key should not be null")
-        if property not in self.get_classifier().all_properties():
+        if not classifier.has_feature(property):
             raise ValueError("Property not belonging to this classifier")
 
         stored_value = self.property_values.get(property.key)
 
         if (
             stored_value is None
-            and property.type
-            == LionCoreBuiltins.get_boolean(self.get_classifier().get_lionweb_version())
             and property.is_required()
+            and property.type
+            == LionCoreBuiltins.get_boolean(classifier.get_lionweb_version())
         ):
             return False
 
         return stored_value
 
     def set_property_value(self, property: Union[str, "Property"], value: Any) -> None:
-        from lionweb.language import Classifier
-
+        classifier = self.get_classifier()
         if isinstance(property, str):
             property_name = property
-            property_tmp = cast(Classifier, self.get_classifier()).get_property_by_name(
-                property
-            )
+            property_tmp = classifier.get_property_by_name(property)
             if property_tmp is None:
                 raise ValueError(
-                    f"Property {property_name} not found. Classifier {self.get_classifier()}"
+                    f"Property {property_name} not found. Classifier {classifier}"
                 )
             else:
                 property = property_tmp
@@ -83,15 +79,36 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             raise ValueError("Property should not be null")
         if property.key is None:
             raise ValueError("Cannot assign a property with no Key specified")
-        if property not in self.get_classifier().all_properties():
+        if not classifier.has_feature(property):
             raise ValueError(
-                f"Property {property} does not belong to classifier {self.get_classifier()}"
+                f"Property {property} does not belong to classifier {classifier}"
             )
 
         if (value is None or value is False) and property.is_required():
             self.property_values.pop(property.key, None)
         else:
             self.property_values[property.key] = value
+        self._mark_changed()
+
+    def set_property_values_unchecked(self, values: Mapping["Property", Any]) -> None:
+        """
+        Assign many property values at once, skipping the check that each property belongs to the
+        classifier of this instance. Values are stored as set_property_value would store them, except
+        that None values are never stored: they are read back as None (or False for required booleans)
+        anyway, and leaving them out keeps instances equal to those built by setting only the values
+        present.
+
+        This is meant for deserializers and other callers which obtained the properties from the
+        classifier itself: passing properties of other classifiers produces an inconsistent instance.
+        """
+        property_values = self.property_values
+        for property, value in values.items():
+            key = cast(str, property.key)
+            if value is None or (value is False and property.is_required()):
+                property_values.pop(key, None)
+            else:
+                property_values[key] = value
+        self._mark_changed()
 
     # Public methods for containments
 
@@ -112,7 +129,7 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             my_containment = containment
         if my_containment.get_key() is None:
             raise ValueError("Containment.key should not be null")
-        if my_containment not in self.get_classifier().all_containments():
+        if not self.get_classifier().has_feature(my_containment):
             raise ValueError("Containment not belonging to this concept")
 
         return self.containment_values.get(my_containment.get_key(), [])
@@ -135,25 +152,52 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
 
     def remove_child(self, **kwargs) -> None:
         node = kwargs["child"]
-        for key, children in self.containment_values.items():
-            if node in children:
-                children.remove(node)
+        for children in self.containment_values.values():
+            index = self._index_of_child(children, node)
+            if index >= 0:
+                del children[index]
+                self._mark_changed()
                 if isinstance(node, HasSettableParent):
                     node.set_parent(None)
                 return
         raise ValueError("The given node is not a child of this node")
 
+    def remove_children(self, nodes: Iterable[Node]) -> None:
+        """
+        Remove all the given children, visiting each containment only once. This is the operation to
+        use when detaching many children, as calling remove_child repeatedly is quadratic on large
+        containments. Children are matched by identity. If any of the given nodes is not a child of
+        this node a ValueError is raised and nothing is removed.
+        """
+        to_remove = {id(node): node for node in nodes}
+        if not to_remove:
+            return
+        found = 0
+        for children in self.containment_values.values():
+            for child in children:
+                if id(child) in to_remove:
+                    found += 1
+        if found != len(to_remove):
+            raise ValueError("Some of the given nodes are not children of this node")
+        for children in self.containment_values.values():
+            children[:] = [child for child in children if id(child) not in to_remove]
+        self._mark_changed()
+        for node in to_remove.values():
+            if isinstance(node, HasSettableParent):
+                node.set_parent(None)
+
     def remove_child_by_index(self, containment: Containment, index: int):
         if containment is None:
             raise ValueError("Containment should not be null")
         if containment.get_key() is None:
             raise ValueError("Containment.key should not be null")
-        if containment not in self.get_classifier().all_containments():
+        if not self.get_classifier().has_feature(containment):
             raise ValueError("Containment not belonging to this concept")
 
         children = self.containment_values.get(containment.get_key(), [])
         if len(children) > index:
             del children[index]
+            self._mark_changed()
         else:
             raise ValueError(f"Invalid index {index} when children are {len(children)}")
 
@@ -164,7 +208,7 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             raise ValueError("Reference should not be null")
         if reference.get_key() is None:
             raise ValueError("Reference.key should not be null")
-        if reference not in self.get_classifier().all_references():
+        if not self.get_classifier().has_feature(reference):
             raise ValueError("Reference not belonging to this concept")
 
         return self.reference_values.get(reference.get_key(), [])
@@ -187,16 +231,14 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             raise ValueError("Reference should not be null")
         if reference.get_key() is None:
             raise ValueError("Reference.key should not be null")
-        if reference not in self.get_classifier().all_references():
+        if not self.get_classifier().has_feature(reference):
             raise ValueError("Reference not belonging to this concept")
 
         reference_values = self.reference_values.get(reference.get_key(), [])
         for i, rv in enumerate(reference_values):
-            if reference_value is None and rv is None:
-                del reference_values[i]
-                return
-            if reference_value == rv:
+            if reference_value is None and rv is None or reference_value == rv:
                 del reference_values[i]
+                self._mark_changed()
                 return
         raise ValueError(
             f"The given reference value could not be found under reference {reference.get_name()}"
@@ -207,12 +249,13 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             raise ValueError("Reference should not be null")
         if reference.get_key() is None:
             raise ValueError("Reference.key should not be null")
-        if reference not in self.get_classifier().all_references():
+        if not self.get_classifier().has_feature(reference):
             raise ValueError("Reference not belonging to this classifier")
 
         reference_values = self.reference_values.get(reference.get_key(), [])
         if len(reference_values) > index:
             del reference_values[index]
+            self._mark_changed()
         else:
             raise ValueError(
                 f"Invalid index {index} when reference values are {len(reference_values)}"
@@ -223,10 +266,11 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             raise ValueError("Reference should not be null")
         if reference.get_key() is None:
             raise ValueError("Reference.key should not be null")
-        if reference not in self.get_classifier().all_references():
+        if not self.get_classifier().has_feature(reference):
             raise ValueError("Reference not belonging to this classifier")
 
         self.reference_values[reference.get_key()] = values
+        self._mark_changed()
 
     # Private methods for containments
 
@@ -235,6 +279,7 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
         if isinstance(value, HasSettableParent):
             value.set_parent(self)
         self.containment_values.setdefault(containment.get_key(), []).append(value)
+        self._mark_changed()
 
     def _set_containment_single_value(
         self, containment: Containment, value: Optional[Node]
@@ -250,6 +295,7 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             if isinstance(value, HasSettableParent):
                 value.set_parent(self)
             self.containment_values[containment.get_key()] = [value]
+        self._mark_changed()
 
     # Private methods for references
 
@@ -260,6 +306,7 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             self.reference_values.pop(reference.get_key(), None)
         else:
             self.reference_values[reference.get_key()] = [value]
+        self._mark_changed()
 
     def _add_reference_multiple_value(
         self, reference: Reference, reference_value: ReferenceValue
@@ -269,3 +316,4 @@ class DynamicClassifierInstance(AbstractClassifierInstance, ClassifierInstance):
             self.reference_values.setdefault(reference.get_key(), []).append(
                 reference_value
             )
+            self._mark_changed()
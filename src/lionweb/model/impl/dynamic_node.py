@@ -1,7 +1,8 @@
-from typing import TYPE_CHECKING, Dict, List, Optional, cast
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Optional, cast
 
 if TYPE_CHECKING:
     from lionweb.language.concept import Concept
+    from lionweb.language.property import Property
 
 from lionweb.language.containment import Containment
 from lionweb.model.classifier_instance import ClassifierInstance
@@ -12,7 +13,16 @@ from lionweb.model.node import Node
 
 
 class DynamicNode(DynamicClassifierInstance, Node, HasSettableParent):
-    def __init__(self, id: Optional[str] = None, concept: Optional["Concept"] = None):
+    def __init__(
+        self,
+        id: Optional[str] = None,
+        concept: Optional["Concept"] = None,
+        properties_values: Optional[Mapping["Property", Any]] = None,
+    ):
+        """
+        The optional properties_values are assigned without verifying that they belong to the concept,
+        see set_property_values_unchecked.
+        """
         self._id = id
         self.concept = concept
         self.parent: Optional[Node] = None
@@ -24,6 +34,8 @@ class DynamicNode(DynamicClassifierInstance, Node, HasSettableParent):
         from lionweb.model.annotation_instance import AnnotationInstance
 
         self.annotations: List[AnnotationInstance] = []
+        if properties_values:
+            self.set_property_values_unchecked(properties_values)
 
     def get_id(self) -> Optional[str]:
         return self._id
@@ -43,12 +55,13 @@ class DynamicNode(DynamicClassifierInstance, Node, HasSettableParent):
         if self.parent is None:
             return None
         for containment in self.parent.get_classifier().all_containments():
-            if any(child == self for child in self.parent.get_children(containment)):
+            if any(child is self for child in self.parent.get_children(containment)):
                 return containment
         raise RuntimeError("Unable to find the containment feature")
 
     def set_parent(self, parent: Optional["ClassifierInstance"]):
         self.parent = cast(Optional[Node], parent)
+        self._mark_changed()
 
     def __eq__(self, other):
         if not isinstance(other, DynamicNode):
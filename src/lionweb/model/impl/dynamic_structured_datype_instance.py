@@ -2,9 +2,11 @@ from typing import Any, Dict, Union
 
 from lionweb.language.field import Field
 from lionweb.language.structured_data_type import StructuredDataType
+from lionweb.model.structured_data_type_instance import \
+    StructuredDataTypeInstance
 
 
-class DynamicStructuredDataTypeInstance:
+class DynamicStructuredDataTypeInstance(StructuredDataTypeInstance):
     def __init__(self, structured_data_type: StructuredDataType):
         if structured_data_type is None:
             raise ValueError("structuredDataType should not be null")
@@ -0,0 +1,203 @@
+from typing import TYPE_CHECKING, Callable, List, Optional, cast
+
+from lionweb.model.classifier_instance import ClassifierInstance
+from lionweb.model.has_settable_parent import HasSettableParent
+from lionweb.model.impl.abstract_classifier_instance import \
+    AbstractClassifierInstance
+from lionweb.model.impl.proxy_node import ProxyNode
+from lionweb.model.node import Node
+
+if TYPE_CHECKING:
+    from lionweb.language import Annotation
+    from lionweb.model.annotation_instance import AnnotationInstance
+
+
+NodesLoader = Callable[[List[str]], List[Node]]
+
+
+class LazyProxyLoader:
+    """
+    Factory of LazyProxyNodes which load their nodes through the given loader. The loader receives a
+    list of node IDs and returns the corresponding nodes, for example by retrieving them from a
+    repository.
+
+    Proxies are grouped in batches of up to batch_size, in creation order. When a proxy is accessed the
+    first time, all the proxies of its batch which are not loaded yet are loaded with it, with a single
+    call to the loader. Proxies created by the same deserialization, such as the children of a node,
+    tend therefore to be loaded together.
+    """
+
+    def __init__(self, loader: NodesLoader, batch_size: int = 100):
+        if batch_size <= 0:
+            raise ValueError("batch_size should be positive")
+        self.loader = loader
+        self.batch_size = batch_size
+        self.loads = 0
+        self._batch: List["LazyProxyNode"] = []
+
+    def __call__(self, node_id: str) -> "LazyProxyNode":
+        if len(self._batch) >= self.batch_size:
+            self._batch = []
+        proxy = LazyProxyNode(node_id, self, self._batch)
+        self._batch.append(proxy)
+        return proxy
+
+    def load(self, proxy: "LazyProxyNode") -> Node:
+        batch = proxy._batch
+        if batch is self._batch:
+            # Proxies created from now on will belong to a new batch
+            self._batch = []
+        to_load = [p for p in batch if p._node is None]
+        if proxy not in to_load:
+            to_load.insert(0, proxy)
+        self.loads += 1
+        start = next(AbstractClassifierInstance._change_counter)
+        loaded = {n.id: n for n in self.loader([p._id for p in to_load])}
+        for n in loaded.values():
+            # Nodes built by the loader, typically by deserializing them, are as stored: they must not
+            # be reported as changed to lionweb.model.change_tracking
+            if isinstance(n, AbstractClassifierInstance) and n._change_stamp > start:
+                n._change_stamp = 0
+        for p in to_load:
+            node = loaded.get(p.id)
+            if node is not None:
+                p._node = node
+                if p._container is not None:
+                    self._link(p, node, p._container)
+            p._batch = []
+        batch.clear()
+        if proxy._node is None:
+            raise ValueError(f"The node {proxy.id} could not be loaded")
+        return proxy._node
+
+    @staticmethod
+    def _link(
+        proxy: "LazyProxyNode", node: Node, container: ClassifierInstance
+    ) -> None:
+        """
+        Put the loaded node in place of its proxy among the children of the container, and make the
+        container its parent. The loaded node was deserialized on its own, so its parent is a proxy:
+        that proxy stands for the container, which it now resolves to, so that the container is
+        not loaded again.
+        """
+        from lionweb.model.impl.dynamic_classifier_instance import \
+            DynamicClassifierInstance
+        from lionweb.model.impl.dynamic_node import DynamicNode
+
+        placeholder = node.get_parent()
+        if (
+            isinstance(placeholder, LazyProxyNode)
+            and placeholder._node is None
+            and placeholder.id == container.id
+            and isinstance(container, Node)
+        ):
+            placeholder._node = container
+        # The parent and the children lists are updated directly: neither the node nor the container
+        # are changed, the node is just materialized, so they must not be reported as changed to
+        # lionweb.model.change_tracking
+        if isinstance(node, DynamicNode):
+            node.parent = cast(Node, container)
+        elif isinstance(node, HasSettableParent):
+            node.set_parent(container)
+        if isinstance(container, DynamicClassifierInstance):
+            for children in container.containment_values.values():
+                for index, child in enumerate(children):
+                    if child is proxy:
+                        children[index] = node
+            # Hashes computed while the node was a proxy identified it by id
+            container._invalidate_content_hash()
+
+
+class LazyProxyNode(ProxyNode, HasSettableParent):
+    """
+    ProxyNode bound to a LazyProxyLoader. Instead of refusing every operation, it loads the node it
+    stands for on first access and delegates to it from then on.
+
+    A proxy added as a child remembers its container: once loaded, its node takes its place among the
+    children of the container, with the container as parent.
+    """
+
+    def __init__(
+        self,
+        node_id: str,
+        loader: LazyProxyLoader,
+        batch: Optional[List["LazyProxyNode"]] = None,
+    ):
+        super().__init__(node_id)
+        self._loader = loader
+        self._batch: List["LazyProxyNode"] = batch if batch is not None else [self]
+        self._node: Optional[Node] = None
+        self._container: Optional[ClassifierInstance] = None
+
+    def is_loaded(self) -> bool:
+        return self._node is not None
+
+    def node(self) -> Node:
+        """
+        Return the node this proxy stands for, loading it if necessary.
+        """
+        if self._node is None:
+            return self._loader.load(self)
+        return self._node
+
+    def add_annotation(self, instance: "AnnotationInstance") -> None:
+        self.node().add_annotation(instance)
+
+    def remove_annotation(self, instance: "AnnotationInstance") -> None:
+        self.node().remove_annotation(instance)
+
+    def get_parent(self):
+        return self.node().get_parent()
+
+    def set_parent(self, parent: Optional[ClassifierInstance]) -> None:
+        if self._node is None:
+            self._container = parent
+        elif isinstance(self._node, HasSettableParent):
+            self._node.set_parent(parent)
+        else:
+            raise NotImplementedError(f"Cannot set parent for {self._node}")
+
+    def get_property_value(self, property):
+        return self.node().get_property_value(property=property)
+
+    def set_property_value(self, property, value):
+        self.node().set_property_value(property=property, value=value)
+
+    def get_children(self, containment=None):
+        return self.node().get_children(containment=containment)
+
+    def add_child(self, containment, child):
+        self.node().add_child(containment=containment, child=child)
+
+    def remove_child(self, **kwargs):
+        self.node().remove_child(**kwargs)
+
+    def get_reference_values(self, reference):
+        return self.node().get_reference_values(reference=reference)
+
+    def add_reference_value(self, reference, referred_node):
+        return self.node().add_reference_value(reference, referred_node)
+
+    def get_classifier(self):
+        return self.node().get_classifier()
+
+    def get_annotations(self, annotation: Optional["Annotation"] = None):
+        return self.node().get_annotations(annotation)
+
+    def get_containment_feature(self):
+        return self.node().get_containment_feature()
+
+    def remove_child_by_index(self, containment, index: int):
+        return getattr(self.node(), "remove_child_by_index")(containment, index)
+
+    def remove_reference_value(self, reference, reference_value):
+        return self.node().remove_reference_value(reference, reference_value)
+
+    def remove_reference_value_by_index(self, reference, index: int):
+        return getattr(self.node(), "remove_reference_value_by_index")(reference, index)
+
+    def set_reference_values(self, reference, values):
+        self.node().set_reference_values(reference, values)
+
+    def __repr__(self):
+        return f"LazyProxyNode({self.id})"
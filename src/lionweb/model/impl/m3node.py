@@ -1,6 +1,6 @@
 from abc import ABC
-from typing import (TYPE_CHECKING, Any, Generic, List, Optional, TypeVar,
-                    Union, cast)
+from typing import (TYPE_CHECKING, Any, ClassVar, Generic, List, Optional,
+                    TypeVar, Union, cast)
 
 from lionweb.language.ikeyed import IKeyed
 from lionweb.lionweb_version import LionWebVersion
@@ -19,6 +19,10 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
         from lionweb.model.classifier_instance import ClassifierInstance
         from lionweb.model.reference_value import ReferenceValue
 
+    # Incremented whenever any M3Node changes. Caches derived from the structure of languages, such as
+    # the feature lookups of classifiers, compare against it to find out when they are stale.
+    structure_generation: ClassVar[int] = 0
+
     def __init__(self, lion_web_version: Optional[LionWebVersion] = None):
         AbstractClassifierInstance.__init__(self)
         if lion_web_version is not None and not isinstance(
@@ -56,6 +60,7 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
         if parent is not None and not is_node(parent):
             raise ValueError("Not supported")
         self.parent = cast(Optional[Node], parent)
+        self._structure_changed()
         return self
 
     def get_root(self) -> Node:
@@ -83,6 +88,7 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
     def set_property_value(
         self, property: Union[str, "Property"], value: Optional[Any]
     ) -> None:
+        self._structure_changed()
         if isinstance(property, str):
             self.property_values[property] = value
             return
@@ -113,6 +119,10 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
     def remove_child(self, **kwargs) -> None:
         raise NotImplementedError()
 
+    def remove_child_by_index(self, containment: "Containment", index: int) -> None:
+        super().remove_child_by_index(containment, index)
+        self._structure_changed()
+
     def get_reference_values(self, reference: "Reference") -> List:
         name = reference.get_name()
         if name is None:
@@ -128,12 +138,26 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
         if name is None:
             raise ValueError()
         self.reference_values.setdefault(name, []).append(reference_value)
+        self._structure_changed()
 
     def set_reference_values(self, reference: "Reference", values: List) -> None:
         name = reference.get_name()
         if name is None:
             raise ValueError()
         self.reference_values[name] = values
+        self._structure_changed()
+
+    def remove_reference_value(
+        self, reference: "Reference", reference_value: Optional["ReferenceValue"]
+    ) -> None:
+        super().remove_reference_value(reference, reference_value)
+        self._structure_changed()
+
+    def remove_reference_value_by_index(
+        self, reference: "Reference", index: int
+    ) -> None:
+        super().remove_reference_value_by_index(reference, index)
+        self._structure_changed()
 
     def get_id(self) -> Optional[str]:
         return self._id
@@ -165,6 +189,7 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
 
     def set_containment_single_value(self, link_name: str, value: Node) -> None:
         self.containment_values[link_name] = [value]
+        self._structure_changed()
 
     def set_reference_single_value(
         self, link_name: str, value: Optional["ReferenceValue"]
@@ -173,6 +198,7 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
             self.reference_values[link_name] = []
         else:
             self.reference_values[link_name] = [value]
+        self._structure_changed()
 
     def add_containment_multiple_value(self, link_name: str, value: Node) -> bool:
         """
@@ -196,12 +222,18 @@ class M3Node(Generic[T], Node, IKeyed[T], AbstractClassifierInstance, ABC):
             self.containment_values[link_name].append(value)
         else:
             self.containment_values[link_name] = [value]
+        self._structure_changed()
         return True
 
     def add_reference_multiple_value(
         self, link_name: str, value: "ReferenceValue"
     ) -> None:
         self.reference_values.setdefault(link_name, []).append(value)
+        self._structure_changed()
+
+    def _structure_changed(self) -> None:
+        M3Node.structure_generation += 1
+        self._mark_changed()
 
     def get_lionweb_version(self) -> LionWebVersion:
         return self.lion_web_version
@@ -1,5 +1,9 @@
 from .abstract_serialization import AbstractSerialization
-from .archive import load_archive, process_archive
+from .archive import (ArchiveIndex, ArchiveReader, IndexedArchiveReader,
+                      IndexedArchiveWriter, load_archive, process_archive,
+                      write_archive)
+from .chunk_diff import ChunkChange, diff_chunks
+from .content_hash import chunk_content_hashes, node_content_hash
 from .data import (MetaPointer, SerializationChunk,
                    SerializedClassifierInstance, SerializedContainmentValue,
                    SerializedPropertyValue, SerializedReferenceValue)
@@ -10,6 +14,7 @@ from .serialization_provider import (create_standard_json_serialization,
                                      create_standard_protobuf_serialization,
                                      setup_standard_initialization)
 from .serialized_json_comparison_utils import SerializedJsonComparisonUtils
+from .string_interner import StringInterner
 
 __all__ = [
     "AbstractSerialization",
@@ -26,6 +31,16 @@ __all__ = [
     "SerializedPropertyValue",
     "SerializedReferenceValue",
     "LowLevelJsonSerialization",
+    "ArchiveIndex",
+    "ArchiveReader",
+    "IndexedArchiveReader",
+    "IndexedArchiveWriter",
     "load_archive",
     "process_archive",
+    "write_archive",
+    "StringInterner",
+    "ChunkChange",
+    "diff_chunks",
+    "node_content_hash",
+    "chunk_content_hashes",
 ]
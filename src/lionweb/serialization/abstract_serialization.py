@@ -1,9 +1,13 @@
-from typing import TYPE_CHECKING, Dict, List
+from contextlib import contextmanager
+from typing import (TYPE_CHECKING, Callable, Dict, Iterator, List, Optional,
+                    Set, Tuple)
 
-from lionweb.language.data_type import DataType
 from lionweb.lionweb_version import LionWebVersion
 from lionweb.model import ClassifierInstance
 from lionweb.model.has_settable_parent import HasSettableParent
+from lionweb.model.impl.dynamic_classifier_instance import \
+    DynamicClassifierInstance
+from lionweb.model.impl.m3node import M3Node
 from lionweb.serialization.classifier_resolver import ClassifierResolver
 from lionweb.serialization.data.language_version import LanguageVersion
 from lionweb.serialization.data.metapointer import MetaPointer
@@ -18,14 +22,23 @@ from lionweb.serialization.data.serialized_reference_value import (
     SerializedReferenceValue, SerializedReferenceValueEntry)
 from lionweb.serialization.deserialization_exception import \
     DeserializationException
+from lionweb.serialization.deserialization_plan import DeserializationPlan
 from lionweb.serialization.deserialization_status import DeserializationStatus
 from lionweb.serialization.instantiator import Instantiator
 from lionweb.serialization.primitives_values_serialization import \
     PrimitiveValuesSerialization
+from lionweb.serialization.serialization_plan import SerializationPlan
+from lionweb.serialization.string_interner import StringInterner
 from lionweb.serialization.unavailable_node_policy import UnavailableNodePolicy
+from lionweb.utils.instrumentation import Instrumentation
 
 if TYPE_CHECKING:
+    from lionweb.api.classifier_instance_resolver import \
+        ClassifierInstanceResolver
+    from lionweb.language import Classifier
     from lionweb.model.annotation_instance import AnnotationInstance
+    from lionweb.model.change_tracking import ModelChanges
+    from lionweb.model.impl.proxy_node import ProxyNode
 
 
 class AbstractSerialization:
@@ -47,12 +60,49 @@ class AbstractSerialization:
         self.unavailable_children_policy = UnavailableNodePolicy.THROW_ERROR
         self.unavailable_reference_target_policy = UnavailableNodePolicy.THROW_ERROR
         self.builtins_reference_dangling = False
+        # Creates the proxies standing for unavailable nodes. When None, inert ProxyNodes are created
+        self.proxy_factory: Optional[Callable[[str], "ProxyNode"]] = None
+        # When set, the phases of serialization and deserialization are measured
+        self.instrumentation: Optional[Instrumentation] = None
         self.keep_null_properties = False
+        # When set, string property values and resolve info of deserialized nodes are interned
+        self.string_interner: Optional[StringInterner] = None
+        # Deserialization plans by classifier MetaPointer. They are discarded when any of the registries
+        # they are derived from, or any language element, changes
+        self._deserialization_plans: Dict[MetaPointer, DeserializationPlan] = {}
+        self._deserialization_plans_key: Optional[Tuple] = None
+        # Serialization plans by classifier. They are discarded when the primitive serializers, or any
+        # language element, change
+        self._serialization_plans: Dict[int, SerializationPlan] = {}
+        self._serialization_plans_key: Optional[Tuple] = None
 
     def enable_dynamic_nodes(self):
         self.instantiator.enable_dynamic_nodes()
         self.primitive_values_serialization.enable_dynamic_nodes()
 
+    @contextmanager
+    def instrumented(
+        self, instrumentation: Optional[Instrumentation] = None
+    ) -> Iterator[Instrumentation]:
+        """
+        Measure the operations performed within the with block, using the given Instrumentation or a
+        new one.
+        """
+        previous = self.instrumentation
+        self.instrumentation = instrumentation or Instrumentation()
+        try:
+            yield self.instrumentation
+        finally:
+            self.instrumentation = previous
+
+    def enable_string_interning(self, max_size: int = 100_000) -> StringInterner:
+        """
+        Share a single copy of equal string property values and resolve info among the nodes this
+        instance deserializes. The returned interner exposes statistics about its usage.
+        """
+        self.string_interner = StringInterner(max_size)
+        return self.string_interner
+
     def register_language(self, language):
         self.classifier_resolver.register_language(language)
         self.primitive_values_serialization.register_language(language)
@@ -76,9 +126,45 @@ class AbstractSerialization:
             self.collect_self_and_descendants(child, True, collection)
         return collection
 
-    def serialize_nodes_to_serialization_chunk(self, classifier_instances):
+    def serialize_nodes_to_serialization_chunk(
+        self, classifier_instances, included_ids: Optional[Set[str]] = None
+    ):
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self._serialize_nodes_to_serialization_chunk(
+                classifier_instances, included_ids
+            )
+        with instrumentation.phase("serialization.nodes"):
+            serialized_chunk = self._serialize_nodes_to_serialization_chunk(
+                classifier_instances, included_ids
+            )
+        instrumentation.count(
+            "serialization.nodes", len(serialized_chunk.classifier_instances)
+        )
+        return serialized_chunk
+
+    def serialize_changes_to_serialization_chunk(
+        self, changes: "ModelChanges"
+    ) -> SerializationChunk:
+        """
+        Serialize the nodes new or changed since a checkpoint. Annotations are serialized only when
+        they changed too, like any other node.
+        """
+        return self.serialize_nodes_to_serialization_chunk(
+            changes.changed, changes.node_ids
+        )
+
+    def _serialize_nodes_to_serialization_chunk(
+        self, classifier_instances, included_ids: Optional[Set[str]] = None
+    ):
+        """
+        When included_ids is given, annotations whose id is in it are not serialized along with the
+        node they annotate, as they are serialized elsewhere. By default, these are the annotations
+        among classifier_instances.
+        """
         serialized_chunk = SerializationChunk()
         serialized_chunk.serialization_format_version = self.lion_web_version.value
+        considered_plans: Set[SerializationPlan] = set()
 
         for classifier_instance in classifier_instances:
             if classifier_instance is None:
@@ -90,7 +176,11 @@ class AbstractSerialization:
 
             # Handle annotations
             for annotation_instance in classifier_instance.get_annotations():
-                if annotation_instance not in classifier_instances:
+                if (
+                    annotation_instance not in classifier_instances
+                    if included_ids is None
+                    else annotation_instance.id not in included_ids
+                ):
                     serialized_chunk.add_classifier_instance(
                         self.serialize_annotation_instance(annotation_instance)
                     )
@@ -98,38 +188,20 @@ class AbstractSerialization:
                         serialized_chunk, annotation_instance.get_classifier().language
                     )
 
-            # Validate classifier and its language
+            # Validate classifier and consider the languages it uses: its own, the declaring languages
+            # of its features and the languages of the types of its features
             classifier = classifier_instance.get_classifier()
             if classifier is None:
                 raise ValueError(
                     "A node should have a concept in order to be serialized"
                 )
-
-            language = classifier.language
-            if language is None:
-                raise ValueError(
-                    f"A Concept should be part of a Language in order to be serialized. Concept {classifier} is not"
-                )
-
-            self._consider_language_during_serialization(serialized_chunk, language)
-
-            # Add all features' declaring languages
-            for feature in classifier.all_features():
-                self._consider_language_during_serialization(
-                    serialized_chunk, feature.get_declaring_language()
-                )
-
-            # Add all properties' type languages
-            for prop in classifier.all_properties():
-                self._consider_language_during_serialization(
-                    serialized_chunk, prop.type.language
-                )
-
-            # Add all links' type languages
-            for link in classifier.all_links():
-                self._consider_language_during_serialization(
-                    serialized_chunk, link.get_type().language
-                )
+            plan = self._serialization_plan(classifier)
+            if plan not in considered_plans:
+                considered_plans.add(plan)
+                for language in plan.languages:
+                    self._consider_language_during_serialization(
+                        serialized_chunk, language
+                    )
 
         return serialized_chunk
 
@@ -139,20 +211,29 @@ class AbstractSerialization:
         if used_language not in serialized_chunk.languages:
             serialized_chunk.languages.append(used_language)
 
+    def _serialization_plan(self, classifier: "Classifier") -> SerializationPlan:
+        plans_key = (
+            M3Node.structure_generation,
+            self.primitive_values_serialization,
+            self.primitive_values_serialization.generation,
+        )
+        if plans_key != self._serialization_plans_key:
+            self._serialization_plans.clear()
+            self._serialization_plans_key = plans_key
+        # Plans keep their classifier alive, so its id cannot be reused while the plan is cached
+        plan = self._serialization_plans.get(id(classifier))
+        if plan is None:
+            plan = SerializationPlan(classifier, self.primitive_values_serialization)
+            self._serialization_plans[id(classifier)] = plan
+        return plan
+
     def serialize_node(
         self, classifier_instance: ClassifierInstance
     ) -> SerializedClassifierInstance:
-        serialized_instance = SerializedClassifierInstance(
-            classifier_instance.id,
-            MetaPointer.from_language_entity(classifier_instance.get_classifier()),
+        return self._serialize_with_plan(
+            classifier_instance,
+            self._serialization_plan(classifier_instance.get_classifier()),
         )
-        parent = classifier_instance.get_parent()
-        serialized_instance.parent_node_id = parent.id if parent else None
-        self._serialize_properties(classifier_instance, serialized_instance)
-        self._serialize_containments(classifier_instance, serialized_instance)
-        self._serialize_references(classifier_instance, serialized_instance)
-        self._serialize_annotations(classifier_instance, serialized_instance)
-        return serialized_instance
 
     def serialize_annotation_instance(
         self, annotation_instance: "AnnotationInstance"
@@ -160,75 +241,55 @@ class AbstractSerialization:
         if annotation_instance is None:
             raise ValueError("AnnotationInstance should not be null")
 
-        serialized_classifier_instance = SerializedClassifierInstance(
-            annotation_instance.id,
-            MetaPointer.from_language_entity(
-                annotation_instance.get_annotation_definition()
-            ),
+        return self._serialize_with_plan(
+            annotation_instance,
+            self._serialization_plan(annotation_instance.get_annotation_definition()),
         )
-        parent = annotation_instance.get_parent()
-        serialized_classifier_instance.parent_node_id = parent.id if parent else None
-        self._serialize_properties(annotation_instance, serialized_classifier_instance)
-        self._serialize_containments(
-            annotation_instance, serialized_classifier_instance
-        )
-        self._serialize_references(annotation_instance, serialized_classifier_instance)
-        self._serialize_annotations(annotation_instance, serialized_classifier_instance)
 
-        return serialized_classifier_instance
+    def _serialize_with_plan(
+        self, classifier_instance: ClassifierInstance, plan: SerializationPlan
+    ) -> SerializedClassifierInstance:
+        serialized_instance = SerializedClassifierInstance(
+            classifier_instance.id, plan.meta_pointer
+        )
+        parent = classifier_instance.get_parent()
+        serialized_instance.parent_node_id = parent.id if parent else None
+        self._serialize_properties(classifier_instance, serialized_instance, plan)
+        self._serialize_containments(classifier_instance, serialized_instance, plan)
+        self._serialize_references(classifier_instance, serialized_instance, plan)
+        self._serialize_annotations(classifier_instance, serialized_instance)
+        return serialized_instance
 
     def _serialize_properties(
         self,
         classifier_instance: ClassifierInstance,
         serialized_classifier_instance: SerializedClassifierInstance,
+        plan: SerializationPlan,
     ) -> None:
-        for property in classifier_instance.get_classifier().all_properties():
-            c = property.get_container()
-            if c is None:
-                raise ValueError()
-            language = c.language
-            if language is None:
-                raise ValueError()
-            mp = MetaPointer.from_keyed(property, language)
-            dt = property.type
-            if dt is None:
-                raise ValueError(f"property {property.get_name()} has no type")
+        keep_null_properties = self.keep_null_properties
+        for property, mp, serializer in plan.property_slots:
             property_value = classifier_instance.get_property_value(property=property)
-            if property_value is not None or self.keep_null_properties:
-                serialized_property_value = SerializedPropertyValue(
-                    mp,
-                    self._serialize_property_value(dt, property_value),
+            if property_value is not None:
+                serialized_classifier_instance.add_property_value(
+                    SerializedPropertyValue(mp, serializer(property_value))
                 )
+            elif keep_null_properties:
                 serialized_classifier_instance.add_property_value(
-                    serialized_property_value
+                    SerializedPropertyValue(mp, None)
                 )
 
-    def _serialize_property_value(self, data_type: DataType, value: object):
-        if data_type is None:
-            raise ValueError("Cannot serialize property when the dataType is null")
-        if data_type.id is None:
-            raise ValueError("Cannot serialize property when the dataType.ID is null")
-        if value is None:
-            return None
-        return self.primitive_values_serialization.serialize(data_type.id, value)
-
     def _serialize_containments(
         self,
         classifier_instance: ClassifierInstance,
         serialized_classifier_instance: SerializedClassifierInstance,
+        plan: SerializationPlan,
     ) -> None:
         if classifier_instance is None:
             raise ValueError("ClassifierInstance should not be null")
 
-        for containment in classifier_instance.get_classifier().all_containments():
-            container = containment.get_container()
-            if container is None:
-                raise ValueError()
-            language = container.language
-            if language is None:
-                raise ValueError()
+        for containment, mp in plan.containment_slots:
             containment_value = SerializedContainmentValue(
-                MetaPointer.from_keyed(containment, language),
+                mp,
                 [child.id for child in classifier_instance.get_children(containment)],
             )
             serialized_classifier_instance.add_containment_value(containment_value)
@@ -237,28 +298,23 @@ class AbstractSerialization:
         self,
         classifier_instance: ClassifierInstance,
         serialized_classifier_instance: SerializedClassifierInstance,
+        plan: SerializationPlan,
     ) -> None:
+        from lionweb.model.classifier_instance_utils import is_builtin_element
+
         if classifier_instance is None:
             raise ValueError("ClassifierInstance should not be null")
 
-        for reference in classifier_instance.get_classifier().all_references():
+        builtins_reference_dangling = self.builtins_reference_dangling
+        for reference, mp in plan.reference_slots:
             reference_value = SerializedReferenceValue()
-            classifier = reference.get_container()
-            if classifier is None:
-                raise ValueError()
-            language = classifier.language
-            if language is None:
-                raise ValueError()
-            reference_value.meta_pointer = MetaPointer.from_keyed(reference, language)
-            from lionweb.model.classifier_instance_utils import \
-                is_builtin_element
-
+            reference_value.meta_pointer = mp
             reference_value.value = [
                 SerializedReferenceValueEntry(
                     reference=(
                         None
                         if (
-                            self.builtins_reference_dangling
+                            builtins_reference_dangling
                             and is_builtin_element(rv.get_referred())
                         )
                         else (rv.get_referred().id if rv.get_referred() else None)
@@ -281,36 +337,51 @@ class AbstractSerialization:
             annotation.id for annotation in classifier_instance.get_annotations()
         ]
 
-    def deserialize_serialization_chunk(self, serialized_chunk: SerializationChunk):
+    def deserialize_serialization_chunk(
+        self,
+        serialized_chunk: SerializationChunk,
+        instance_resolver: Optional["ClassifierInstanceResolver"] = None,
+    ):
+        """
+        Deserialize the instances of the chunk. The nodes they refer to, but which the chunk does not
+        contain, are resolved through the given instance resolver, or through the one of this
+        serialization when none is given.
+        """
         serialized_instances = serialized_chunk.classifier_instances
         return self._deserialize_classifier_instances(
-            self.lion_web_version, serialized_instances
+            self.lion_web_version, serialized_instances, instance_resolver
         )
 
     def _deserialize_classifier_instances(
         self,
         lion_web_version: LionWebVersion,
         serialized_classifier_instances: List[SerializedClassifierInstance],
+        instance_resolver: Optional["ClassifierInstanceResolver"] = None,
     ) -> (List)[ClassifierInstance]:
-        from lionweb.api.composite_classifier_instance_resolver import \
-            CompositeClassifierInstanceResolver
+        from lionweb.api.overlay_classifier_instance_resolver import \
+            OverlayClassifierInstanceResolver
         from lionweb.model.annotation_instance import AnnotationInstance
-        from lionweb.model.impl.proxy_node import ProxyNode
-        from lionweb.serialization.map_based_resolver import MapBasedResolver
         from lionweb.serialization.node_populator import NodePopulator
 
         if lion_web_version is None:
             raise ValueError("lion_web_version should not be null")
+        instrumentation = self.instrumentation
+        laps = instrumentation.laps() if instrumentation is not None else None
+        self._discard_stale_deserialization_plans()
 
         # We want to deserialize the nodes starting from the leaves. This is useful because in certain
         # cases we may want to use the children as constructor parameters of the parent
+        if instance_resolver is None:
+            instance_resolver = self.instance_resolver
         deserialization_status = self._sort_leaves_first(
-            serialized_classifier_instances
+            serialized_classifier_instances, instance_resolver
         )
         sorted_serialized_instances = deserialization_status.sorted_list
 
         if len(sorted_serialized_instances) != len(serialized_classifier_instances):
             raise ValueError("Mismatch in number of nodes to deserialize")
+        if laps is not None:
+            laps.lap("deserialization.sorting")
 
         deserialized_by_id: Dict[str, ClassifierInstance] = {}
         serialized_to_instance_map = {}
@@ -332,11 +403,16 @@ class AbstractSerialization:
             raise ValueError(
                 f"We got {len(sorted_serialized_instances)} nodes to deserialize, but we deserialized {len(serialized_to_instance_map)}"
             )
-
-        classifier_instance_resolver = CompositeClassifierInstanceResolver(
-            MapBasedResolver(deserialized_by_id),
+        if laps is not None:
+            laps.lap("deserialization.instantiation")
+
+        # Deserialized instances take precedence over proxies, which take precedence over the instances
+        # known to this serialization. Their dictionaries are looked up in turn, without being copied:
+        # proxies created while populating the instances are put in the proxies one, so they are found
+        classifier_instance_resolver = OverlayClassifierInstanceResolver.from_resolvers(
+            OverlayClassifierInstanceResolver(deserialized_by_id),
             deserialization_status.get_proxies_instance_resolver(),
-            self.instance_resolver,
+            instance_resolver,
         )
 
         node_populator = NodePopulator(
@@ -353,8 +429,11 @@ class AbstractSerialization:
                 if parent_node_id
                 else None
             )
+            # Parents in the chunk adopt their children when populated. The others are proxies, or
+            # nodes known to the instance resolver
             if (
-                isinstance(parent, ProxyNode)
+                parent is not None
+                and parent_node_id not in deserialized_by_id
                 and self.unavailable_parent_policy == UnavailableNodePolicy.PROXY_NODES
             ):
                 if isinstance(classifier_instance, HasSettableParent):
@@ -384,9 +463,36 @@ class AbstractSerialization:
             serialized_to_instance_map[sn] for sn in serialized_classifier_instances
         ]
         nodes_with_original_sorting.extend(deserialization_status.proxies)
+        if laps is not None and instrumentation is not None:
+            laps.lap("deserialization.population")
+            instrumentation.add_time(
+                "deserialization.reference_resolution",
+                node_populator.reference_resolution_seconds,
+            )
+            self._count_deserialized(instrumentation, serialized_classifier_instances)
+            instrumentation.count(
+                "deserialization.proxies", len(deserialization_status.proxies)
+            )
 
         return nodes_with_original_sorting
 
+    @staticmethod
+    def _count_deserialized(
+        instrumentation: Instrumentation,
+        serialized_classifier_instances: List[SerializedClassifierInstance],
+    ) -> None:
+        properties = containments = references = 0
+        for sci in serialized_classifier_instances:
+            properties += len(sci.properties)
+            containments += len(sci.containments)
+            references += len(sci.references)
+        instrumentation.count(
+            "deserialization.nodes", len(serialized_classifier_instances)
+        )
+        instrumentation.count("deserialization.properties", properties)
+        instrumentation.count("deserialization.containments", containments)
+        instrumentation.count("deserialization.references", references)
+
     def _validate_serialization_chunk(
         self, serialization_chunk: SerializationChunk
     ) -> None:
@@ -404,14 +510,16 @@ class AbstractSerialization:
             )
 
     def _sort_leaves_first(
-        self, original_list: List[SerializedClassifierInstance]
+        self,
+        original_list: List[SerializedClassifierInstance],
+        instance_resolver: "ClassifierInstanceResolver",
     ) -> DeserializationStatus:
         """
         This method returned a sorted version of the original list, so that leaves nodes comes first,
         or in other words that a parent never precedes its children.
         """
         deserialization_status = DeserializationStatus(
-            original_list, self.instance_resolver
+            original_list, instance_resolver, self.proxy_factory
         )
 
         # We create the list going from the roots to their children and then reverse it
@@ -435,7 +543,9 @@ class AbstractSerialization:
                 if ci.get_parent_node_id() in unknown_parent_ids:
                     deserialization_status.place(ci)
             for id_ in unknown_parent_ids:
-                deserialization_status.create_proxy(id_)
+                # Parents known to the instance resolver do not need a proxy
+                if instance_resolver.resolve(id_) is None:
+                    deserialization_status.create_proxy(id_)
 
         # Place elements with no parent or already sorted parents
         while deserialization_status.how_many_sorted() < len(original_list):
@@ -465,6 +575,20 @@ class AbstractSerialization:
         deserialization_status.reverse()
         return deserialization_status
 
+    def _discard_stale_deserialization_plans(self):
+        plans_key = (
+            M3Node.structure_generation,
+            self.classifier_resolver,
+            self.classifier_resolver.generation,
+            self.instantiator,
+            self.instantiator.generation,
+            self.primitive_values_serialization,
+            self.primitive_values_serialization.generation,
+        )
+        if plans_key != self._deserialization_plans_key:
+            self._deserialization_plans.clear()
+            self._deserialization_plans_key = plans_key
+
     def _instantiate_from_serialized(
         self,
         lion_web_version: LionWebVersion,
@@ -480,46 +604,61 @@ class AbstractSerialization:
                 f"No metaPointer available for {serialized_classifier_instance}"
             )
 
-        classifier = self.classifier_resolver.resolve_classifier(serialized_classifier)
+        plan = self._deserialization_plans.get(serialized_classifier)
+        if plan is None:
+            plan = DeserializationPlan(
+                self.classifier_resolver.resolve_classifier(serialized_classifier),
+                self.instantiator,
+                self.primitive_values_serialization,
+            )
+            self._deserialization_plans[serialized_classifier] = plan
+        classifier = plan.classifier
 
         # Prepare properties values for instantiator
         properties_values = {}
+        property_slots = plan.property_slots
+        string_interner = self.string_interner
         for serialized_property_value in serialized_classifier_instance.properties:
-            property = classifier.get_property_by_meta_pointer(
-                serialized_property_value.meta_pointer
-            )
-            if property is None:
+            property_slot = property_slots.get(serialized_property_value.meta_pointer)
+            if property_slot is None:
                 available_properties = [
                     MetaPointer.from_feature(p) for p in classifier.all_properties()
                 ]
                 raise RuntimeError(
                     f"Property with metaPointer {serialized_property_value.meta_pointer} not found in classifier {classifier}. Available properties: {available_properties}"
                 )
-            if property.type is None:
-                raise RuntimeError("Property type should not be null")
-            deserialized_value = self.primitive_values_serialization.deserialize(
-                property.type,
-                serialized_property_value.value,
-                property.is_required(),
-            )
-            properties_values[property] = deserialized_value
+            property, deserializer = property_slot
+            value = deserializer(serialized_property_value.value)
+            if string_interner is not None and type(value) is str:
+                value = string_interner.intern(value)
+            properties_values[property] = value
 
-        classifier_instance = self.instantiator.instantiate(
+        classifier_instance = plan.instantiate(
             classifier,
             serialized_classifier_instance,
             deserialized_by_id,
             properties_values,
         )
+        if isinstance(classifier_instance, Exception):
+            raise classifier_instance
         if not isinstance(classifier_instance, ClassifierInstance):
             raise ValueError()
 
-        # Ensure that properties values are set correctly
-        for property, deserialized_value in properties_values.items():
-            if deserialized_value != classifier_instance.get_property_value(
-                property=property
-            ):
-                classifier_instance.set_property_value(
-                    property=property, value=deserialized_value
-                )
+        # Ensure that properties values are set correctly, unless the instantiator already took care of it
+        if plan.applies_properties:
+            pass
+        elif (
+            isinstance(classifier_instance, DynamicClassifierInstance)
+            and classifier_instance.get_classifier() is classifier
+        ):
+            classifier_instance.set_property_values_unchecked(properties_values)
+        else:
+            for property, deserialized_value in properties_values.items():
+                if deserialized_value != classifier_instance.get_property_value(
+                    property=property
+                ):
+                    classifier_instance.set_property_value(
+                        property=property, value=deserialized_value
+                    )
 
         return classifier_instance
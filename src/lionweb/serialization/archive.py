@@ -1,32 +1,566 @@
+import mmap
+import os
+import sqlite3
+import struct
+import time
+import zipfile
+import zlib
+from collections import deque
 from collections.abc import Callable
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
 from os import PathLike
-from typing import TYPE_CHECKING, List
+from typing import (TYPE_CHECKING, Deque, Dict, Iterable, Iterator, List,
+                    Optional, Tuple, Union)
 
 from lionweb import LionWebVersion
 from lionweb.serialization.protobuf_serialization import ProtoBufSerialization
 
 if TYPE_CHECKING:
-    from lionweb.serialization import SerializationChunk
+    from lionweb.serialization import MetaPointer, SerializationChunk
+
+# Signature, version, flags, compression, time, date, crc, sizes, name length and extra length
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+class ArchiveIndex:
+    """
+    Index of the chunks of an archive, built from its central directory. A chunk can be located by
+    its name or position without scanning the names of the entries, and without reading other
+    entries.
+    """
+
+    def __init__(self, infos: List[zipfile.ZipInfo]):
+        self.infos = [info for info in infos if not info.is_dir()]
+        self._positions: Dict[str, int] = {
+            info.filename: i for i, info in enumerate(self.infos)
+        }
+
+    def __len__(self) -> int:
+        return len(self.infos)
+
+    def names(self) -> List[str]:
+        return [info.filename for info in self.infos]
+
+    def position(self, name: str) -> int:
+        position = self._positions.get(name)
+        if position is None:
+            raise KeyError(f"No chunk named {name} in the archive")
+        return position
+
+    def get(self, name_or_position: Union[str, int]) -> zipfile.ZipInfo:
+        if isinstance(name_or_position, str):
+            return self.infos[self.position(name_or_position)]
+        return self.infos[name_or_position]
+
+
+class ArchiveReader:
+    """
+    Read the chunks of an archive on demand. The archive file is memory-mapped: the content of stored
+    (uncompressed) entries is passed to the protobuf parser as a view of the mapping, without being
+    copied. Compressed entries are decompressed as usual. The CRC of stored entries is not verified.
+
+    Chunks are deserialized by the given serialization, or by a ProtoBufSerialization for LionWeb
+    2023.1.
+    """
+
+    def __init__(
+        self,
+        filename: str | PathLike,
+        serialization: Optional[ProtoBufSerialization] = None,
+    ):
+        self.serialization = serialization or ProtoBufSerialization(
+            LionWebVersion.V2023_1
+        )
+        self._file = open(filename, "rb")
+        try:
+            self._zip_file = zipfile.ZipFile(self._file, "r")
+            self.index = ArchiveIndex(self._zip_file.infolist())
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        self._data_offsets: Dict[int, int] = {}
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+        self._zip_file.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def read_entry(self, name_or_position: Union[str, int]) -> bytes | memoryview:
+        """
+        Return the content of the given entry. For stored entries, this is a view of the mapped file,
+        which is valid until the reader is closed.
+        """
+        info = self.index.get(name_or_position)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return self._zip_file.read(info)
+        offset = self._data_offset(info)
+        return self._view[offset : offset + info.file_size]
+
+    def read_chunk(self, name_or_position: Union[str, int]) -> "SerializationChunk":
+        data = self.read_entry(name_or_position)
+        try:
+            return self.serialization.deserialize_chunk_from_bytes(data)
+        finally:
+            if isinstance(data, memoryview):
+                data.release()
+
+    def chunks(self) -> Iterator[Tuple[str, "SerializationChunk"]]:
+        """Iterate over the names and the chunks of all entries, in the order of the archive."""
+        for position, info in enumerate(self.index.infos):
+            yield info.filename, self.read_chunk(position)
+
+    def _data_offset(self, info: zipfile.ZipInfo) -> int:
+        # The central directory records where the local header starts: the data follows the header,
+        # whose name and extra field may differ from those in the central directory
+        offset = self._data_offsets.get(info.header_offset)
+        if offset is None:
+            header = _LOCAL_HEADER.unpack_from(self._mmap, info.header_offset)
+            if header[0] != _LOCAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+            offset = info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+            self._data_offsets[info.header_offset] = offset
+        return offset
+
+
+INDEX_SUFFIX = ".index"
+
+_INDEX_SCHEMA = """
+CREATE TABLE entries (position INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE nodes (
+    id TEXT PRIMARY KEY, entry INTEGER NOT NULL, position INTEGER NOT NULL, parent TEXT
+);
+CREATE TABLE node_partitions (id TEXT PRIMARY KEY, partition TEXT NOT NULL);
+CREATE TABLE classifiers (
+    language TEXT, version TEXT, key TEXT, entry INTEGER NOT NULL,
+    PRIMARY KEY (language, version, key, entry)
+);
+"""
+
+# Each node belongs to the partition of its parent, up to the nodes without a parent
+_COMPUTE_PARTITIONS = """
+INSERT INTO node_partitions (id, partition)
+WITH RECURSIVE tree(id, partition) AS (
+    SELECT id, id FROM nodes WHERE parent IS NULL
+    UNION ALL
+    SELECT nodes.id, tree.partition FROM nodes JOIN tree ON nodes.parent = tree.id
+)
+SELECT id, partition FROM tree
+"""
+
+# Number of node ids looked up by each query
+_QUERY_BATCH_SIZE = 500
+
+
+class IndexedArchiveWriter:
+    """
+    Write chunks to an archive, one entry per chunk, together with a sidecar index: an SQLite database,
+    named after the archive with the INDEX_SUFFIX, recording where each node is stored, which entries
+    contain the nodes of each partition and which contain instances of each classifier.
+
+    Chunks are serialized and written as they are added, so they do not need to be kept in memory.
+    The partitions of the nodes are computed when the writer is closed, so that nodes can be added
+    before their ancestors.
+    """
+
+    def __init__(
+        self,
+        filename: str | PathLike,
+        serialization: Optional[ProtoBufSerialization] = None,
+        compression: int = zipfile.ZIP_STORED,
+        index_filename: Optional[str | PathLike] = None,
+        compresslevel: Optional[int] = None,
+    ):
+        self.serialization = serialization or ProtoBufSerialization(
+            LionWebVersion.V2023_1
+        )
+        index_filename = index_filename or f"{os.fspath(filename)}{INDEX_SUFFIX}"
+        if os.path.exists(index_filename):
+            os.remove(index_filename)
+        self._zip_file = zipfile.ZipFile(
+            filename, "w", compression=compression, compresslevel=compresslevel
+        )
+        # The index can be rebuilt from the archive, so it is not worth journaling its writes
+        self._index = sqlite3.connect(index_filename)
+        self._index.execute("PRAGMA journal_mode = OFF")
+        self._index.execute("PRAGMA synchronous = OFF")
+        self._index.executescript(_INDEX_SCHEMA)
+        self._entries = 0
+
+    def __enter__(self) -> "IndexedArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def add_chunk(self, chunk: "SerializationChunk", name: Optional[str] = None) -> str:
+        """Write the chunk to a new entry, and return its name."""
+        if name is None:
+            name = f"chunk_{self._entries:06d}.binpb"
+        self._zip_file.writestr(
+            name, self.serialization.serialize_chunk_to_bytes(chunk)
+        )
+        self._add_to_index(self._entries, name, chunk)
+        self._entries += 1
+        return name
+
+    def _add_encoded_chunk(
+        self, name: str, chunk: "SerializationChunk", encoded: "_EncodedEntry"
+    ) -> None:
+        _write_encoded_entry(self._zip_file, name, encoded)
+        self._add_to_index(self._entries, name, chunk)
+        self._entries += 1
+
+    def _add_to_index(self, entry: int, name: str, chunk: "SerializationChunk") -> None:
+        self._index.execute("INSERT INTO entries VALUES (?, ?)", (entry, name))
+        try:
+            self._index.executemany(
+                "INSERT INTO nodes VALUES (?, ?, ?, ?)",
+                (
+                    (instance.id, entry, position, instance.parent_node_id)
+                    for position, instance in enumerate(chunk.classifier_instances)
+                    if instance.id is not None
+                ),
+            )
+        except sqlite3.IntegrityError as e:
+            raise ValueError(
+                f"The chunk {name} contains nodes already in the archive"
+            ) from e
+        classifiers = {instance.classifier for instance in chunk.classifier_instances}
+        self._index.executemany(
+            "INSERT OR IGNORE INTO classifiers VALUES (?, ?, ?, ?)",
+            (
+                (classifier.language, classifier.version, classifier.key, entry)
+                for classifier in classifiers
+            ),
+        )
+
+    def close(self) -> None:
+        self._zip_file.close()
+        self._index.execute("CREATE INDEX nodes_parent ON nodes (parent)")
+        self._index.execute(_COMPUTE_PARTITIONS)
+        self._index.execute(
+            "CREATE INDEX node_partitions_partition ON node_partitions (partition)"
+        )
+        self._index.commit()
+        self._index.close()
+
+
+class IndexedArchiveReader(ArchiveReader):
+    """
+    Read an archive written by an IndexedArchiveWriter, using its index to decode only the entries
+    containing the requested nodes. Nodes are located by their entry and their position in the chunk
+    stored in it: the strings and meta-pointers of a chunk are shared by all its nodes, so the entry
+    is decoded as a whole.
+    """
+
+    def __init__(
+        self,
+        filename: str | PathLike,
+        serialization: Optional[ProtoBufSerialization] = None,
+        index_filename: Optional[str | PathLike] = None,
+    ):
+        index_filename = index_filename or f"{os.fspath(filename)}{INDEX_SUFFIX}"
+        if not os.path.exists(index_filename):
+            raise FileNotFoundError(f"Archive index {index_filename} not found")
+        super().__init__(filename, serialization)
+        self._index = sqlite3.connect(f"file:{index_filename}?mode=ro", uri=True)
+        self._entry_names: Dict[int, str] = dict(
+            self._index.execute("SELECT position, name FROM entries")
+        )
+
+    def close(self) -> None:
+        self._index.close()
+        super().close()
+
+    def locate(self, node_id: str) -> Optional[Tuple[str, int]]:
+        """Return the name of the entry containing the node and its position in it, if any."""
+        row = self._index.execute(
+            "SELECT entry, position FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._entry_names[row[0]], row[1]
+
+    def read_nodes(self, node_ids: List[str]) -> "SerializationChunk":
+        """
+        Return a chunk with the given nodes, in the given order. A KeyError is raised if any of them
+        is not in the archive.
+        """
+        locations: Dict[str, Tuple[int, int]] = {}
+        for i in range(0, len(node_ids), _QUERY_BATCH_SIZE):
+            batch = node_ids[i : i + _QUERY_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            for node_id, entry, position in self._index.execute(
+                f"SELECT id, entry, position FROM nodes WHERE id IN ({placeholders})",
+                batch,
+            ):
+                locations[node_id] = (entry, position)
+        missing = [node_id for node_id in node_ids if node_id not in locations]
+        if missing:
+            raise KeyError(f"Nodes not in the archive: {missing}")
+        return self._read_locations([locations[node_id] for node_id in node_ids])
+
+    def partitions(self) -> List[str]:
+        return [
+            row[0]
+            for row in self._index.execute(
+                "SELECT id FROM nodes WHERE parent IS NULL ORDER BY entry, position"
+            )
+        ]
+
+    def partition_entries(self, partition_id: str) -> List[str]:
+        """Return the names of the entries containing nodes of the given partition."""
+        return [
+            self._entry_names[row[0]]
+            for row in self._index.execute(
+                "SELECT DISTINCT nodes.entry FROM node_partitions "
+                "JOIN nodes ON nodes.id = node_partitions.id "
+                "WHERE node_partitions.partition = ? ORDER BY nodes.entry",
+                (partition_id,),
+            )
+        ]
+
+    def read_partition(self, partition_id: str) -> "SerializationChunk":
+        """Return a chunk with the nodes of the given partition, in the order of the archive."""
+        return self._read_locations(
+            list(
+                self._index.execute(
+                    "SELECT nodes.entry, nodes.position FROM node_partitions "
+                    "JOIN nodes ON nodes.id = node_partitions.id "
+                    "WHERE node_partitions.partition = ? "
+                    "ORDER BY nodes.entry, nodes.position",
+                    (partition_id,),
+                )
+            )
+        )
+
+    def classifier_entries(self, classifier: "MetaPointer") -> List[str]:
+        """Return the names of the entries containing instances of the given classifier."""
+        return [
+            self._entry_names[row[0]]
+            for row in self._index.execute(
+                "SELECT entry FROM classifiers "
+                "WHERE language IS ? AND version IS ? AND key IS ? ORDER BY entry",
+                (classifier.language, classifier.version, classifier.key),
+            )
+        ]
+
+    def _read_locations(self, locations: List[Tuple[int, int]]) -> "SerializationChunk":
+        from lionweb.serialization.data.serialized_chunk import \
+            SerializationChunk
+
+        # Each entry is decoded once, however many of the nodes it contains
+        chunks: Dict[int, "SerializationChunk"] = {}
+        for entry in sorted({entry for entry, _ in locations}):
+            chunks[entry] = self.read_chunk(self._entry_names[entry])
+        result = SerializationChunk()
+        result.serialization_format_version = (
+            next(iter(chunks.values())).serialization_format_version
+            if chunks
+            else self.serialization.lion_web_version.value
+        )
+        for entry, position in locations:
+            result.add_classifier_instance(chunks[entry].classifier_instances[position])
+        result.populate_used_languages()
+        return result
+
+
+# Content of an entry as written to the archive, CRC and size of the uncompressed content
+_EncodedEntry = Tuple[bytes, int, int]
+
+_process_serializations: Dict[LionWebVersion, ProtoBufSerialization] = {}
+
+
+def write_archive(
+    chunks: Iterable["SerializationChunk"],
+    filename: str | PathLike,
+    serialization: Optional[ProtoBufSerialization] = None,
+    compression: int = zipfile.ZIP_DEFLATED,
+    compresslevel: Optional[int] = None,
+    max_nodes_per_entry: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    use_processes: bool = False,
+    index: bool = False,
+) -> int:
+    """
+    Write the chunks to an archive, one entry per chunk, and return the number of entries. Chunks with
+    more than max_nodes_per_entry nodes are split across several entries.
+
+    Chunks are serialized and compressed by a pool of max_workers threads, or processes when
+    use_processes is set, while the entries already encoded are written in order. Chunks are consumed
+    as the workers progress, so the iterable can produce them lazily without all of them being kept in
+    memory. Threads help mostly with compression, which releases the GIL: processes can serialize in
+    parallel too, at the cost of sending the chunks to them. Only deflated entries are compressed by
+    the workers: entries compressed with other methods are compressed by zipfile as they are written.
+
+    When index is set, the archive is written with its sidecar index, as by an IndexedArchiveWriter.
+    """
+    serialization = serialization or ProtoBufSerialization(LionWebVersion.V2023_1)
+    max_workers = max_workers or os.cpu_count() or 1
+    executor: Executor
+    if use_processes:
+        executor = ProcessPoolExecutor(max_workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers)
+    indexed_writer: Optional[IndexedArchiveWriter] = None
+    if index:
+        indexed_writer = IndexedArchiveWriter(
+            filename,
+            serialization,
+            compression=compression,
+            compresslevel=compresslevel,
+        )
+        zip_file = indexed_writer._zip_file
+    else:
+        zip_file = zipfile.ZipFile(
+            filename, "w", compression=compression, compresslevel=compresslevel
+        )
+
+    pending: Deque[Tuple[str, "SerializationChunk", Future]] = deque()
+
+    def write_next():
+        name, chunk, future = pending.popleft()
+        if indexed_writer is None:
+            _write_encoded_entry(zip_file, name, future.result())
+        else:
+            indexed_writer._add_encoded_chunk(name, chunk, future.result())
+
+    entries = 0
+    try:
+        with executor:
+            for chunk in _split_chunks(chunks, max_nodes_per_entry):
+                if use_processes:
+                    future = executor.submit(
+                        _encode_in_process,
+                        serialization.lion_web_version,
+                        chunk,
+                        compression,
+                        compresslevel,
+                    )
+                else:
+                    future = executor.submit(
+                        _encode, serialization, chunk, compression, compresslevel
+                    )
+                pending.append((f"chunk_{entries:06d}.binpb", chunk, future))
+                entries += 1
+                # Bound the chunks held in memory while waiting to be written
+                if len(pending) >= 2 * max_workers:
+                    write_next()
+            while pending:
+                write_next()
+    finally:
+        if indexed_writer is None:
+            zip_file.close()
+        else:
+            indexed_writer.close()
+    return entries
+
+
+def _split_chunks(
+    chunks: Iterable["SerializationChunk"], max_nodes_per_entry: Optional[int]
+) -> Iterator["SerializationChunk"]:
+    from lionweb.serialization.data.serialized_chunk import SerializationChunk
+
+    for chunk in chunks:
+        instances = chunk.classifier_instances
+        if max_nodes_per_entry is None or len(instances) <= max_nodes_per_entry:
+            yield chunk
+            continue
+        for start in range(0, len(instances), max_nodes_per_entry):
+            part = SerializationChunk()
+            part.serialization_format_version = chunk.serialization_format_version
+            for instance in instances[start : start + max_nodes_per_entry]:
+                part.add_classifier_instance(instance)
+            part.populate_used_languages()
+            yield part
+
+
+def _encode(
+    serialization: ProtoBufSerialization,
+    chunk: "SerializationChunk",
+    compression: int,
+    compresslevel: Optional[int],
+) -> _EncodedEntry:
+    data = serialization.serialize_chunk_to_bytes(chunk)
+    crc = zlib.crc32(data)
+    if compression != zipfile.ZIP_DEFLATED:
+        return data, crc, len(data)
+    # Raw deflate stream, as stored in zip entries
+    compressor = zlib.compressobj(
+        zlib.Z_DEFAULT_COMPRESSION if compresslevel is None else compresslevel,
+        zlib.DEFLATED,
+        -15,
+    )
+    return compressor.compress(data) + compressor.flush(), crc, len(data)
+
+
+def _encode_in_process(
+    lion_web_version: LionWebVersion,
+    chunk: "SerializationChunk",
+    compression: int,
+    compresslevel: Optional[int],
+) -> _EncodedEntry:
+    # Serializations cannot be pickled, so each process creates its own
+    serialization = _process_serializations.get(lion_web_version)
+    if serialization is None:
+        serialization = ProtoBufSerialization(lion_web_version)
+        _process_serializations[lion_web_version] = serialization
+    return _encode(serialization, chunk, compression, compresslevel)
+
+
+def _write_encoded_entry(
+    zip_file: zipfile.ZipFile, name: str, encoded: _EncodedEntry
+) -> None:
+    """
+    Write an entry encoded by _encode. Deflated content is written by zipfile as if it was stored, so
+    that it is not compressed again, then the local header is rewritten with the compression, the CRC
+    and the size of the uncompressed content, which are also those in the central directory. The
+    headers have the same length, as the size of the uncompressed content decides whether they have
+    Zip64 extra fields.
+    """
+    content, crc, size = encoded
+    if zip_file.compression != zipfile.ZIP_DEFLATED:
+        zip_file.writestr(name, content)
+        return
+    zinfo = zipfile.ZipInfo(name, time.localtime(time.time())[:6])
+    zinfo.file_size = size
+    zip64 = size * 1.05 > zipfile.ZIP64_LIMIT
+    with zip_file.open(zinfo, "w", force_zip64=zip64) as entry:
+        entry.write(content)
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = crc
+    zinfo.file_size = size
+    with zip_file._lock:  # type: ignore[attr-defined]
+        fp = zip_file.fp
+        assert fp is not None
+        end = fp.tell()
+        fp.seek(zinfo.header_offset)
+        fp.write(zinfo.FileHeader(zip64))
+        fp.seek(end)
 
 
 def process_archive(
     filename: str | PathLike,
     chunk_processor: Callable[[int, int, "SerializationChunk"], None],
 ) -> None:
-    ps = ProtoBufSerialization(LionWebVersion.V2023_1)
-    import zipfile
-
-    with zipfile.ZipFile(filename, "r") as zf:
-        n_elements = len(zf.namelist())
-        i = 0
-        for name in zf.namelist():
-            with zf.open(name) as entry_file:
-                content = entry_file.read()
-            content = zf.read(name)  # bytes
-            chunk = ps.deserialize_chunk_from_bytes(content)
-            del content
+    with ArchiveReader(filename) as reader:
+        n_elements = len(reader)
+        for i, (_, chunk) in enumerate(reader.chunks()):
             chunk_processor(i, n_elements, chunk)
-            i += 1
 
 
 def load_archive(filename) -> List["SerializationChunk"]:
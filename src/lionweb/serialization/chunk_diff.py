@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from lionweb.serialization.data.metapointer import MetaPointer
+from lionweb.serialization.data.serialized_chunk import SerializationChunk
+from lionweb.serialization.data.serialized_classifier_instance import \
+    SerializedClassifierInstance
+from lionweb.serialization.data.serialized_reference_value import \
+    SerializedReferenceValueEntry
+
+
+@dataclass(frozen=True)
+class ChunkChange:
+    """A difference between two chunks, concerning the node with the given id."""
+
+    node_id: Optional[str]
+
+
+@dataclass(frozen=True)
+class NodeAdded(ChunkChange):
+    node: SerializedClassifierInstance
+
+
+@dataclass(frozen=True)
+class NodeRemoved(ChunkChange):
+    node: SerializedClassifierInstance
+
+
+@dataclass(frozen=True)
+class NodeMoved(ChunkChange):
+    before_parent_id: Optional[str]
+    after_parent_id: Optional[str]
+
+
+@dataclass(frozen=True)
+class ClassifierChanged(ChunkChange):
+    before: MetaPointer
+    after: MetaPointer
+
+
+@dataclass(frozen=True)
+class PropertyChanged(ChunkChange):
+    property: MetaPointer
+    before: Optional[str]
+    after: Optional[str]
+
+
+@dataclass(frozen=True)
+class ChildrenChanged(ChunkChange):
+    containment: MetaPointer
+    before: Tuple[Optional[str], ...]
+    after: Tuple[Optional[str], ...]
+
+
+@dataclass(frozen=True)
+class ReferenceChanged(ChunkChange):
+    reference: MetaPointer
+    before: Tuple[SerializedReferenceValueEntry, ...]
+    after: Tuple[SerializedReferenceValueEntry, ...]
+
+
+@dataclass(frozen=True)
+class AnnotationsChanged(ChunkChange):
+    before: Tuple[Optional[str], ...]
+    after: Tuple[Optional[str], ...]
+
+
+def diff_chunks(
+    before: SerializationChunk, after: SerializationChunk
+) -> List[ChunkChange]:
+    """
+    Return the changes turning the before chunk into the after one. Nodes are matched by id, and
+    compared feature by feature: a feature missing from a node is equivalent to one with no value, or
+    no children or referred nodes.
+
+    Changes are listed in the order of the nodes of the after chunk, followed by the nodes removed,
+    in the order of the before chunk. The changes of a node are listed in this order: move, classifier,
+    properties, children, references and annotations. Nodes which did not change are compared with a
+    single equality check, so that diffs of large chunks with few changes are fast.
+    """
+    before_by_id = {node.id: node for node in before.classifier_instances}
+    changes: List[ChunkChange] = []
+    after_ids = set()
+    for node in after.classifier_instances:
+        after_ids.add(node.id)
+        previous = before_by_id.get(node.id)
+        if previous is None:
+            changes.append(NodeAdded(node.id, node))
+        elif previous != node:
+            _diff_nodes(previous, node, changes)
+    for node in before.classifier_instances:
+        if node.id not in after_ids:
+            changes.append(NodeRemoved(node.id, node))
+    return changes
+
+
+def _diff_nodes(
+    before: SerializedClassifierInstance,
+    after: SerializedClassifierInstance,
+    changes: List[ChunkChange],
+) -> None:
+    node_id = after.id
+    if before.parent_node_id != after.parent_node_id:
+        changes.append(NodeMoved(node_id, before.parent_node_id, after.parent_node_id))
+    if before.classifier != after.classifier:
+        changes.append(ClassifierChanged(node_id, before.classifier, after.classifier))
+
+    if before.properties != after.properties:
+        before_properties = {p.meta_pointer: p.value for p in before.properties}
+        after_properties = {p.meta_pointer: p.value for p in after.properties}
+        for meta_pointer in _union(before_properties, after_properties):
+            before_value = before_properties.get(meta_pointer)
+            after_value = after_properties.get(meta_pointer)
+            if before_value != after_value:
+                changes.append(
+                    PropertyChanged(node_id, meta_pointer, before_value, after_value)
+                )
+
+    if before.containments != after.containments:
+        before_children = {
+            c.meta_pointer: tuple(c.children_ids) for c in before.containments
+        }
+        after_children = {
+            c.meta_pointer: tuple(c.children_ids) for c in after.containments
+        }
+        for meta_pointer in _union(before_children, after_children):
+            before_ids = before_children.get(meta_pointer, ())
+            after_ids = after_children.get(meta_pointer, ())
+            if before_ids != after_ids:
+                changes.append(
+                    ChildrenChanged(node_id, meta_pointer, before_ids, after_ids)
+                )
+
+    if before.references != after.references:
+        before_referred = {r.meta_pointer: tuple(r.value) for r in before.references}
+        after_referred = {r.meta_pointer: tuple(r.value) for r in after.references}
+        for meta_pointer in _union(before_referred, after_referred):
+            before_entries = before_referred.get(meta_pointer, ())
+            after_entries = after_referred.get(meta_pointer, ())
+            if before_entries != after_entries:
+                changes.append(
+                    ReferenceChanged(
+                        node_id, meta_pointer, before_entries, after_entries
+                    )
+                )
+
+    if before.annotations != after.annotations:
+        changes.append(
+            AnnotationsChanged(
+                node_id, tuple(before.annotations), tuple(after.annotations)
+            )
+        )
+
+
+def _union(
+    before: Dict[MetaPointer, Any], after: Dict[MetaPointer, Any]
+) -> List[MetaPointer]:
+    """The keys of both dictionaries, those of before first, each once."""
+    return list(before) + [key for key in after if key not in before]
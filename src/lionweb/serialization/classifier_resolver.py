@@ -9,6 +9,9 @@ from lionweb.serialization.data.metapointer import MetaPointer
 
 class ClassifierResolver:
     def __init__(self):
+        # Incremented on every registration changing what is registered, so that caches of resolved
+        # classifiers can be invalidated
+        self.generation = 0
         self.registered_concepts: Dict[MetaPointer, "Concept"] = {}
         self.registered_annotations: Dict[MetaPointer, "Annotation"] = {}
 
@@ -50,8 +53,12 @@ class ClassifierResolver:
 
     def register_concept(self, concept: "Concept"):
         meta_pointer = MetaPointer.from_language_entity(concept)
-        self.registered_concepts[meta_pointer] = concept
+        if self.registered_concepts.get(meta_pointer) is not concept:
+            self.registered_concepts[meta_pointer] = concept
+            self.generation += 1
 
     def register_annotation(self, annotation: "Annotation"):
         meta_pointer = MetaPointer.from_language_entity(annotation)
-        self.registered_annotations[meta_pointer] = annotation
+        if self.registered_annotations.get(meta_pointer) is not annotation:
+            self.registered_annotations[meta_pointer] = annotation
+            self.generation += 1
@@ -0,0 +1,168 @@
+from hashlib import blake2b
+from typing import (TYPE_CHECKING, Callable, Dict, List, Optional, Sequence,
+                    Tuple)
+
+from lionweb.model.classifier_instance import ClassifierInstance
+from lionweb.model.impl.abstract_classifier_instance import \
+    AbstractClassifierInstance
+from lionweb.serialization.data.metapointer import MetaPointer
+from lionweb.serialization.data.serialized_chunk import SerializationChunk
+from lionweb.serialization.data.serialized_classifier_instance import \
+    SerializedClassifierInstance
+
+if TYPE_CHECKING:
+    from lionweb.serialization.abstract_serialization import \
+        AbstractSerialization
+
+HASH_SIZE = 16
+
+
+def node_content_hash(
+    node: ClassifierInstance, serialization: "AbstractSerialization"
+) -> bytes:
+    """
+    Return the content hash of the subtree rooted at the given node: a hash over its classifier, its
+    property values, the ids and resolve info of the nodes it refers to, and the hashes of its
+    children and annotations. The ids of the node and of its descendants are not part of it, so two
+    copies of a subtree with different ids have the same hash.
+
+    The hash of a node is equal to the one computed by chunk_content_hashes on its serialized form,
+    so that a tree in memory can be compared with a stored one. Property values are hashed in their
+    serialized form, using the given serialization.
+
+    Hashes are cached on the nodes, together with the serialization, and invalidated by the mutations
+    which are tracked for lionweb.model.change_tracking, and when a LazyProxyNode child is loaded.
+    Hashing a tree of which a few nodes changed only recomputes the hashes of those nodes and of their
+    ancestors. Hashes cached for another serialization are recomputed, and replaced.
+    """
+    from lionweb.model.impl.proxy_node import ProxyNode
+
+    # Hashes of the nodes which cannot cache them, such as those not extending
+    # AbstractClassifierInstance
+    computed: Dict[int, bytes] = {}
+
+    def cached(n: ClassifierInstance) -> Optional[bytes]:
+        entry = getattr(n, "_content_hash", None)
+        if entry is not None and entry[0] is serialization:
+            return entry[1]
+        return computed.get(id(n))
+
+    stack: List[Tuple[ClassifierInstance, bool]] = [(node, False)]
+    while stack:
+        current, expanded = stack.pop()
+        if cached(current) is not None:
+            continue
+        descendants = [
+            d
+            for d in [*current.get_children(), *current.get_annotations()]
+            if not isinstance(d, ProxyNode)
+        ]
+        if not expanded:
+            # Hash the descendants first
+            stack.append((current, True))
+            stack.extend((d, False) for d in descendants if cached(d) is None)
+            continue
+        descendant_hashes = {d.id: cached(d) for d in descendants}
+        content_hash = _hash_instance(
+            serialization.serialize_node(current), descendant_hashes.get
+        )
+        if isinstance(current, AbstractClassifierInstance):
+            current._content_hash = (serialization, content_hash)
+        else:
+            computed[id(current)] = content_hash
+    result = cached(node)
+    assert result is not None
+    return result
+
+
+def chunk_content_hashes(chunk: SerializationChunk) -> Dict[Optional[str], bytes]:
+    """
+    Return the content hashes of the subtrees rooted at the nodes of the chunk, by node id, as
+    computed by node_content_hash. Children and annotations which are not in the chunk are hashed by
+    id, so a subtree only part of which is in the chunk does not have the hash of the complete one.
+    """
+    by_id = {instance.id: instance for instance in chunk.classifier_instances}
+    hashes: Dict[Optional[str], bytes] = {}
+    for instance in chunk.classifier_instances:
+        stack: List[Tuple[SerializedClassifierInstance, bool]] = [(instance, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if current.id in hashes:
+                continue
+            if not expanded:
+                stack.append((current, True))
+                for descendant_id in _descendant_ids(current):
+                    descendant = by_id.get(descendant_id)
+                    if descendant is not None and descendant_id not in hashes:
+                        stack.append((descendant, False))
+                continue
+            hashes[current.id] = _hash_instance(current, hashes.get)
+    return hashes
+
+
+def _descendant_ids(instance: SerializedClassifierInstance) -> List[Optional[str]]:
+    ids: List[Optional[str]] = []
+    for containment in instance.containments:
+        ids.extend(containment.children_ids)
+    ids.extend(instance.annotations)
+    return ids
+
+
+def _hash_instance(
+    instance: SerializedClassifierInstance,
+    descendant_hash: Callable[[Optional[str]], Optional[bytes]],
+) -> bytes:
+    """
+    Hash the content of the instance, taking the hashes of its children and annotations from the
+    given function. Features are hashed in the order of their meta pointers, so that the order in
+    which they are serialized does not matter, and features with no value are skipped, as they are
+    equivalent to missing ones.
+    """
+    parts: List[Optional[str]] = ["c", *_meta_pointer_parts(instance.classifier)]
+    for p in sorted(instance.properties, key=_feature_key):
+        if p.value is not None:
+            parts += ["p", *_meta_pointer_parts(p.meta_pointer), p.value]
+    for c in sorted(instance.containments, key=_feature_key):
+        if c.children_ids:
+            parts += ["C", *_meta_pointer_parts(c.meta_pointer)]
+            parts += [_descendant_part(i, descendant_hash) for i in c.children_ids]
+    for r in sorted(instance.references, key=_feature_key):
+        if r.value:
+            parts += ["r", *_meta_pointer_parts(r.meta_pointer)]
+            for entry in r.value:
+                parts += [entry.reference, entry.resolve_info]
+    if instance.annotations:
+        parts.append("a")
+        parts += [_descendant_part(i, descendant_hash) for i in instance.annotations]
+    return blake2b(_encode(parts), digest_size=HASH_SIZE).digest()
+
+
+def _descendant_part(
+    node_id: Optional[str],
+    descendant_hash: Callable[[Optional[str]], Optional[bytes]],
+) -> str:
+    content_hash = descendant_hash(node_id)
+    if content_hash is None:
+        # Not available: the descendant is identified by its id instead
+        return f"#{node_id}"
+    return content_hash.hex()
+
+
+def _feature_key(feature) -> Tuple[str, str, str]:
+    meta_pointer: MetaPointer = feature.meta_pointer
+    return (
+        meta_pointer.language or "",
+        meta_pointer.version or "",
+        meta_pointer.key or "",
+    )
+
+
+def _meta_pointer_parts(meta_pointer: MetaPointer) -> Sequence[Optional[str]]:
+    return (meta_pointer.language, meta_pointer.version, meta_pointer.key)
+
+
+def _encode(parts: Sequence[Optional[str]]) -> bytes:
+    # Each part is prefixed with its length, so that no two sequences of parts have the same encoding
+    return "".join(
+        "-;" if part is None else f"{len(part)}:{part}" for part in parts
+    ).encode("utf-8")
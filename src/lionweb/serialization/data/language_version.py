@@ -130,5 +130,9 @@ class LanguageVersion:
     def __hash__(self):
         return hash((self.key, self.version))
 
+    def __reduce__(self):
+        # Unpickled instances are interned too, instead of overwriting the state of a cached one
+        return LanguageVersion.of, (self._key, self._version)
+
     def __str__(self):
         return f"UsedLanguage{{key='{self.key}', version='{self.version}'}}"
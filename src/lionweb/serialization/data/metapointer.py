@@ -151,6 +151,10 @@ class MetaPointer:
     def __hash__(self):
         return hash((self.language_version, self.key))
 
+    def __reduce__(self):
+        # Unpickled instances are interned too, instead of overwriting the state of a cached one
+        return MetaPointer.of, (self._language_version, self._key)
+
     def __str__(self):
         return f"MetaPointer{{language_version='{self.language_version}', key='{self.key}'}}"
 
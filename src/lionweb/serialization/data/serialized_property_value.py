@@ -96,5 +96,9 @@ class SerializedPropertyValue:
     def __hash__(self):
         return hash((self._meta_pointer, self._value))
 
+    def __reduce__(self):
+        # Unpickled instances are interned too, instead of overwriting the state of a cached one
+        return SerializedPropertyValue.of, (self._meta_pointer, self._value)
+
     def __repr__(self):
         return self.__str__()
@@ -0,0 +1,39 @@
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+from lionweb.serialization.data.metapointer import MetaPointer
+
+if TYPE_CHECKING:
+    from lionweb.language import Classifier, Property
+    from lionweb.serialization.instantiator import Instantiator
+    from lionweb.serialization.primitives_values_serialization import \
+        PrimitiveValuesSerialization
+
+
+class DeserializationPlan:
+    """
+    Everything needed to instantiate the serialized instances of one classifier, resolved once: the
+    classifier itself, the property for each property MetaPointer together with the function decoding
+    its values, and the function creating the instances.
+    """
+
+    def __init__(
+        self,
+        classifier: "Classifier",
+        instantiator: "Instantiator",
+        primitive_values_serialization: "PrimitiveValuesSerialization",
+    ):
+        self.classifier = classifier
+        self.property_slots: Dict[
+            MetaPointer, Tuple["Property", Callable[[Optional[str]], object]]
+        ] = {}
+        for property in classifier.all_properties():
+            if property.type is None:
+                raise RuntimeError("Property type should not be null")
+            self.property_slots[MetaPointer.from_feature(property)] = (
+                property,
+                primitive_values_serialization.deserializer_for_data_type(
+                    property.type, property.is_required()
+                ),
+            )
+        self.instantiate = instantiator.instantiator_for(classifier)
+        self.applies_properties = instantiator.applies_properties(classifier)
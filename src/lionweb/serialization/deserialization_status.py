@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, List, Optional
+from typing import TYPE_CHECKING, Callable, List, Optional
 
 if TYPE_CHECKING:
     from lionweb.api.classifier_instance_resolver import (
@@ -19,6 +19,7 @@ class DeserializationStatus:
         self,
         original_list: List[SerializedClassifierInstance],
         outside_instances_resolver: "ClassifierInstanceResolver",
+        proxy_factory: Optional[Callable[[str], "ProxyNode"]] = None,
     ):
         from lionweb.api.composite_classifier_instance_resolver import \
             CompositeClassifierInstanceResolver
@@ -29,6 +30,7 @@ class DeserializationStatus:
         self.sorted_list: List[SerializedClassifierInstance] = []
         self.nodes_to_sort = list(original_list)
         self.proxies: List[ProxyNode] = []
+        self.proxy_factory: Callable[[str], ProxyNode] = proxy_factory or ProxyNode
         self.proxies_instance_resolver = LocalClassifierInstanceResolver()
         self.global_instance_resolver = CompositeClassifierInstanceResolver(
             outside_instances_resolver, self.proxies_instance_resolver
@@ -69,11 +71,9 @@ class DeserializationStatus:
         raise ValueError(f"The given ID resolved to a non-node instance: {resolved}")
 
     def create_proxy(self, node_id: str) -> "ProxyNode":
-        from lionweb.model.impl.proxy_node import ProxyNode
-
         if self.global_instance_resolver.resolve(node_id) is not None:
             raise ValueError(f"Cannot create proxy for ID {node_id} - already resolved")
-        proxy_node = ProxyNode(node_id)
+        proxy_node = self.proxy_factory(node_id)
         self.proxies_instance_resolver.add(proxy_node)
         self.proxies.append(proxy_node)
         return proxy_node
@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Callable, Dict
+from typing import TYPE_CHECKING, Callable, Dict, Set
 
 from lionweb.language.enumeration import Enumeration
 from lionweb.language.enumeration_literal import EnumerationLiteral
@@ -33,26 +33,53 @@ class Instantiator:
             raise NotImplementedError
 
     def __init__(self):
+        # Incremented on every registration, so that whoever caches what instantiator_for returns knows
+        # when to discard it
+        self.generation = 0
         self.custom_deserializers: Dict[str, Callable] = {}
+        self.property_applying_deserializers: Set[str] = set()
         self.default_node_deserializer = lambda classifier, serialized_node, deserialized_instances_by_id, properties_values: InstantiationError(
             classifier
         )
+        self.default_node_deserializer_applies_properties = False
 
     def enable_dynamic_nodes(self):
         from lionweb.language import Annotation, Concept
         from lionweb.model.impl.dynamic_node import DynamicNode
 
         self.default_node_deserializer = lambda classifier, serialized_node, deserialized_instances_by_id, properties_values: (
-            DynamicNode(serialized_node.id, classifier)
+            DynamicNode(serialized_node.id, classifier, properties_values)
             if isinstance(classifier, Concept)
             else (
-                DynamicAnnotationInstance(serialized_node.id, classifier)
+                DynamicAnnotationInstance(
+                    serialized_node.id, classifier, properties_values=properties_values
+                )
                 if isinstance(classifier, Annotation)
                 else Exception("Unsupported classifier type")
             )
         )
+        self.default_node_deserializer_applies_properties = True
+        self.generation += 1
         return self
 
+    def applies_properties(self, classifier) -> bool:
+        """
+        Tell if the instances created for the given classifier already hold the property values passed
+        to instantiate, so that the caller does not need to assign them again.
+        """
+        if classifier.id in self.custom_deserializers:
+            return classifier.id in self.property_applying_deserializers
+        return self.default_node_deserializer_applies_properties
+
+    def instantiator_for(self, classifier) -> Callable:
+        """
+        Return the function used to instantiate the given classifier. It takes the same arguments as
+        instantiate and it may return an exception instead of raising it.
+        """
+        return self.custom_deserializers.get(
+            classifier.id, self.default_node_deserializer
+        )
+
     def instantiate(
         self,
         classifier,
@@ -79,9 +106,19 @@ class Instantiator:
         return res
 
     def register_custom_deserializer(
-        self, classifier_id, deserializer
+        self, classifier_id, deserializer, applies_properties: bool = False
     ) -> "Instantiator":
+        """
+        Register the deserializer used for the classifier with the given ID. When applies_properties is
+        True the deserializer promises to assign all the property values it receives, and the
+        serialization skips setting them again on the instance produced.
+        """
         self.custom_deserializers[classifier_id] = deserializer
+        if applies_properties:
+            self.property_applying_deserializers.add(classifier_id)
+        else:
+            self.property_applying_deserializers.discard(classifier_id)
+        self.generation += 1
         return self
 
     def register_lioncore_custom_deserializers(self, lion_web_version):
@@ -135,3 +172,4 @@ class Instantiator:
                 LionCore.get_field().id: lambda c, s, d, p: Field(id=s.id),
             }
         )
+        self.generation += 1
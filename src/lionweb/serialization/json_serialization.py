@@ -1,13 +1,21 @@
 import json
 from pathlib import Path
-from typing import List, Set
+from typing import TYPE_CHECKING, List, Optional, Set
 
 from lionweb.lionweb_version import LionWebVersion
 from lionweb.model import ClassifierInstance
 from lionweb.model.node import Node
 from lionweb.serialization.abstract_serialization import AbstractSerialization
+from lionweb.serialization.data.serialized_chunk import SerializationChunk
 from lionweb.serialization.low_level_json_serialization import (
     JsonElement, LowLevelJsonSerialization)
+from lionweb.serialization.parallel_serialization import \
+    serialize_nodes_in_parallel
+
+if TYPE_CHECKING:
+    from lionweb.api.classifier_instance_resolver import \
+        ClassifierInstanceResolver
+    from lionweb.model.change_tracking import ModelChanges
 
 
 class JsonSerialization(AbstractSerialization):
@@ -17,8 +25,12 @@ class JsonSerialization(AbstractSerialization):
         super().__init__(lionweb_version=lionweb_version)
 
     def serialize_trees_to_json_element(
-        self, roots: List[ClassifierInstance]
+        self, roots: List[ClassifierInstance], max_workers: Optional[int] = None
     ) -> JsonElement:
+        """
+        Serialize the given trees. When max_workers is given, the nodes are serialized by up to that
+        many worker processes, producing the same result.
+        """
         from lionweb.model.impl.proxy_node import ProxyNode
 
         nodes_ids: Set[str] = set()
@@ -44,6 +56,10 @@ class JsonSerialization(AbstractSerialization):
 
         # Filter out ProxyNode instances before serialization
         filtered_nodes = [node for node in all_nodes if not isinstance(node, ProxyNode)]
+        if max_workers is not None:
+            return self._serialization_chunk_to_json_element(
+                serialize_nodes_in_parallel(self, filtered_nodes, max_workers)
+            )
         return self.serialize_nodes_to_json_element(filtered_nodes)
 
     def serialize_nodes_to_json_element(
@@ -51,33 +67,57 @@ class JsonSerialization(AbstractSerialization):
     ) -> JsonElement:
         if isinstance(classifier_instances, ClassifierInstance):
             classifier_instances = [classifier_instances]
-        serialization_block = self.serialize_nodes_to_serialization_chunk(
-            classifier_instances
-        )
-        return LowLevelJsonSerialization().serialize_to_json_element(
-            serialization_block
+        return self._serialization_chunk_to_json_element(
+            self.serialize_nodes_to_serialization_chunk(classifier_instances)
         )
 
+    def _serialization_chunk_to_json_element(
+        self, serialization_block: SerializationChunk
+    ) -> JsonElement:
+        if self.instrumentation is None:
+            return LowLevelJsonSerialization().serialize_to_json_element(
+                serialization_block
+            )
+        with self.instrumentation.phase("serialization.json_element"):
+            return LowLevelJsonSerialization().serialize_to_json_element(
+                serialization_block
+            )
+
     def serialize_tree_to_json_string(
         self, classifier_instance: ClassifierInstance
     ) -> str:
-        return json.dumps(
-            self.serialize_tree_to_json_element(classifier_instance), indent=2
+        return self._to_json_string(
+            self.serialize_tree_to_json_element(classifier_instance)
+        )
+
+    def serialize_changes_to_json_element(self, changes: "ModelChanges") -> JsonElement:
+        return self._serialization_chunk_to_json_element(
+            self.serialize_changes_to_serialization_chunk(changes)
         )
 
     def serialize_trees_to_json_string(
         self, classifier_instances: List[ClassifierInstance]
     ) -> str:
-        return json.dumps(
-            self.serialize_trees_to_json_element(classifier_instances), indent=2
+        return self._to_json_string(
+            self.serialize_trees_to_json_element(classifier_instances)
         )
 
     def serialize_nodes_to_json_string(
         self, classifier_instances: List[ClassifierInstance]
     ) -> str:
-        return json.dumps(
-            self.serialize_nodes_to_json_element(classifier_instances), indent=2
+        return self._to_json_string(
+            self.serialize_nodes_to_json_element(classifier_instances)
+        )
+
+    def _to_json_string(self, json_element: JsonElement) -> str:
+        if self.instrumentation is None:
+            return json.dumps(json_element, indent=2)
+        with self.instrumentation.phase("serialization.json_writing"):
+            json_string = json.dumps(json_element, indent=2)
+        self.instrumentation.count(
+            "serialization.bytes_out", len(json_string.encode("utf-8"))
         )
+        return json_string
 
     def serialize_tree_to_json_element(
         self, classifier_instance: ClassifierInstance
@@ -97,10 +137,16 @@ class JsonSerialization(AbstractSerialization):
         ]
         return self.serialize_nodes_to_json_element(filtered_instances)
 
-    def deserialize_json_to_nodes(self, json_element: JsonElement) -> List[Node]:
+    def deserialize_json_to_nodes(
+        self,
+        json_element: JsonElement,
+        instance_resolver: Optional["ClassifierInstanceResolver"] = None,
+    ) -> List[Node]:
         return [
             ci
-            for ci in self.deserialize_to_classifier_instances(json_element)
+            for ci in self.deserialize_to_classifier_instances(
+                json_element, instance_resolver
+            )
             if isinstance(ci, Node)
         ]
 
@@ -108,11 +154,34 @@ class JsonSerialization(AbstractSerialization):
         return self.deserialize_string_to_nodes(source.read_text())
 
     def deserialize_string_to_nodes(self, json_str: str) -> List[Node]:
-        return self.deserialize_json_to_nodes(json.loads(json_str))
-
-    def deserialize_to_classifier_instances(self, json_element: JsonElement):
-        serialization_block = (
-            LowLevelJsonSerialization().deserialize_serialization_block(json_element)
+        if self.instrumentation is None:
+            return self.deserialize_json_to_nodes(json.loads(json_str))
+        self.instrumentation.count(
+            "deserialization.bytes_in", len(json_str.encode("utf-8"))
         )
+        with self.instrumentation.phase("deserialization.json_parsing"):
+            json_element = json.loads(json_str)
+        return self.deserialize_json_to_nodes(json_element)
+
+    def deserialize_to_classifier_instances(
+        self,
+        json_element: JsonElement,
+        instance_resolver: Optional["ClassifierInstanceResolver"] = None,
+    ):
+        if self.instrumentation is None:
+            serialization_block = (
+                LowLevelJsonSerialization().deserialize_serialization_block(
+                    json_element
+                )
+            )
+        else:
+            with self.instrumentation.phase("deserialization.chunk_reading"):
+                serialization_block = (
+                    LowLevelJsonSerialization().deserialize_serialization_block(
+                        json_element
+                    )
+                )
         self._validate_serialization_chunk(serialization_block)
-        return self.deserialize_serialization_chunk(serialization_block)
+        return self.deserialize_serialization_chunk(
+            serialization_block, instance_resolver
+        )
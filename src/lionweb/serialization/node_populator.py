@@ -1,4 +1,6 @@
-from typing import TYPE_CHECKING, cast
+import threading
+import time
+from typing import TYPE_CHECKING, ClassVar, Dict, cast
 
 from lionweb.api.classifier_instance_resolver import ClassifierInstanceResolver
 from lionweb.language.lioncore_builtins import LionCoreBuiltins
@@ -18,9 +20,14 @@ from lionweb.utils.autoresolve import (LIONCORE_AUTORESOLVE_PREFIX,
 
 class NodePopulator:
     if TYPE_CHECKING:
+        from lionweb.language.language_entity import LanguageEntity
         from lionweb.serialization.abstract_serialization import \
             AbstractSerialization
 
+    # Auto-resolve maps by LionWeb version, shared by all populators
+    _auto_resolve_maps: ClassVar[Dict[LionWebVersion, Dict[str, "LanguageEntity"]]] = {}
+    _auto_resolve_maps_lock = threading.Lock()
+
     def __init__(
         self,
         serialization: "AbstractSerialization",
@@ -34,19 +41,39 @@ class NodePopulator:
         self.serialization: AbstractSerialization = serialization
         self.classifier_instance_resolver = classifier_instance_resolver
         self.deserialization_status = deserialization_status
-        self.auto_resolve_map = {}
-
-        lion_core_builtins = LionCoreBuiltins.get_instance(auto_resolve_version)
-        for element in lion_core_builtins.get_elements():
-            self.auto_resolve_map[
-                f"{LIONCOREBUILTINS_AUTORESOLVE_PREFIX}{element.get_name()}"
-            ] = element
-
-        lion_core = LionCore.get_instance(auto_resolve_version)
-        for element in lion_core.get_elements():
-            self.auto_resolve_map[
-                f"{LIONCORE_AUTORESOLVE_PREFIX}{element.get_name()}"
-            ] = element
+        self.auto_resolve_map = NodePopulator.auto_resolve_map_for(auto_resolve_version)
+        # Time spent populating references, measured only when the serialization is instrumented
+        self.reference_resolution_seconds = 0.0
+        self._measure_references = serialization.instrumentation is not None
+
+    @classmethod
+    def auto_resolve_map_for(
+        cls, lion_web_version: LionWebVersion
+    ) -> Dict[str, "LanguageEntity"]:
+        """
+        Return the elements of LionCoreBuiltins and LionCore by their auto-resolve identifier. The map
+        is built once per LionWeb version and shared, so it should not be modified.
+        """
+        auto_resolve_map = cls._auto_resolve_maps.get(lion_web_version)
+        if auto_resolve_map is not None:
+            return auto_resolve_map
+        with cls._auto_resolve_maps_lock:
+            auto_resolve_map = cls._auto_resolve_maps.get(lion_web_version)
+            if auto_resolve_map is None:
+                auto_resolve_map = {}
+                lion_core_builtins = LionCoreBuiltins.get_instance(lion_web_version)
+                for element in lion_core_builtins.get_elements():
+                    auto_resolve_map[
+                        f"{LIONCOREBUILTINS_AUTORESOLVE_PREFIX}{element.get_name()}"
+                    ] = element
+
+                lion_core = LionCore.get_instance(lion_web_version)
+                for element in lion_core.get_elements():
+                    auto_resolve_map[
+                        f"{LIONCORE_AUTORESOLVE_PREFIX}{element.get_name()}"
+                    ] = element
+                cls._auto_resolve_maps[lion_web_version] = auto_resolve_map
+            return auto_resolve_map
 
     def populate_classifier_instance(
         self,
@@ -54,7 +81,12 @@ class NodePopulator:
         serialized_classifier_instance: SerializedClassifierInstance,
     ) -> None:
         self.populate_containments(node, serialized_classifier_instance)
-        self.populate_node_references(node, serialized_classifier_instance)
+        if self._measure_references:
+            start = time.perf_counter()
+            self.populate_node_references(node, serialized_classifier_instance)
+            self.reference_resolution_seconds += time.perf_counter() - start
+        else:
+            self.populate_node_references(node, serialized_classifier_instance)
 
     def populate_containments(
         self,
@@ -82,11 +114,10 @@ class NodePopulator:
                     self.serialization.unavailable_children_policy
                     == UnavailableNodePolicy.PROXY_NODES
                 ):
-                    deserialized_value.append(
-                        self.classifier_instance_resolver.resolve_or_proxy(
-                            child_node_id
-                        )
-                    )
+                    child = self.classifier_instance_resolver.resolve(child_node_id)
+                    if child is None:
+                        child = self.deserialization_status.proxy_factory(child_node_id)
+                    deserialized_value.append(child)
                 else:
                     deserialized_value.append(
                         self.classifier_instance_resolver.strictly_resolve(
@@ -104,6 +135,7 @@ class NodePopulator:
         serialized_classifier_instance: SerializedClassifierInstance,
     ) -> None:
         concept = node.get_classifier()
+        string_interner = self.serialization.string_interner
         for serialized_reference_value in serialized_classifier_instance.references:
             reference = concept.get_reference_by_meta_pointer(
                 serialized_reference_value.meta_pointer
@@ -139,11 +171,14 @@ class NodePopulator:
                             f"Unable to resolve reference to {entry.reference} for feature {serialized_reference_value.meta_pointer}"
                         )
 
-                if referred is None and entry.resolve_info:
-                    referred = self.auto_resolve_map.get(entry.resolve_info)
+                resolve_info = entry.resolve_info
+                if referred is None and resolve_info:
+                    referred = self.auto_resolve_map.get(resolve_info)
+                if string_interner is not None and resolve_info is not None:
+                    resolve_info = string_interner.intern(resolve_info)
 
                 reference_value = ReferenceValue(
                     referred=cast(ClassifierInstance, referred),
-                    resolve_info=entry.resolve_info,
+                    resolve_info=resolve_info,
                 )
                 node.add_reference_value(reference, reference_value)
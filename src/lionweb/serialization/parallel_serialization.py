@@ -0,0 +1,126 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
+
+from lionweb.model import ClassifierInstance
+from lionweb.serialization.data.language_version import LanguageVersion
+from lionweb.serialization.data.serialized_chunk import SerializationChunk
+from lionweb.serialization.data.serialized_classifier_instance import \
+    SerializedClassifierInstance
+
+if TYPE_CHECKING:
+    from lionweb.serialization.abstract_serialization import \
+        AbstractSerialization
+
+# Below this number of nodes per task, starting the workers costs more than what they save
+MIN_NODES_PER_TASK = 500
+# Splitting the work in more tasks than workers balances subtrees of different sizes
+TASKS_PER_WORKER = 4
+
+# The nodes are not sent to the workers: with parents and references, pickling a subtree would pickle
+# the whole model. Workers are forked instead, and find the nodes to serialize here
+_state: Optional[Tuple["AbstractSerialization", List[ClassifierInstance], Set[str]]] = (
+    None
+)
+_state_lock = threading.Lock()
+
+
+def parallel_serialization_available() -> bool:
+    """Workers are forked, so parallel serialization is not available on platforms without fork."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def serialize_nodes_in_parallel(
+    serialization: "AbstractSerialization",
+    classifier_instances: List[ClassifierInstance],
+    max_workers: int,
+) -> SerializationChunk:
+    """
+    Serialize the given nodes to a chunk, splitting them across up to max_workers processes. The chunk
+    is the same produced by serialization.serialize_nodes_to_serialization_chunk: nodes are in the
+    given order and languages in the order in which they are first used. The nodes are serialized in
+    this process when they are too few to benefit from workers, or when processes cannot be forked.
+    """
+    global _state
+    tasks = _split(len(classifier_instances), max_workers)
+    if len(tasks) <= 1 or not parallel_serialization_available():
+        return serialization.serialize_nodes_to_serialization_chunk(
+            classifier_instances
+        )
+
+    instrumentation = serialization.instrumentation
+    laps = instrumentation.laps() if instrumentation is not None else None
+    _prepare(serialization, classifier_instances)
+    included_ids = {ci.id for ci in classifier_instances if ci.id is not None}
+    with _state_lock:
+        _state = (serialization, classifier_instances, included_ids)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor:
+                # map returns the results in the order of the tasks, whichever worker ends first
+                results = list(executor.map(_serialize_task, tasks))
+        finally:
+            _state = None
+
+    serialized_chunk = SerializationChunk()
+    serialized_chunk.serialization_format_version = serialization.lion_web_version.value
+    for serialized_instances, languages in results:
+        for serialized_instance in serialized_instances:
+            serialized_chunk.add_classifier_instance(serialized_instance)
+        for language in languages:
+            if language not in serialized_chunk.languages:
+                serialized_chunk.languages.append(language)
+    if laps is not None and instrumentation is not None:
+        laps.lap("serialization.nodes")
+        instrumentation.count(
+            "serialization.nodes", len(serialized_chunk.classifier_instances)
+        )
+    return serialized_chunk
+
+
+def _split(nodes_count: int, max_workers: int) -> List[Tuple[int, int]]:
+    """Split the nodes into contiguous ranges of similar size, one per task."""
+    tasks_count = min(max_workers * TASKS_PER_WORKER, nodes_count // MIN_NODES_PER_TASK)
+    if max_workers <= 1 or tasks_count <= 1:
+        return [(0, nodes_count)]
+    return [
+        (nodes_count * i // tasks_count, nodes_count * (i + 1) // tasks_count)
+        for i in range(tasks_count)
+    ]
+
+
+def _prepare(
+    serialization: "AbstractSerialization",
+    classifier_instances: List[ClassifierInstance],
+) -> None:
+    """
+    Compute the serialization plans before forking, so that each worker inherits them instead of
+    computing them again, and register the languages used, as the sequential serialization does.
+    """
+    considered_plans = set()
+    for classifier_instance in classifier_instances:
+        if classifier_instance is None:
+            raise ValueError("nodes should not contain null values")
+        classifier = classifier_instance.get_classifier()
+        if classifier is None:
+            raise ValueError("A node should have a concept in order to be serialized")
+        plan = serialization._serialization_plan(classifier)
+        if plan not in considered_plans:
+            considered_plans.add(plan)
+            for language in plan.languages:
+                serialization.register_language(language)
+
+
+def _serialize_task(
+    task: Tuple[int, int],
+) -> Tuple[List[SerializedClassifierInstance], List[LanguageVersion]]:
+    assert _state is not None
+    serialization, classifier_instances, included_ids = _state
+    start, end = task
+    serialized_chunk = serialization._serialize_nodes_to_serialization_chunk(
+        classifier_instances[start:end], included_ids
+    )
+    return serialized_chunk.classifier_instances, serialized_chunk.languages
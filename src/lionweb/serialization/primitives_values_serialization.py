@@ -1,8 +1,9 @@
 import json
 from enum import Enum
-from typing import Dict, Type, cast
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type, cast
 
 from lionweb.language.enumeration import Enumeration
+from lionweb.language.field import Field
 from lionweb.language.lioncore_builtins import LionCoreBuiltins
 from lionweb.language.structured_data_type import StructuredDataType
 from lionweb.lionweb_version import LionWebVersion
@@ -10,126 +11,302 @@ from lionweb.model.impl.dynamic_structured_datype_instance import \
     DynamicStructuredDataTypeInstance
 from lionweb.model.impl.enumeration_value import EnumerationValue
 from lionweb.model.impl.enumeration_value_impl import EnumerationValueImpl
+from lionweb.model.impl.m3node import M3Node
 from lionweb.model.structured_data_type_instance import \
     StructuredDataTypeInstance
 
 
+class _StructuredDataTypeCodec:
+    """
+    Encoder and decoder for the values of one StructuredDataType, with the fields and the codecs of
+    their types resolved once. Nested structured data types refer directly to their own codec.
+    """
+
+    def __init__(self, structured_data_type: StructuredDataType):
+        self.generation = M3Node.structure_generation
+        self.structured_data_type = structured_data_type
+        # Each field comes with its key, the codec of its type when it is a structured data type, and
+        # the functions encoding and decoding its values otherwise
+        self.fields: List[
+            Tuple[
+                Field,
+                str,
+                Optional["_StructuredDataTypeCodec"],
+                Optional[Callable],
+                Optional[Callable],
+            ]
+        ] = []
+        self.decoded_values: Optional[Dict[str, DynamicStructuredDataTypeInstance]] = (
+            None
+        )
+        self.max_decoded_values = 0
+
+    def encode(self, structured_data_type_instance) -> dict:
+        get_field_value: Callable[[Field], Any]
+        if isinstance(structured_data_type_instance, DynamicStructuredDataTypeInstance):
+            get_field_value = structured_data_type_instance.field_values.get
+        else:
+            get_field_value = structured_data_type_instance.get_field_value
+        json_obj: Dict[str, object] = {}
+        for field, key, codec, encoder, _ in self.fields:
+            field_value = get_field_value(field)
+            if field_value is None:
+                json_obj[key] = None
+            elif (
+                codec is not None
+                and field_value.get_structured_data_type() is codec.structured_data_type
+            ):
+                json_obj[key] = codec.encode(field_value)
+            else:
+                json_obj[key] = cast(Callable, encoder)(field_value)
+        return json_obj
+
+    def decode(self, json_obj) -> DynamicStructuredDataTypeInstance:
+        sdt_instance = DynamicStructuredDataTypeInstance(self.structured_data_type)
+        field_values = sdt_instance.field_values
+        for field, key, codec, _, decoder in self.fields:
+            if key in json_obj:
+                field_value = json_obj[key]
+                if field_value is None:
+                    field_values[field] = None
+                elif codec is not None:
+                    field_values[field] = codec.decode(field_value)
+                else:
+                    field_values[field] = cast(Callable, decoder)(field_value)
+        return sdt_instance
+
+    def decode_string(self, serialized_value: str) -> DynamicStructuredDataTypeInstance:
+        decoded_values = self.decoded_values
+        if decoded_values is None:
+            return self.decode(json.loads(serialized_value))
+        sdt_instance = decoded_values.get(serialized_value)
+        if sdt_instance is None:
+            sdt_instance = self.decode(json.loads(serialized_value))
+            if len(decoded_values) >= self.max_decoded_values:
+                # Evict the value that was decoded first
+                del decoded_values[next(iter(decoded_values))]
+            decoded_values[serialized_value] = sdt_instance
+        return sdt_instance
+
+
 class PrimitiveValuesSerialization:
     def __init__(self):
+        # Incremented on every registration changing what is registered, so that whoever caches the
+        # functions returned by serializer_for_data_type or deserializer_for_data_type knows when to
+        # discard them
+        self.generation = 0
         self.enumerations_by_id = {}
         self.structures_data_types_by_id = {}
         self.dynamic_nodes_enabled = False
         self.primitive_deserializers: Dict[str, object] = {}
         self.primitive_serializers: Dict[str, object] = {}
+        # Codecs by the id of their StructuredDataType. A codec keeps its StructuredDataType alive, so
+        # its id cannot be reused while the codec is cached
+        self._sdt_codecs: Dict[int, _StructuredDataTypeCodec] = {}
+        self._sdt_codecs_generation = self.generation
+        self.max_cached_structured_data_type_values = 0
 
     def register_language(self, language):
         for element in language.get_elements():
             if isinstance(element, Enumeration):
-                self.enumerations_by_id[element.id] = element
+                if self.enumerations_by_id.get(element.id) is not element:
+                    self.enumerations_by_id[element.id] = element
+                    self.generation += 1
             elif isinstance(element, StructuredDataType):
-                self.structures_data_types_by_id[element.id] = element
+                if self.structures_data_types_by_id.get(element.id) is not element:
+                    self.structures_data_types_by_id[element.id] = element
+                    self.generation += 1
 
     def enable_dynamic_nodes(self):
         self.dynamic_nodes_enabled = True
+        self.generation += 1
 
     def register_deserializer(self, data_type_id, deserializer):
         self.primitive_deserializers[data_type_id] = deserializer
+        self.generation += 1
 
     def register_serializer(self, data_type_id, serializer):
         self.primitive_serializers[data_type_id] = serializer
+        self.generation += 1
+
+    def cache_structured_data_type_values(self, max_size: int = 1024) -> None:
+        """
+        Reuse the same decoded instance for identical serialized structured data type values, up to
+        max_size distinct values per StructuredDataType. This pays off when the same values recur often,
+        as source positions do. Decoded instances are then shared among the nodes holding equal values,
+        so they should not be modified. A max_size of 0 disables the cache.
+        """
+        if max_size < 0:
+            raise ValueError("max_size should not be negative")
+        self.max_cached_structured_data_type_values = max_size
+        self._sdt_codecs.clear()
+
+    def _structured_data_type_codec(
+        self, structured_data_type: StructuredDataType
+    ) -> _StructuredDataTypeCodec:
+        if self._sdt_codecs_generation != self.generation:
+            self._sdt_codecs.clear()
+            self._sdt_codecs_generation = self.generation
+        codec = self._sdt_codecs.get(id(structured_data_type))
+        if codec is None or codec.generation != M3Node.structure_generation:
+            codec = _StructuredDataTypeCodec(structured_data_type)
+            if self.max_cached_structured_data_type_values > 0:
+                codec.decoded_values = {}
+                codec.max_decoded_values = self.max_cached_structured_data_type_values
+            # The codec is cached before resolving its fields, so that recursive structures terminate
+            self._sdt_codecs[id(structured_data_type)] = codec
+            try:
+                for field in structured_data_type.get_fields():
+                    codec.fields.append(self._field_codec(field))
+            except Exception:
+                del self._sdt_codecs[id(structured_data_type)]
+                raise
+        return codec
+
+    def _field_codec(self, field: Field) -> Tuple[
+        Field,
+        str,
+        Optional[_StructuredDataTypeCodec],
+        Optional[Callable],
+        Optional[Callable],
+    ]:
+        if field.id is None:
+            raise ValueError("Field with no ID specified should not be used")
+        field_data_type = field.get_type()
+        if field_data_type is None:
+            raise ValueError(f"Field {field.get_name()} has no type")
+        if self.is_structured_data_type(field_data_type.id):
+            field_codec = self._structured_data_type_codec(
+                self.structures_data_types_by_id[field_data_type.id]
+            )
+            return field, field.get_key(), field_codec, self.serialize_sdt, None
+        return (
+            field,
+            field.get_key(),
+            None,
+            self.serializer_for_data_type(field_data_type.id),
+            self.deserializer_for_data_type(field_data_type, False),
+        )
 
     def deserialize_sdt(self, data_type_id, json_obj):
         sdt = self.structures_data_types_by_id[data_type_id]
-        sdt_instance = DynamicStructuredDataTypeInstance(sdt)
-        for field in sdt.get_fields():
-            if field.key in json_obj:
-                field_data_type = field.type
-                field_value = json_obj[field.key]
-                if field_value is None:
-                    sdt_instance.set_field_value(field, None)
-                elif self.is_structured_data_type(field_data_type.id):
-                    sdt_instance.set_field_value(
-                        field,
-                        self.deserialize_sdt(field_data_type.id, field_value),
-                    )
-                else:
-                    sdt_instance.set_field_value(
-                        field, self.deserialize(field_data_type, field_value, False)
-                    )
-        return sdt_instance
+        return self._structured_data_type_codec(sdt).decode(json_obj)
 
     def deserialize(self, data_type, serialized_value, is_required=False):
+        return self.deserializer_for_data_type(data_type, is_required)(serialized_value)
+
+    def deserializer_for_data_type(
+        self, data_type, is_required=False
+    ) -> Callable[[Optional[str]], object]:
+        """
+        Return the function decoding the serialized values of the given data type. Deserializers
+        decoding many values of the same type can obtain it once, instead of calling deserialize for
+        every value.
+        """
         data_type_id = data_type.id
         if data_type_id in self.primitive_deserializers:
-            return self.primitive_deserializers[data_type_id](
+            primitive_deserializer = cast(
+                Callable, self.primitive_deserializers[data_type_id]
+            )
+            return lambda serialized_value: primitive_deserializer(
                 serialized_value, is_required
             )
         elif data_type_id in self.enumerations_by_id and self.dynamic_nodes_enabled:
-            if serialized_value is None:
-                return None
             enumeration = self.enumerations_by_id[data_type_id]
-            for literal in enumeration.literals:
-                if literal.key == serialized_value:
+
+            def enumeration_deserializer(serialized_value):
+                if serialized_value is None:
+                    return None
+                literal = enumeration.get_literal_by_key(serialized_value)
+                if literal is not None:
                     return EnumerationValueImpl(literal)
-            raise ValueError(f"Invalid enumeration literal value: {serialized_value}")
+                raise ValueError(
+                    f"Invalid enumeration literal value: {serialized_value}"
+                )
+
+            return enumeration_deserializer
         elif (
             data_type_id in self.structures_data_types_by_id
             and self.dynamic_nodes_enabled
         ):
-            if serialized_value is None:
-                return None
-            json_obj = json.loads(serialized_value)
-            return self.deserialize_sdt(data_type_id, json_obj)
+
+            sdt = self.structures_data_types_by_id[data_type_id]
+
+            def sdt_deserializer(serialized_value):
+                if serialized_value is None:
+                    return None
+                return self._structured_data_type_codec(sdt).decode_string(
+                    serialized_value
+                )
+
+            return sdt_deserializer
         else:
-            raise ValueError(
-                f"Unable to deserialize primitive values of type {data_type}"
-            )
+
+            def failing_deserializer(serialized_value):
+                raise ValueError(
+                    f"Unable to deserialize primitive values of type {data_type}"
+                )
+
+            return failing_deserializer
 
     def serialize_sdt(self, structured_data_type_instance):
-        json_obj = {}
-        for (
-            field
-        ) in structured_data_type_instance.get_structured_data_type().get_fields():
-            field_value = structured_data_type_instance.get_field_value(field)
-            if field_value is None:
-                json_obj[field.key] = None
-            elif self.is_structured_data_type(field.type.id):
-                json_obj[field.key] = self.serialize_sdt(field_value)
-            else:
-                json_obj[field.key] = self.serialize(field.type.id, field_value)
-        return json_obj
+        return self._structured_data_type_codec(
+            structured_data_type_instance.get_structured_data_type()
+        ).encode(structured_data_type_instance)
 
     def serialize(self, primitive_type_id, value):
+        return self.serializer_for_data_type(primitive_type_id)(value)
+
+    def serializer_for_data_type(
+        self, primitive_type_id
+    ) -> Callable[[object], Optional[str]]:
+        """
+        Return the function encoding the values of the data type with the given id. Serializers
+        encoding many values of the same type can obtain it once, instead of calling serialize for
+        every value.
+        """
         if primitive_type_id in self.primitive_serializers:
-            return self.primitive_serializers[primitive_type_id](value)
+            return cast(Callable, self.primitive_serializers[primitive_type_id])
         elif self.is_enum(primitive_type_id):
-            if value is None:
-                return None
-            if isinstance(value, EnumerationValue):
-                enumeration_literal = value.get_enumeration_literal()
-                return enumeration_literal.key
-            elif isinstance(value, Enum):
-                enumeration = self.enumerations_by_id.get(primitive_type_id)
-                if enumeration is None:
-                    raise ValueError(
-                        f"Cannot find enumeration with id {primitive_type_id}"
-                    )
-                return self.serializer_for(type(value), enumeration)(value)
-            else:
-                raise TypeError(f"Unexpected type for enum: {type(value)}")
+
+            def enumeration_serializer(value):
+                if value is None:
+                    return None
+                if isinstance(value, EnumerationValue):
+                    enumeration_literal = value.get_enumeration_literal()
+                    return enumeration_literal.key
+                elif isinstance(value, Enum):
+                    enumeration = self.enumerations_by_id.get(primitive_type_id)
+                    if enumeration is None:
+                        raise ValueError(
+                            f"Cannot find enumeration with id {primitive_type_id}"
+                        )
+                    return self.serializer_for(type(value), enumeration)(value)
+                else:
+                    raise TypeError(f"Unexpected type for enum: {type(value)}")
+
+            return enumeration_serializer
         elif self.is_structured_data_type(primitive_type_id):
-            if value is None:
-                return None
-            if isinstance(value, StructuredDataTypeInstance):
-                return json.dumps(self.serialize_sdt(value))
-            else:
-                raise TypeError(
-                    f"Expected StructuredDataTypeInstance, got {type(value)}"
-                )
+
+            def sdt_serializer(value):
+                if value is None:
+                    return None
+                if isinstance(value, StructuredDataTypeInstance):
+                    return json.dumps(self.serialize_sdt(value))
+                else:
+                    raise TypeError(
+                        f"Expected StructuredDataTypeInstance, got {type(value)}"
+                    )
+
+            return sdt_serializer
         else:
-            raise ValueError(
-                f"Unable to serialize primitive values of type {primitive_type_id}"
-            )
+
+            def failing_serializer(value):
+                raise ValueError(
+                    f"Unable to serialize primitive values of type {primitive_type_id}"
+                )
+
+            return failing_serializer
 
     def is_enum(self, primitive_type_id):
         return primitive_type_id in self.enumerations_by_id
@@ -141,9 +318,9 @@ class PrimitiveValuesSerialization:
     def serializer_for(enum_class: Type, enumeration):
         def serializer(value: Enum):
             literal_name = value.name
-            for literal in enumeration.literals:
-                if literal.name == literal_name:
-                    return literal.key
+            literal = enumeration.get_literal_by_name(literal_name)
+            if literal is not None:
+                return literal.key
             raise ValueError(f"Cannot serialize enum instance with name {literal_name}")
 
         return serializer
@@ -151,9 +328,9 @@ class PrimitiveValuesSerialization:
     @staticmethod
     def deserializer_for(enum_class: type[Enum], enumeration):
         def deserializer(serialized_value: str, required: bool):
-            for literal in enumeration.literals:
-                if literal.key == serialized_value:
-                    return enum_class[literal.name]
+            literal = enumeration.get_literal_by_key(serialized_value)
+            if literal is not None:
+                return enum_class[literal.get_name()]
             raise ValueError(f"Cannot deserialize value {serialized_value}")
 
         return deserializer
@@ -168,6 +345,7 @@ class PrimitiveValuesSerialization:
         self.primitive_deserializers[id] = (
             PrimitiveValuesSerialization.deserializer_for(enum_class, enumeration)
         )
+        self.generation += 1
 
     def register_lion_builtins_primitive_serializers_and_deserializers(
         self, lion_web_version: LionWebVersion
@@ -202,3 +380,4 @@ class PrimitiveValuesSerialization:
         self.primitive_serializers[
             cast(str, LionCoreBuiltins.get_integer(lion_web_version).id)
         ] = lambda v: str(v)
+        self.generation += 1
@@ -6,6 +6,8 @@ from lionweb.serialization.data.serialized_reference_value import \
     SerializedReferenceValueEntry
 from lionweb.serialization.deserialization_exception import \
     DeserializationException
+from lionweb.serialization.parallel_serialization import \
+    serialize_nodes_in_parallel
 from lionweb.serialization.proto import (PBChunk, PBContainment, PBLanguage,
                                          PBMetaPointer, PBNode, PBProperty,
                                          PBReference, PBReferenceValue)
@@ -28,16 +30,25 @@ class ProtoBufSerialization(AbstractSerialization):
         super().__init__(lionweb_version=lionweb_version)
         self._chunk_instance = PBChunk()  # Reusable instance
 
-    def _read_pbchunk_from_bytes(self, data: bytes) -> PBChunk:
+    def _read_pbchunk_from_bytes(self, data: bytes | memoryview) -> PBChunk:
         """Read a protobuf Chunk from binary content"""
         self._chunk_instance.Clear()  # Reset the instance
         self._chunk_instance.ParseFromString(data)
         return self._chunk_instance
 
-    def deserialize_chunk_from_bytes(self, data: bytes) -> "SerializationChunk":
-        return self._deserialize_pbchunk_to_serialization_chunk(
-            self._read_pbchunk_from_bytes(data)
-        )
+    def deserialize_chunk_from_bytes(
+        self, data: bytes | memoryview
+    ) -> "SerializationChunk":
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self._deserialize_pbchunk_to_serialization_chunk(
+                self._read_pbchunk_from_bytes(data)
+            )
+        instrumentation.count("deserialization.bytes_in", len(data))
+        with instrumentation.phase("deserialization.protobuf_parsing"):
+            pb_chunk = self._read_pbchunk_from_bytes(data)
+        with instrumentation.phase("deserialization.chunk_reading"):
+            return self._deserialize_pbchunk_to_serialization_chunk(pb_chunk)
 
     def _deserialize_pbchunk_to_serialization_chunk(
         self, chunk: PBChunk
@@ -160,8 +171,13 @@ class ProtoBufSerialization(AbstractSerialization):
     def serialize_chunk_to_bytes(
         self, serialization_chunk: "SerializationChunk"
     ) -> bytes:
-        pb_chunk = self._serialize(serialization_chunk)
-        return pb_chunk.SerializeToString()
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            return self._serialize(serialization_chunk).SerializeToString()
+        with instrumentation.phase("serialization.protobuf_writing"):
+            data = self._serialize(serialization_chunk).SerializeToString()
+        instrumentation.count("serialization.bytes_out", len(data))
+        return data
 
     class _SerializeHelper:
 
@@ -303,7 +319,13 @@ class ProtoBufSerialization(AbstractSerialization):
         chunk = self.serialize_nodes_to_serialization_chunk(classifier_instances)
         return self.serialize_chunk_to_bytes(chunk)
 
-    def serialize_trees_to_bytes(self, roots: List[ClassifierInstance]) -> bytes:
+    def serialize_trees_to_bytes(
+        self, roots: List[ClassifierInstance], max_workers: Optional[int] = None
+    ) -> bytes:
+        """
+        Serialize the given trees. When max_workers is given, the nodes are serialized by up to that
+        many worker processes, producing the same result.
+        """
         from lionweb.model.impl.proxy_node import ProxyNode
 
         nodes_ids: Set[str] = set()
@@ -329,6 +351,10 @@ class ProtoBufSerialization(AbstractSerialization):
 
         # Filter out ProxyNode instances before serialization
         filtered_nodes = [node for node in all_nodes if not isinstance(node, ProxyNode)]
+        if max_workers is not None:
+            return self.serialize_chunk_to_bytes(
+                serialize_nodes_in_parallel(self, filtered_nodes, max_workers)
+            )
         return self.serialize_nodes_to_bytes(filtered_nodes)
 
     def deserialize_bytes_to_nodes(self, data: bytes) -> List[ClassifierInstance]:
@@ -0,0 +1,86 @@
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple, cast
+
+from lionweb.serialization.data.metapointer import MetaPointer
+
+if TYPE_CHECKING:
+    from lionweb.language import (Classifier, Containment, DataType, Language,
+                                  Property, Reference)
+    from lionweb.serialization.primitives_values_serialization import \
+        PrimitiveValuesSerialization
+
+
+class SerializationPlan:
+    """
+    Everything needed to serialize the instances of one classifier, derived once: the classifier
+    MetaPointer, the MetaPointer of each feature together with the function encoding the values of
+    each property, and the languages a chunk containing such instances has to declare.
+    """
+
+    def __init__(
+        self,
+        classifier: "Classifier",
+        primitive_values_serialization: "PrimitiveValuesSerialization",
+    ):
+        self.classifier = classifier
+        self.meta_pointer = MetaPointer.from_language_entity(classifier)
+        self.property_slots: List[
+            Tuple["Property", MetaPointer, Callable[[object], Optional[str]]]
+        ] = []
+        for property in classifier.all_properties():
+            dt = property.type
+            if dt is None:
+                raise ValueError(f"property {property.get_name()} has no type")
+            if dt.id is None:
+                raise ValueError(
+                    "Cannot serialize property when the dataType.ID is null"
+                )
+            self.property_slots.append(
+                (
+                    property,
+                    self._feature_meta_pointer(property),
+                    primitive_values_serialization.serializer_for_data_type(dt.id),
+                )
+            )
+        self.containment_slots: List[Tuple["Containment", MetaPointer]] = [
+            (containment, self._feature_meta_pointer(containment))
+            for containment in classifier.all_containments()
+        ]
+        self.reference_slots: List[Tuple["Reference", MetaPointer]] = [
+            (reference, self._feature_meta_pointer(reference))
+            for reference in classifier.all_references()
+        ]
+        self.languages = self._used_languages(classifier)
+
+    @staticmethod
+    def _feature_meta_pointer(feature) -> MetaPointer:
+        container = feature.get_container()
+        if container is None:
+            raise ValueError()
+        language = container.language
+        if language is None:
+            raise ValueError()
+        return MetaPointer.from_keyed(feature, language)
+
+    @staticmethod
+    def _used_languages(classifier: "Classifier") -> List["Language"]:
+        language = classifier.language
+        if language is None:
+            raise ValueError(
+                f"A Concept should be part of a Language in order to be serialized. Concept {classifier} is not"
+            )
+        languages: list = [language]
+        for feature in classifier.all_features():
+            languages.append(feature.get_declaring_language())
+        for prop in classifier.all_properties():
+            languages.append(cast("DataType", prop.type).language)
+        for link in classifier.all_links():
+            link_type = link.get_type()
+            if link_type is None:
+                raise ValueError(f"link {link.get_name()} has no type")
+            languages.append(link_type.language)
+        # Keep the first occurrence of each language, preserving the order
+        unique_languages: List["Language"] = []
+        for used_language in languages:
+            if not any(used_language is ul for ul in unique_languages):
+                unique_languages.append(used_language)
+        return unique_languages
@@ -1,7 +1,10 @@
-from typing import Dict, List, cast
+from collections import Counter
+from typing import Any, Callable, Dict, List, cast
 
 from lionweb.serialization.json_utils import JsonArray, JsonObject
 
+DEFAULT_MAX_DIFFERENCES = 100
+
 
 class SerializedJsonComparisonUtils:
 
@@ -15,129 +18,63 @@ class SerializedJsonComparisonUtils:
         if set(actual.keys()) != keys:
             raise RuntimeError(f"The actual object has irregular keys: {actual.keys()}")
 
-        SerializedJsonComparisonUtils.assert_equals(
-            "serializationFormatVersion",
-            expected.get("serializationFormatVersion"),
-            actual.get("serializationFormatVersion"),
-        )
-        SerializedJsonComparisonUtils.assert_equivalent_lionweb_json_nodes(
-            cast(JsonArray, expected.get("nodes")), cast(JsonArray, actual.get("nodes"))
-        )
-        SerializedJsonComparisonUtils.assert_equivalent_lionweb_json_languages(
-            cast(JsonArray, expected.get("languages")),
-            cast(JsonArray, actual.get("languages")),
+        _raise_first_difference(
+            lambda differences: _compare_lionweb_json(expected, actual, differences)
         )
 
     @staticmethod
     def assert_equivalent_lionweb_json_languages(
         expected_languages: JsonArray, actual_languages: JsonArray
     ) -> None:
-        if len(expected_languages) != len(actual_languages):
-            raise AssertionError(
-                f"Expected {len(expected_languages)} languages, but found {len(actual_languages)}. Actual languages: {actual_languages}"
-            )
-
-        expected_versions = {
-            cast(Dict, lang)["key"]: cast(Dict, lang)["version"]
-            for lang in expected_languages
-        }
-        actual_versions = {
-            cast(Dict, lang)["key"]: cast(Dict, lang)["version"]
-            for lang in actual_languages
-        }
-
-        if expected_versions != actual_versions:
-            raise AssertionError(
-                f"Used languages do not match: expected {expected_versions}, got {actual_versions}"
+        _raise_first_difference(
+            lambda differences: _compare_languages(
+                expected_languages, actual_languages, differences
             )
+        )
 
     @staticmethod
     def assert_equivalent_lionweb_json_nodes(expected: JsonArray, actual: JsonArray):
-        expected_elements = {(cast(JsonObject, e))["id"]: e for e in expected}
-        actual_elements = {(cast(JsonObject, e))["id"]: e for e in actual}
-
-        unexpected_ids = set(actual_elements.keys()) - set(expected_elements.keys())
-        missing_ids = set(expected_elements.keys()) - set(actual_elements.keys())
-
-        if unexpected_ids:
-            raise AssertionError(f"Unexpected IDs found: {unexpected_ids}")
-        if missing_ids:
-            raise AssertionError(f"Missing IDs found: {missing_ids}")
-
-        SerializedJsonComparisonUtils.assert_equals(
-            "The number of nodes is different", len(expected), len(actual)
+        _raise_first_difference(
+            lambda differences: _compare_nodes(expected, actual, differences)
         )
 
-        for node_id in expected_elements:
-            expected_node = cast(JsonObject, expected_elements[node_id])
-            actual_node = cast(JsonObject, actual_elements[node_id])
-            SerializedJsonComparisonUtils.assert_equivalent_nodes(
-                expected_node, actual_node, f"Node {node_id}"
-            )
-
     @staticmethod
     def assert_equivalent_nodes(expected: dict, actual: dict, context: str):
-        actual_keys = set(actual.keys())
-        expected_keys = set(expected.keys())
-
-        # Remove null 'parent' keys
-        if "parent" in actual and actual["parent"] is None:
-            actual_keys.remove("parent")
-        if "parent" in expected and expected["parent"] is None:
-            expected_keys.remove("parent")
-
-        unexpected_keys = actual_keys - expected_keys
-        missing_keys = expected_keys - actual_keys
-
-        if unexpected_keys:
-            raise AssertionError(
-                f"({context}) Unexpected keys found: {unexpected_keys}"
-            )
-        if missing_keys:
-            raise AssertionError(f"({context}) Missing keys found: {missing_keys}")
-
-        for key in actual_keys:
-            if key in {"parent", "classifier", "id"}:
-                SerializedJsonComparisonUtils.assert_equals(
-                    f"({context}) different {key}", expected.get(key), actual.get(key)
-                )
-            elif key in {"references", "containments", "properties", "annotations"}:
-                SerializedJsonComparisonUtils.assert_equivalent_unordered_arrays(
-                    expected.get(key, []),
-                    actual.get(key, []),
-                    f"{key.capitalize()} of {context}",
-                )
-            else:
-                raise AssertionError(
-                    f"({context}) unexpected top-level key found: {key}"
-                )
+        _raise_first_difference(
+            lambda differences: _compare_node(expected, actual, context, differences)
+        )
 
     @staticmethod
     def assert_equivalent_unordered_arrays(
         expected: List[dict], actual: List[dict], context: str
     ):
-        if len(expected) != len(actual):
-            raise AssertionError(
-                f"({context}) Arrays with different sizes: expected={len(expected)} and actual={len(actual)}"
+        _raise_first_difference(
+            lambda differences: _compare_unordered_arrays(
+                expected, actual, context, differences
             )
+        )
 
-        consumed_actual = set()
-        for expected_element in expected:
-            match_found = False
-            for i, actual_element in enumerate(actual):
-                if (
-                    i not in consumed_actual
-                    and SerializedJsonComparisonUtils.are_equivalent_objects(
-                        expected_element, actual_element
-                    )
-                ):
-                    consumed_actual.add(i)
-                    match_found = True
-                    break
-            if not match_found:
-                SerializedJsonComparisonUtils.fail(
-                    f"{context} element {expected_element} not found"
-                )
+    @staticmethod
+    def find_differences(
+        expected: JsonObject,
+        actual: JsonObject,
+        max_differences: int = DEFAULT_MAX_DIFFERENCES,
+    ) -> List[str]:
+        """
+        Return the differences between two LionWeb JSON documents, at most max_differences of them,
+        comparing them as assert_equivalent_lionweb_json does. An empty list means that they are
+        equivalent.
+
+        Nodes are matched by id, and the elements of their unordered arrays (properties,
+        containments, references and annotations) by a canonical form, hashed once, so that the
+        comparison takes linear time, instead of pairing elements by trying all of them.
+        """
+        differences = _Differences(max_differences)
+        try:
+            _compare_lionweb_json(expected, actual, differences)
+        except _LimitReached:
+            pass
+        return differences.messages
 
     @staticmethod
     def are_equivalent_objects(expected: dict, actual: dict) -> bool:
@@ -183,3 +120,192 @@ class SerializedJsonComparisonUtils:
     @staticmethod
     def fail(message: str):
         raise AssertionError(f"Comparison failed. {message}")
+
+
+class _LimitReached(Exception):
+    pass
+
+
+class _Differences:
+    """Collects the differences found, stopping the comparison once the limit is reached."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.messages: List[str] = []
+
+    def add(self, message: str) -> None:
+        self.messages.append(message)
+        if len(self.messages) >= self.limit:
+            raise _LimitReached()
+
+    def check_equals(self, message: str, expected, actual) -> None:
+        if expected != actual:
+            self.add(f"{message}: expected {expected} but found {actual}")
+
+
+def _raise_first_difference(compare: Callable[[_Differences], None]) -> None:
+    differences = _Differences(1)
+    try:
+        compare(differences)
+    except _LimitReached:
+        raise AssertionError(differences.messages[0])
+
+
+def _compare_lionweb_json(
+    expected: JsonObject, actual: JsonObject, differences: _Differences
+) -> None:
+    keys = {"serializationFormatVersion", "nodes", "languages"}
+    if set(expected.keys()) != keys:
+        differences.add(f"The expected object has irregular keys: {expected.keys()}")
+    if set(actual.keys()) != keys:
+        differences.add(f"The actual object has irregular keys: {actual.keys()}")
+    differences.check_equals(
+        "serializationFormatVersion",
+        expected.get("serializationFormatVersion"),
+        actual.get("serializationFormatVersion"),
+    )
+    _compare_nodes(
+        cast(JsonArray, expected.get("nodes", [])),
+        cast(JsonArray, actual.get("nodes", [])),
+        differences,
+    )
+    _compare_languages(
+        cast(JsonArray, expected.get("languages", [])),
+        cast(JsonArray, actual.get("languages", [])),
+        differences,
+    )
+
+
+def _compare_languages(
+    expected_languages: JsonArray,
+    actual_languages: JsonArray,
+    differences: _Differences,
+) -> None:
+    if len(expected_languages) != len(actual_languages):
+        differences.add(
+            f"Expected {len(expected_languages)} languages, but found {len(actual_languages)}. Actual languages: {actual_languages}"
+        )
+
+    expected_versions = {
+        cast(Dict, lang)["key"]: cast(Dict, lang)["version"]
+        for lang in expected_languages
+    }
+    actual_versions = {
+        cast(Dict, lang)["key"]: cast(Dict, lang)["version"]
+        for lang in actual_languages
+    }
+
+    if expected_versions != actual_versions:
+        differences.add(
+            f"Used languages do not match: expected {expected_versions}, got {actual_versions}"
+        )
+
+
+def _compare_nodes(
+    expected: JsonArray, actual: JsonArray, differences: _Differences
+) -> None:
+    expected_elements = {(cast(JsonObject, e))["id"]: e for e in expected}
+    actual_elements = {(cast(JsonObject, e))["id"]: e for e in actual}
+
+    for node_id in actual_elements:
+        if node_id not in expected_elements:
+            differences.add(f"Unexpected ID found: {node_id}")
+    for node_id in expected_elements:
+        if node_id not in actual_elements:
+            differences.add(f"Missing ID found: {node_id}")
+
+    differences.check_equals(
+        "The number of nodes is different", len(expected), len(actual)
+    )
+
+    for node_id, expected_node in expected_elements.items():
+        actual_node = actual_elements.get(node_id)
+        # Most nodes are usually identical, which a plain equality check tells quickly
+        if actual_node is not None and actual_node != expected_node:
+            _compare_node(
+                cast(JsonObject, expected_node),
+                cast(JsonObject, actual_node),
+                f"Node {node_id}",
+                differences,
+            )
+
+
+def _compare_node(
+    expected: dict, actual: dict, context: str, differences: _Differences
+) -> None:
+    actual_keys = set(actual.keys())
+    expected_keys = set(expected.keys())
+
+    # Remove null 'parent' keys
+    if "parent" in actual and actual["parent"] is None:
+        actual_keys.remove("parent")
+    if "parent" in expected and expected["parent"] is None:
+        expected_keys.remove("parent")
+
+    unexpected_keys = actual_keys - expected_keys
+    missing_keys = expected_keys - actual_keys
+
+    if unexpected_keys:
+        differences.add(f"({context}) Unexpected keys found: {unexpected_keys}")
+    if missing_keys:
+        differences.add(f"({context}) Missing keys found: {missing_keys}")
+
+    for key in actual_keys & expected_keys:
+        if key in {"parent", "classifier", "id"}:
+            differences.check_equals(
+                f"({context}) different {key}", expected.get(key), actual.get(key)
+            )
+        elif key in {"references", "containments", "properties", "annotations"}:
+            _compare_unordered_arrays(
+                expected.get(key, []),
+                actual.get(key, []),
+                f"{key.capitalize()} of {context}",
+                differences,
+            )
+        else:
+            differences.add(f"({context}) unexpected top-level key found: {key}")
+
+
+def _compare_unordered_arrays(
+    expected: List[dict], actual: List[dict], context: str, differences: _Differences
+) -> None:
+    if len(expected) != len(actual):
+        differences.add(
+            f"({context}) Arrays with different sizes: expected={len(expected)} and actual={len(actual)}"
+        )
+
+    # Elements are matched by their canonical form, as many times as they appear
+    unmatched = Counter(_canonical_form(element) for element in actual)
+    for expected_element in expected:
+        canonical = _canonical_form(expected_element)
+        if unmatched[canonical] > 0:
+            unmatched[canonical] -= 1
+        else:
+            differences.add(f"{context} element {expected_element} not found")
+    for actual_element in actual:
+        canonical = _canonical_form(actual_element)
+        if unmatched[canonical] > 0:
+            unmatched[canonical] -= 1
+            differences.add(f"{context} element {actual_element} not expected")
+
+
+def _canonical_form(element: dict) -> Any:
+    """
+    A hashable form of the element, equal for the elements which assert_equivalent_objects considers
+    equivalent: keys with empty values are left out, and the order of keys does not matter.
+    """
+    return tuple(
+        sorted(
+            (key, _freeze(value))
+            for key, value in element.items()
+            if value not in ({}, [], None)
+        )
+    )
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
@@ -0,0 +1,49 @@
+from typing import Dict
+
+
+class StringInterner:
+    """
+    Bounded table used to share a single copy of equal strings among deserialized nodes. Models tend to
+    repeat the same property values and resolve info many times, so sharing them reduces the memory
+    taken by loaded models. When the table is full the string interned first is evicted.
+    """
+
+    def __init__(self, max_size: int = 100_000):
+        if max_size <= 0:
+            raise ValueError("max_size should be positive")
+        self.max_size = max_size
+        self._strings: Dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def intern(self, value: str) -> str:
+        strings = self._strings
+        interned = strings.get(value)
+        if interned is not None:
+            self.hits += 1
+            return interned
+        self.misses += 1
+        if len(strings) >= self.max_size:
+            del strings[next(iter(strings))]
+            self.evictions += 1
+        strings[value] = value
+        return value
+
+    def size(self) -> int:
+        return len(self._strings)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._strings),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        self._strings.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
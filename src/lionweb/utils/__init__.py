@@ -1,6 +1,14 @@
 from .id_utils import clean_string_as_id, is_valid_id
+from .instrumentation import Instrumentation
 from .issue import Issue
 from .issue_severity import IssueSeverity
 from .node_navigation import root
 
-__all__ = ["is_valid_id", "clean_string_as_id", "Issue", "IssueSeverity", "root"]
+__all__ = [
+    "is_valid_id",
+    "clean_string_as_id",
+    "Instrumentation",
+    "Issue",
+    "IssueSeverity",
+    "root",
+]
@@ -0,0 +1,73 @@
+import unittest
+
+from lionweb.api.composite_classifier_instance_resolver import \
+    CompositeClassifierInstanceResolver
+from lionweb.api.local_classifier_instance_resolver import \
+    LocalClassifierInstanceResolver
+from lionweb.api.overlay_classifier_instance_resolver import \
+    OverlayClassifierInstanceResolver
+from lionweb.language import Concept
+from lionweb.model.impl.dynamic_node import DynamicNode
+
+
+class OverlayClassifierInstanceResolverTest(unittest.TestCase):
+
+    def test_first_layer_wins(self):
+        concept = Concept()
+        a1 = DynamicNode("a", concept)
+        a2 = DynamicNode("a", concept)
+        b2 = DynamicNode("b", concept)
+        overlay = OverlayClassifierInstanceResolver({"a": a1}, {"a": a2, "b": b2})
+
+        self.assertIs(a1, overlay.resolve("a"))
+        self.assertIs(b2, overlay.resolve("b"))
+        self.assertIsNone(overlay.resolve("c"))
+
+    def test_layers_are_neither_copied_nor_modified(self):
+        concept = Concept()
+        a = DynamicNode("a", concept)
+        b = DynamicNode("b", concept)
+        first_layer = {"a": a}
+        overlay = OverlayClassifierInstanceResolver(first_layer)
+        overlay.add(b)
+
+        self.assertIs(b, overlay.resolve("b"))
+        self.assertEqual({"a": a}, first_layer)
+
+        merged = OverlayClassifierInstanceResolver(first_layer, {"b": b})
+        self.assertIs(b, merged.resolve("b"))
+        self.assertEqual({"a": a}, first_layer)
+
+        # Layers are looked up as they are now, not as they were when the overlay was created
+        c = DynamicNode("c", concept)
+        first_layer["c"] = c
+        self.assertIs(c, merged.resolve("c"))
+
+    def test_from_resolvers_keeps_the_composite_semantics(self):
+        concept = Concept()
+        a1 = DynamicNode("a", concept)
+        a2 = DynamicNode("a", concept)
+        b2 = DynamicNode("b", concept)
+        c3 = DynamicNode("c", concept)
+        c4 = DynamicNode("c", concept)
+        d4 = DynamicNode("d", concept)
+        # A resolver which is not backed by a dictionary
+        composite = CompositeClassifierInstanceResolver(
+            LocalClassifierInstanceResolver(c3)
+        )
+        overlay = OverlayClassifierInstanceResolver.from_resolvers(
+            LocalClassifierInstanceResolver(a1),
+            LocalClassifierInstanceResolver(a2, b2),
+            composite,
+            LocalClassifierInstanceResolver(c4, d4),
+        )
+
+        self.assertIs(a1, overlay.resolve("a"))
+        self.assertIs(b2, overlay.resolve("b"))
+        self.assertIs(c3, overlay.resolve("c"))
+        self.assertIs(d4, overlay.resolve("d"))
+        self.assertIsNone(overlay.resolve("e"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,235 @@
+"""
+Benchmarks of the serialization round trips. Run them from the root of the repository with:
+
+    PYTHONPATH=src:tests python -m benchmarks.runner run --size 100000 --output results.json
+
+and compare the results of two runs, for example obtained on different commits, with:
+
+    PYTHONPATH=src:tests python -m benchmarks.runner compare before.json after.json
+"""
+
+import datetime
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import click
+from benchmarks.synthetic_models import (ModelShape, generate_library,
+                                         generate_model)
+from fixtures.folders import FolderLanguage, count_nodes
+
+from lionweb.lionweb_version import LionWebVersion
+from lionweb.model import ClassifierInstance
+from lionweb.serialization import (LowLevelJsonSerialization,
+                                   create_standard_json_serialization,
+                                   create_standard_protobuf_serialization)
+
+FORMATS = ["json", "protobuf", "low-level-json"]
+MODELS = ["synthetic", "library"]
+
+
+def _serialization_steps(
+    format: str, roots: List, lion_web_version: LionWebVersion, model: str
+) -> Tuple[Callable[[], Any], Callable[[Any], Any]]:
+    """
+    Return the function serializing the given trees, and the one deserializing the result of the first
+    one, in the given format.
+    """
+    if format == "low-level-json":
+        json_serialization = create_standard_json_serialization(lion_web_version)
+        nodes: List[ClassifierInstance] = []
+        for root in roots:
+            ClassifierInstance.collect_self_and_descendants(root, True, nodes)
+        chunk = json_serialization.serialize_nodes_to_serialization_chunk(nodes)
+        low_level = LowLevelJsonSerialization()
+        return (
+            lambda: low_level.serialize_to_json_string(chunk),
+            low_level.deserialize_serialization_block_from_string,
+        )
+    if format == "json":
+        serialization = create_standard_json_serialization(lion_web_version)
+    elif format == "protobuf":
+        serialization = create_standard_protobuf_serialization(lion_web_version)
+    else:
+        raise ValueError(f"Unknown format {format}")
+    if model == "synthetic":
+        serialization.register_language(FolderLanguage.LANGUAGE)
+    else:
+        from serialization.library.library_language import LibraryLanguage
+
+        serialization.register_language(LibraryLanguage.LIBRARY_MM)
+    serialization.enable_dynamic_nodes()
+    if format == "json":
+        return (
+            lambda: json.dumps(serialization.serialize_trees_to_json_element(roots)),
+            serialization.deserialize_string_to_nodes,
+        )
+    return (
+        lambda: serialization.serialize_trees_to_bytes(roots),
+        serialization.deserialize_bytes_to_nodes,
+    )
+
+
+def _measure(operation: Callable[[], Any], repetitions: int) -> Dict[str, float]:
+    """Return the best time of the operation and its peak memory allocation, in bytes."""
+    times = []
+    for _ in range(repetitions):
+        gc.collect()
+        start = time.perf_counter()
+        operation()
+        times.append(time.perf_counter() - start)
+    # Tracing allocations slows the operation down, so memory is measured in a separate run
+    gc.collect()
+    tracemalloc.start()
+    try:
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(times), "peak_memory_bytes": peak}
+
+
+def run_benchmarks(
+    shape: ModelShape,
+    model: str = "synthetic",
+    formats: Optional[List[str]] = None,
+    repetitions: int = 3,
+) -> Dict[str, Any]:
+    """
+    Serialize and deserialize a model of the given shape in each format, and return the best times,
+    the throughput in nodes per second and the peak memory of each operation.
+    """
+    if model == "synthetic":
+        roots = generate_model(shape)
+    elif model == "library":
+        roots = generate_library(shape)
+    else:
+        raise ValueError(f"Unknown model {model}")
+    lion_web_version = roots[0].get_classifier().get_lionweb_version()
+    nodes = count_nodes(roots)
+    results: Dict[str, Any] = {
+        "metadata": _metadata(),
+        "model": model,
+        "shape": shape.to_dict(),
+        "nodes": nodes,
+        "results": {},
+    }
+    for format in formats or FORMATS:
+        serialize, deserialize = _serialization_steps(
+            format, roots, lion_web_version, model
+        )
+        serialized = serialize()
+        format_results = {
+            "serialize": _measure(serialize, repetitions),
+            "deserialize": _measure(lambda: deserialize(serialized), repetitions),
+            "serialized_bytes": len(serialized),
+        }
+        for operation in ("serialize", "deserialize"):
+            measure = format_results[operation]
+            measure["nodes_per_second"] = nodes / measure["seconds"]
+        results["results"][format] = format_results
+    return results
+
+
+def _metadata() -> Dict[str, Optional[str]]:
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def compare_results(before: Dict[str, Any], after: Dict[str, Any]) -> List[str]:
+    """
+    Return a line for each operation measured in both results, with the ratio of its throughput and
+    peak memory after and before.
+    """
+    lines = []
+    for format, after_results in after["results"].items():
+        before_results = before["results"].get(format)
+        if before_results is None:
+            continue
+        for operation in ("serialize", "deserialize"):
+            b = before_results[operation]
+            a = after_results[operation]
+            speed = a["nodes_per_second"] / b["nodes_per_second"]
+            memory = a["peak_memory_bytes"] / max(b["peak_memory_bytes"], 1)
+            lines.append(
+                f"{format:15} {operation:12} {b['nodes_per_second']:12.0f} -> "
+                f"{a['nodes_per_second']:12.0f} nodes/s (x{speed:.2f}), "
+                f"peak memory x{memory:.2f}"
+            )
+    return lines
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option("--model", type=click.Choice(MODELS), default="synthetic")
+@click.option("--size", type=int, default=ModelShape.size)
+@click.option("--depth", type=int, default=ModelShape.depth)
+@click.option("--fan-out", type=int, default=ModelShape.fan_out)
+@click.option("--reference-density", type=float, default=ModelShape.reference_density)
+@click.option("--annotation-density", type=float, default=ModelShape.annotation_density)
+@click.option("--seed", type=int, default=ModelShape.seed)
+@click.option(
+    "--format", "formats", type=click.Choice(FORMATS), multiple=True, default=FORMATS
+)
+@click.option("--repetitions", type=int, default=3)
+@click.option("--output", type=click.Path(dir_okay=False), default=None)
+def run(
+    model,
+    size,
+    depth,
+    fan_out,
+    reference_density,
+    annotation_density,
+    seed,
+    formats,
+    repetitions,
+    output,
+):
+    shape = ModelShape(
+        size=size,
+        depth=depth,
+        fan_out=fan_out,
+        reference_density=reference_density,
+        annotation_density=annotation_density,
+        seed=seed,
+    )
+    results = run_benchmarks(shape, model, list(formats), repetitions)
+    if output is None:
+        click.echo(json.dumps(results, indent=2))
+    else:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+@cli.command()
+@click.argument("before", type=click.Path(exists=True, dir_okay=False))
+@click.argument("after", type=click.Path(exists=True, dir_okay=False))
+def compare(before, after):
+    with open(before) as f:
+        before_results = json.load(f)
+    with open(after) as f:
+        after_results = json.load(f)
+    for line in compare_results(before_results, after_results):
+        click.echo(line)
+
+
+if __name__ == "__main__":
+    cli()
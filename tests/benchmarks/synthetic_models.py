@@ -0,0 +1,62 @@
+import random
+from dataclasses import asdict, dataclass
+from typing import List
+
+from fixtures.folders import generate_folders
+
+from lionweb.model.impl.dynamic_node import DynamicNode
+
+
+@dataclass
+class ModelShape:
+    """
+    Parameters of a synthetic model. Nodes form trees with up to depth levels, where each node has
+    fan_out children, until size nodes are created. Each node has on average reference_density
+    references to random nodes and annotation_density annotations. Models generated with the same
+    shape are identical.
+    """
+
+    size: int = 10_000
+    depth: int = 5
+    fan_out: int = 8
+    reference_density: float = 1.0
+    annotation_density: float = 0.1
+    seed: int = 1
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def generate_model(shape: ModelShape) -> List[DynamicNode]:
+    """
+    Return the roots of a synthetic model of the folders language with the given shape.
+    """
+    return generate_folders(
+        shape.size,
+        depth=shape.depth,
+        fan_out=shape.fan_out,
+        reference_density=shape.reference_density,
+        annotation_density=shape.annotation_density,
+        seed=shape.seed,
+    )
+
+
+def generate_library(shape: ModelShape) -> List[DynamicNode]:
+    """
+    Return a model of the library test language with size nodes: a library containing books, written
+    by writers which are roots themselves. There is a writer every ten nodes. Only size and seed are
+    considered.
+    """
+    from serialization.library.book import Book
+    from serialization.library.library import Library
+    from serialization.library.writer import Writer
+
+    rnd = random.Random(shape.seed)
+    library = Library("library", "Benchmark library")
+    writers_count = max(1, shape.size // 10)
+    writers = [Writer(f"writer{i}", f"Writer {i}") for i in range(writers_count)]
+    for i in range(shape.size - 1 - writers_count):
+        book = Book(f"book{i}", f"Book {i}", writers[rnd.randrange(writers_count)])
+        book.pages = rnd.randint(10, 1000)
+        library.add_book(book)
+    return [library, *writers]
@@ -0,0 +1,47 @@
+import unittest
+
+from benchmarks.runner import FORMATS, compare_results, run_benchmarks
+from benchmarks.synthetic_models import ModelShape, generate_model
+from fixtures.folders import count_nodes
+
+from lionweb.serialization import create_standard_json_serialization
+
+
+class BenchmarkRunnerTest(unittest.TestCase):
+
+    def test_synthetic_models_are_reproducible(self):
+        shape = ModelShape(
+            size=200, depth=3, fan_out=4, reference_density=1.5, annotation_density=0.5
+        )
+        roots1 = generate_model(shape)
+        roots2 = generate_model(shape)
+
+        serialization = create_standard_json_serialization()
+        self.assertEqual(
+            serialization.serialize_trees_to_json_element(roots1),
+            serialization.serialize_trees_to_json_element(roots2),
+        )
+        # Each tree has 1 + 4 + 16 folders
+        self.assertEqual(10, len(roots1))
+        self.assertGreater(count_nodes(roots1), 200)
+
+    def test_run_benchmarks(self):
+        shape = ModelShape(size=50, depth=3, fan_out=3)
+        for model in ("synthetic", "library"):
+            results = run_benchmarks(shape, model, repetitions=1)
+            self.assertEqual(sorted(FORMATS), sorted(results["results"].keys()))
+            for format_results in results["results"].values():
+                self.assertGreater(format_results["serialized_bytes"], 0)
+                for operation in ("serialize", "deserialize"):
+                    self.assertGreater(format_results[operation]["nodes_per_second"], 0)
+                    self.assertGreater(
+                        format_results[operation]["peak_memory_bytes"], 0
+                    )
+
+        lines = compare_results(results, results)
+        self.assertEqual(2 * len(FORMATS), len(lines))
+        self.assertIn("(x1.00)", lines[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
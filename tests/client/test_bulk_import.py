@@ -0,0 +1,59 @@
+import json
+import unittest
+
+from fixtures.folders import folder
+
+from lionweb.client import BulkImport
+from lionweb.lionweb_version import LionWebVersion
+from lionweb.serialization import LowLevelJsonSerialization
+from lionweb.serialization.data.language_version import LanguageVersion
+
+
+class BulkImportTest(unittest.TestCase):
+
+    def test_nodes_are_appended_to_a_single_chunk(self):
+        root = folder("root")
+        nodes = [root] + [folder(f"n{i}", root) for i in range(20)]
+        bulk_import = BulkImport()
+        for n in nodes:
+            bulk_import.add_node(n)
+
+        self.assertEqual(21, bulk_import.number_of_nodes())
+        self.assertEqual(
+            ["root"] + [f"n{i}" for i in range(20)],
+            [n.id for n in bulk_import.get_nodes()],
+        )
+        self.assertEqual(
+            [LanguageVersion.of("folders", "1")], bulk_import.get_languages()
+        )
+
+        chunk = bulk_import.get_serialization_chunk(LionWebVersion.V2023_1)
+        self.assertEqual(
+            LionWebVersion.V2023_1.value, chunk.serialization_format_version
+        )
+        json_nodes = LowLevelJsonSerialization().serialize_to_json_element(chunk)[
+            "nodes"
+        ]
+        actual_size = len(json.dumps(json_nodes))
+        self.assertLess(
+            abs(bulk_import.estimated_size() - actual_size), actual_size * 0.25
+        )
+
+    def test_clear(self):
+        bulk_import = BulkImport(nodes=[folder("root")])
+        self.assertEqual(1, len(bulk_import))
+        self.assertGreater(bulk_import.estimated_size(), 0)
+
+        bulk_import.clear()
+        self.assertTrue(bulk_import.is_empty())
+        self.assertEqual([], bulk_import.get_languages())
+        self.assertEqual(0, bulk_import.estimated_size())
+
+        bulk_import.add_node(folder("other"))
+        self.assertEqual(
+            [LanguageVersion.of("folders", "1")], bulk_import.get_languages()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
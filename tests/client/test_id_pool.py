@@ -0,0 +1,86 @@
+import threading
+import unittest
+
+from lionweb.client import BulkImport, IdPool
+from lionweb.language import Concept, Containment, Language
+from lionweb.model.impl.dynamic_node import DynamicNode
+
+
+class IdPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.requested_counts = []
+        self.lock = threading.Lock()
+        self.next_id = 0
+
+    def _fetch(self, count):
+        with self.lock:
+            self.requested_counts.append(count)
+            ids = [f"id-{i}" for i in range(self.next_id, self.next_id + count)]
+            self.next_id += count
+            return ids
+
+    def test_ids_are_fetched_in_blocks(self):
+        pool = IdPool(self._fetch, block_size=10, background_refill=False)
+
+        self.assertEqual(["id-0", "id-1", "id-2"], pool.take(3))
+        self.assertEqual("id-3", pool.take_one())
+        self.assertEqual(6, pool.available())
+        self.assertEqual([f"id-{i}" for i in range(4, 19)], pool.take(15))
+        self.assertEqual([10, 10], self.requested_counts)
+        self.assertEqual(1, pool.available())
+
+    def test_the_pool_is_refilled_below_the_low_water_mark(self):
+        pool = IdPool(self._fetch, block_size=10, low_water_mark=5)
+        pool.take(4)
+        self.assertEqual([10], self.requested_counts)
+
+        pool.take(2)
+        # The refill runs in the background: taking more IDs waits for it when needed
+        self.assertEqual([f"id-{i}" for i in range(6, 20)], pool.take(14))
+        self.assertEqual(10, self.requested_counts[1])
+
+    def test_ids_are_unique_across_threads(self):
+        pool = IdPool(self._fetch, block_size=7, low_water_mark=3)
+        taken = []
+
+        def take():
+            for _ in range(50):
+                ids = pool.take(2)
+                with self.lock:
+                    taken.extend(ids)
+
+        threads = [threading.Thread(target=take) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(800, len(taken))
+        self.assertEqual(800, len(set(taken)))
+
+    def test_bulk_import_assigns_ids_from_the_pool(self):
+        language = Language(name="L", id="l-id", key="l-key", version="1")
+        concept = Concept(language=language, name="C", id="c-id", key="c-key")
+        children = Containment.create_multiple(
+            name="children", type=concept, id="c-children-id"
+        )
+        children.set_key("c-children-key")
+        concept.add_feature(children)
+        root = DynamicNode(None, concept)
+        child = DynamicNode("existing", concept)
+        grandchild = DynamicNode(None, concept)
+        root.add_child(children, child)
+        child.add_child(children, grandchild)
+
+        pool = IdPool(self._fetch, block_size=10, background_refill=False)
+        BulkImport(id_pool=pool).assign_ids(root)
+
+        self.assertEqual("id-0", root.id)
+        self.assertEqual("existing", child.id)
+        self.assertEqual("id-1", grandchild.id)
+        self.assertEqual([10], self.requested_counts)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import threading
+import unittest
+from unittest import mock
+
+from fixtures.folders import FolderLanguage, folder, nodes_by_id
+
+from lionweb.client import Client
+from lionweb.model.impl.proxy_node import ProxyNode
+from lionweb.serialization import create_standard_json_serialization
+
+
+class IterateSubtreesTest(unittest.TestCase):
+
+    def setUp(self):
+        # A partition with three levels: root, r0..r4 and r0-0..r4-2
+        root = folder("root")
+        for i in range(5):
+            child = folder(f"r{i}", root)
+            for j in range(3):
+                folder(f"r{i}-{j}", child)
+        self.server_nodes = nodes_by_id(root)
+
+        serialization = create_standard_json_serialization()
+        serialization.register_language(FolderLanguage.LANGUAGE)
+        serialization.enable_dynamic_nodes()
+        self.client = Client(serialization=serialization)
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight_seen = 0
+        self.lock = threading.Lock()
+
+        def retrieve_raw(ids, depth_limit=None):
+            with self.lock:
+                self.requests.append((list(ids), depth_limit))
+                self.in_flight += 1
+                self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+            nodes = [self.server_nodes[node_id] for node_id in ids]
+            chunk = serialization.serialize_nodes_to_json_element(nodes)
+            with self.lock:
+                self.in_flight -= 1
+            return {"chunk": chunk}
+
+        self.retrieve_raw = retrieve_raw
+
+    def test_nodes_are_retrieved_level_by_level_in_batches(self):
+        with mock.patch.object(
+            self.client, "_retrieve_raw", side_effect=self.retrieve_raw
+        ):
+            nodes = list(
+                self.client.iterate_partition("root", batch_size=4, max_in_flight=2)
+            )
+
+        expected_ids = (
+            ["root"]
+            + [f"r{i}" for i in range(5)]
+            + [f"r{i}-{j}" for i in range(5) for j in range(3)]
+        )
+        self.assertEqual(expected_ids, [n.id for n in nodes])
+        self.assertTrue(all(not isinstance(n, ProxyNode) for n in nodes))
+        self.assertIsInstance(nodes[1].get_parent(), ProxyNode)
+        self.assertEqual(
+            "r0-0", nodes[6].get_property_value(property=FolderLanguage.NAME)
+        )
+
+        self.assertTrue(all(depth_limit == 0 for _, depth_limit in self.requests))
+        self.assertTrue(all(len(ids) <= 4 for ids, _ in self.requests))
+        self.assertEqual(
+            sorted(expected_ids), sorted(i for ids, _ in self.requests for i in ids)
+        )
+        self.assertLessEqual(self.max_in_flight_seen, 2)
+
+    def test_retrieve_partition(self):
+        with mock.patch.object(
+            self.client,
+            "_retrieve_raw",
+            side_effect=lambda ids, depth_limit=None: self.retrieve_raw(
+                ["root"] + [f"r{i}" for i in range(5)], depth_limit
+            ),
+        ):
+            partition = self.client.retrieve_partition("root", depth_limit=1)
+
+        self.assertEqual("root", partition.id)
+        self.assertEqual(5, len(partition.get_children()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+from unittest import mock
+
+from fixtures.folders import FolderLanguage, folder, nodes_by_id
+
+from lionweb.client import Client, NodeCache
+from lionweb.client.node_cache import _replace_held_instances
+from lionweb.model.impl.proxy_node import ProxyNode
+from lionweb.model.reference_value import ReferenceValue
+from lionweb.serialization import create_standard_json_serialization
+
+
+class NodeCacheTest(unittest.TestCase):
+
+    def _server_tree(self):
+        root = folder("root")
+        a = folder("a", root)
+        folder("a1", a)
+        folder("b", root)
+        return nodes_by_id(root)
+
+    def _client(self, server_nodes, node_cache: NodeCache):
+        serialization = create_standard_json_serialization()
+        serialization.register_language(FolderLanguage.LANGUAGE)
+        serialization.enable_dynamic_nodes()
+        client = Client(serialization=serialization, node_cache=node_cache)
+        requests = []
+
+        def retrieve_raw(ids, depth_limit=None):
+            requests.append(list(ids))
+            nodes = []
+            for node_id in ids:
+                self._collect(server_nodes[node_id], depth_limit, nodes)
+            return {"chunk": serialization.serialize_nodes_to_json_element(nodes)}
+
+        return client, requests, retrieve_raw
+
+    def _collect(self, node, depth_limit, nodes):
+        nodes.append(node)
+        if depth_limit != 0:
+            for child in node.get_children():
+                self._collect(
+                    child, None if depth_limit is None else depth_limit - 1, nodes
+                )
+
+    def test_least_recently_used_nodes_are_evicted(self):
+        node_cache = NodeCache(max_size=2)
+        a = folder("a")
+        b = folder("b")
+        c = folder("c")
+        node_cache.put(a)
+        node_cache.put(b)
+        self.assertIs(a, node_cache.resolve("a"))
+        node_cache.put(c)
+
+        self.assertIn("a", node_cache)
+        self.assertNotIn("b", node_cache)
+        self.assertIn("c", node_cache)
+        self.assertEqual(2, len(node_cache))
+
+    def test_loaded_subtree_requires_all_nodes_within_depth(self):
+        node_cache = NodeCache()
+        tree = self._server_tree()
+        node_cache.put_tree(tree["root"])
+
+        self.assertEqual(
+            ["root", "a", "a1", "b"],
+            [n.id for n in node_cache.loaded_subtree("root")],
+        )
+        node_cache.invalidate(["a1"])
+        self.assertIsNone(node_cache.loaded_subtree("root"))
+        self.assertEqual(
+            ["root", "a", "b"],
+            [n.id for n in node_cache.loaded_subtree("root", depth_limit=1)],
+        )
+
+    def test_invalidate_subtrees(self):
+        node_cache = NodeCache()
+        tree = self._server_tree()
+        node_cache.put_tree(tree["root"])
+        node_cache.invalidate_subtrees(["a"])
+
+        self.assertEqual({"root", "b"}, {n for n in tree if n in node_cache})
+
+    def test_retrieve_reuses_cached_nodes(self):
+        server_nodes = self._server_tree()
+        client, requests, retrieve_raw = self._client(server_nodes, NodeCache())
+
+        with mock.patch.object(client, "_retrieve_raw", side_effect=retrieve_raw):
+            first = client.retrieve(["root"])
+            second = client.retrieve(["root"])
+            a = client.retrieve(["a"], depth_limit=0)
+
+        self.assertEqual([["root"]], requests)
+        self.assertEqual(["root", "a", "a1", "b"], [n.id for n in first])
+        self.assertEqual(len(first), len(second))
+        for n1, n2 in zip(first, second):
+            self.assertIs(n1, n2)
+        self.assertIs(first[1], a[0])
+
+    def test_retrieve_fetches_missing_levels_and_links_them_to_cached_nodes(self):
+        server_nodes = self._server_tree()
+        client, requests, retrieve_raw = self._client(server_nodes, NodeCache())
+
+        with mock.patch.object(client, "_retrieve_raw", side_effect=retrieve_raw):
+            root = client.retrieve(["root"], depth_limit=1)[0]
+            self.assertIsInstance(root.get_children()[0].get_children()[0], ProxyNode)
+            a = client.retrieve(["a"])[0]
+            whole_tree = client.retrieve(["root"])
+
+        self.assertEqual([["root"], ["a"]], requests)
+        self.assertIs(root, a.get_parent())
+        self.assertIs(a, root.get_children()[0])
+        self.assertEqual(
+            "a1", a.get_children()[0].get_property_value(FolderLanguage.NAME)
+        )
+        self.assertIs(root, whole_tree[0])
+        self.assertEqual(["root", "a", "a1", "b"], [n.id for n in whole_tree])
+
+    def test_refetched_nodes_replace_previous_instances_in_cached_nodes(self):
+        server_nodes = self._server_tree()
+        server_nodes["b"].add_reference_value(
+            FolderLanguage.LINKS, ReferenceValue(server_nodes["a"], "a")
+        )
+        client, requests, retrieve_raw = self._client(server_nodes, NodeCache())
+
+        with mock.patch.object(client, "_retrieve_raw", side_effect=retrieve_raw):
+            root, a, a1, b = client.retrieve(["root"])
+            resolver = client._serialization.instance_resolver
+            # a1 is no longer cached, so a is fetched again with it
+            client._node_cache.invalidate(["a1"])
+            new_a, new_a1 = client.retrieve(["a"])
+
+        self.assertEqual([["root"], ["a"]], requests)
+        self.assertIsNot(a, new_a)
+        self.assertIs(resolver, client._serialization.instance_resolver)
+        self.assertIs(new_a, root.get_children()[0])
+        self.assertIs(root, new_a.get_parent())
+        self.assertIs(new_a, new_a1.get_parent())
+        self.assertIs(new_a, b.get_reference_values(FolderLanguage.LINKS)[0].referred)
+
+    def test_replace_all_updates_only_the_holders_of_replaced_instances(self):
+        node_cache = NodeCache()
+        tree = self._server_tree()
+        tree["b"].add_reference_value(
+            FolderLanguage.LINKS, ReferenceValue(tree["a1"], "a1")
+        )
+        node_cache.put_tree(tree["root"])
+        for i in range(100):
+            node_cache.put(folder(f"other{i}"))
+
+        new_a1 = folder("a1")
+        with mock.patch(
+            "lionweb.client.node_cache._replace_held_instances",
+            wraps=_replace_held_instances,
+        ) as replace:
+            node_cache.replace_all([new_a1])
+
+        self.assertEqual(
+            {"a1", "a", "b"}, {c.args[0].id for c in replace.call_args_list}
+        )
+        self.assertIs(new_a1, node_cache.resolve("a1"))
+        self.assertIs(new_a1, tree["a"].get_children()[0])
+        self.assertIs(
+            new_a1, tree["b"].get_reference_values(FolderLanguage.LINKS)[0].referred
+        )
+
+        # Nodes which are no longer cached are no longer indexed
+        node_cache.invalidate(["b"])
+        self.assertEqual({}, node_cache._referrers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+A small language of folders, and factories of models in it, shared by the tests which need a generic
+model: folders with a name, a size, children folders and links to other folders, which can be
+annotated with notes.
+"""
+
+import random
+from typing import Dict, List, Optional
+
+from lionweb.language import (Annotation, Concept, Containment, Language,
+                              Property, Reference)
+from lionweb.language.lioncore_builtins import LionCoreBuiltins
+from lionweb.model import ClassifierInstance
+from lionweb.model.impl.dynamic_annotation_instance import \
+    DynamicAnnotationInstance
+from lionweb.model.impl.dynamic_node import DynamicNode
+from lionweb.model.reference_value import ReferenceValue
+
+
+class FolderLanguage:
+    LANGUAGE: Language
+    FOLDER: Concept
+    NOTE: Annotation
+    NAME: Property
+    SIZE: Property
+    CHILDREN: Containment
+    LINKS: Reference
+    TEXT: Property
+
+    @staticmethod
+    def initialize():
+        language = Language(name="Folders", id="folders", key="folders", version="1")
+        folder = Concept(language=language, name="Folder", id="folder", key="folder")
+        name = Property(
+            name="name",
+            type=LionCoreBuiltins.get_string(),
+            id="folder-name",
+            key="folder-name",
+        )
+        size = Property(
+            name="size",
+            type=LionCoreBuiltins.get_integer(),
+            id="folder-size",
+            key="folder-size",
+        )
+        children = Containment(
+            name="children",
+            id="folder-children",
+            key="folder-children",
+            type=folder,
+            multiple=True,
+            optional=True,
+        )
+        links = Reference(
+            name="links",
+            id="folder-links",
+            key="folder-links",
+            type=folder,
+            multiple=True,
+            optional=True,
+        )
+        for feature in (name, size, children, links):
+            folder.add_feature(feature)
+        note = Annotation(language=language, name="Note", id="note", key="note")
+        note.annotates = folder
+        text = Property(
+            name="text",
+            type=LionCoreBuiltins.get_string(),
+            id="note-text",
+            key="note-text",
+        )
+        note.add_feature(text)
+
+        FolderLanguage.LANGUAGE = language
+        FolderLanguage.FOLDER = folder
+        FolderLanguage.NOTE = note
+        FolderLanguage.NAME = name
+        FolderLanguage.SIZE = size
+        FolderLanguage.CHILDREN = children
+        FolderLanguage.LINKS = links
+        FolderLanguage.TEXT = text
+
+
+FolderLanguage.initialize()
+
+
+def folder(
+    node_id: Optional[str],
+    parent: Optional[DynamicNode] = None,
+    name: Optional[str] = None,
+) -> DynamicNode:
+    """
+    Create a folder named after its ID, unless a name is given, as the last child of the given parent.
+    """
+    result = DynamicNode(node_id, FolderLanguage.FOLDER)
+    result.set_property_value(
+        property=FolderLanguage.NAME, value=node_id if name is None else name
+    )
+    if parent is not None:
+        parent.add_child(FolderLanguage.CHILDREN, result)
+    return result
+
+
+def note(
+    node_id: str, annotated: Optional[DynamicNode] = None
+) -> DynamicAnnotationInstance:
+    """Create a note, annotating the given folder if any."""
+    result = DynamicAnnotationInstance(node_id, FolderLanguage.NOTE)
+    if annotated is not None:
+        annotated.add_annotation(result)
+    return result
+
+
+def nodes_by_id(*roots: ClassifierInstance) -> Dict[Optional[str], ClassifierInstance]:
+    """Return the nodes of the given trees, annotations included, by ID."""
+    nodes: List[ClassifierInstance] = []
+    for root in roots:
+        ClassifierInstance.collect_self_and_descendants(root, True, nodes)
+    return {n.id: n for n in nodes}
+
+
+def generate_folders(
+    size: int,
+    depth: int = 5,
+    fan_out: int = 8,
+    reference_density: float = 1.0,
+    annotation_density: float = 0.1,
+    seed: int = 1,
+) -> List[DynamicNode]:
+    """
+    Return the roots of a model of folders. Folders form trees with up to depth levels, where each
+    folder has fan_out children, until size folders are created. Each folder has on average
+    reference_density links to random folders and annotation_density notes. The same arguments
+    always produce the same model.
+    """
+    rnd = random.Random(seed)
+    roots: List[DynamicNode] = []
+    folders: List[DynamicNode] = []
+
+    def create_folder(parent, level):
+        node_id = f"f{len(folders)}"
+        created = folder(node_id, parent, name=f"folder {node_id}")
+        created.set_property_value(
+            property=FolderLanguage.SIZE, value=rnd.randint(0, 100_000)
+        )
+        folders.append(created)
+        return created, level
+
+    while len(folders) < size:
+        frontier = [create_folder(None, 1)]
+        roots.append(frontier[0][0])
+        while frontier and len(folders) < size:
+            parent, level = frontier.pop(0)
+            if level >= depth:
+                continue
+            for _ in range(fan_out):
+                if len(folders) >= size:
+                    break
+                frontier.append(create_folder(parent, level + 1))
+
+    for f in folders:
+        for _ in range(_count(rnd, reference_density)):
+            target = folders[rnd.randrange(len(folders))]
+            f.add_reference_value(
+                FolderLanguage.LINKS,
+                ReferenceValue(
+                    target, target.get_property_value(property=FolderLanguage.NAME)
+                ),
+            )
+        for index in range(_count(rnd, annotation_density)):
+            created_note = note(f"{f.id}-note{index}", f)
+            created_note.set_property_value(
+                property=FolderLanguage.TEXT, value=f"note {index} on {f.id}"
+            )
+    return roots
+
+
+def _count(rnd: random.Random, density: float) -> int:
+    """Return an integer whose average, over many calls, is density."""
+    count = int(density)
+    if rnd.random() < density - count:
+        count += 1
+    return count
+
+
+def count_nodes(roots: List[DynamicNode]) -> int:
+    """Count the nodes of the given trees, annotations included."""
+    result = 0
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        result += 1
+        stack.extend(node.get_children())
+        stack.extend(node.get_annotations())
+    return result
@@ -50,6 +50,30 @@ class ConceptTest(unittest.TestCase):
         self.assertEqual(1, len(d.all_features()))
         self.assertEqual(0, len(d.inherited_features()))
 
+    def test_feature_lookups_follow_changes_to_the_hierarchy(self):
+        lang = Language(name="MyLanguage", id="l-id", key="l-key", version="123")
+        a = Concept(language=lang, name="A", id="a-id", key="a-key")
+        b = Concept(language=lang, name="B", id="b-id", key="b-key")
+        p1 = Property(name="P1", container=a, id="p1-id").set_key("p1-key")
+        a.add_feature(p1)
+
+        self.assertIsNone(b.get_property_by_name("P1"))
+        self.assertFalse(b.has_feature(p1))
+
+        b.extended_concept = a
+        self.assertIs(p1, b.get_property_by_name("P1"))
+        self.assertTrue(b.has_feature(p1))
+
+        p2 = Property(name="P2", container=b, id="p2-id").set_key("p2-key")
+        b.add_feature(p2)
+        self.assertIs(p2, b.get_feature_by_name("P2"))
+        self.assertTrue(b.has_feature(p2))
+        self.assertFalse(a.has_feature(p2))
+
+        p2.set_name("P2-renamed")
+        self.assertIsNone(b.get_property_by_name("P2"))
+        self.assertIs(p2, b.get_property_by_name("P2-renamed"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -35,6 +35,25 @@ class EnumerationTest(unittest.TestCase):
         self.assertIs(enm, lit.get_parent())
         self.assertIs(enm, lit.enumeration)
 
+    def test_literal_lookups_follow_changes_to_the_literals(self):
+        enm = Enumeration()
+        enm.name = "MyEnum"
+        lit1 = EnumerationLiteral(enumeration=enm, name="Lit1")
+        lit1.key = "lit1-key"
+
+        self.assertIs(lit1, enm.get_literal_by_name("Lit1"))
+        self.assertIs(lit1, enm.get_literal_by_key("lit1-key"))
+        self.assertIsNone(enm.get_literal_by_key("lit2-key"))
+
+        lit2 = EnumerationLiteral(enumeration=enm, name="Lit2")
+        lit2.key = "lit2-key"
+        lit1.key = "lit1-new-key"
+
+        self.assertIs(lit2, enm.get_literal_by_name("Lit2"))
+        self.assertIs(lit2, enm.get_literal_by_key("lit2-key"))
+        self.assertIs(lit1, enm.get_literal_by_key("lit1-new-key"))
+        self.assertIsNone(enm.get_literal_by_key("lit1-key"))
+
 
 if __name__ == "__main__":
     unittest.main()
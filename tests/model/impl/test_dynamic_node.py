@@ -87,6 +87,54 @@ class DynamicNodeTest(unittest.TestCase):
         n1.remove_child(child=n4)
         self.assertEqual([], n1.get_children(containment))
 
+    def test_remove_child_uses_identity(self):
+        c = Concept()
+        containment = Containment.create_multiple(name="ch", type=c)
+        containment.set_key("my-containment")
+        c.add_feature(containment)
+        n1 = DynamicNode("id-123", c)
+        n2 = DynamicNode("id-456", c)
+        n2_copy = DynamicNode("id-456", c)
+        n1.add_child(containment, n2)
+
+        with self.assertRaises(ValueError):
+            n1.remove_child(child=n2_copy)
+        self.assertEqual(1, len(n1.get_children(containment)))
+        self.assertIs(n2, n1.get_children(containment)[0])
+
+    def test_remove_children(self):
+        c = Concept()
+        containment = Containment.create_multiple(name="ch", type=c)
+        containment.set_key("my-containment")
+        c.add_feature(containment)
+        n1 = DynamicNode("id-123", c)
+        children = [DynamicNode(f"child-{i}", c) for i in range(10)]
+        for child in children:
+            n1.add_child(containment, child)
+        live_children = n1.get_children(containment)
+
+        n1.remove_children(children[::2])
+        self.assertEqual(children[1::2], n1.get_children(containment))
+        self.assertIs(live_children, n1.get_children(containment))
+        for child in children[::2]:
+            self.assertIsNone(child.get_parent())
+        for child in children[1::2]:
+            self.assertIs(n1, child.get_parent())
+
+    def test_remove_children_not_contained(self):
+        c = Concept()
+        containment = Containment.create_multiple(name="ch", type=c)
+        containment.set_key("my-containment")
+        c.add_feature(containment)
+        n1 = DynamicNode("id-123", c)
+        n2 = DynamicNode("id-456", c)
+        n3 = DynamicNode("id-789", c)
+        n1.add_child(containment, n2)
+
+        with self.assertRaises(ValueError):
+            n1.remove_children([n2, n3])
+        self.assertEqual([n2], n1.get_children(containment))
+
     def test_get_root_simple_cases(self):
         lang = Language("MyLanguage", "l-id", "l-key", "123")
         a = Concept(language=lang, name="A", id="a-id", key="a-key")
@@ -175,6 +223,31 @@ class DynamicNodeTest(unittest.TestCase):
         set_property_value_by_name(n1, "foo", None)
         self.assertIsNone(get_property_value_by_name(n1, "foo"))
 
+    def test_set_property_values_unchecked(self):
+        lang = Language("MyLanguage", "l-id", "l-key", "123")
+        a = Concept(language=lang, name="A", id="a-id", key="a-key")
+        foo = (
+            Property.create_required(name="foo", type=LionCoreBuiltins.get_boolean())
+            .set_id("foo-id")
+            .set_key("foo-key")
+        )
+        bar = (
+            Property.create_optional(name="bar", type=LionCoreBuiltins.get_string())
+            .set_id("bar-id")
+            .set_key("bar-key")
+        )
+        a.add_feature(foo)
+        a.add_feature(bar)
+        n1 = DynamicNode("n1", a)
+        n2 = DynamicNode("n1", a)
+
+        n1.set_property_values_unchecked({foo: False, bar: "hello"})
+        n2.set_property_value(foo, False)
+        n2.set_property_value(bar, "hello")
+        self.assertEqual(n2.property_values, n1.property_values)
+        self.assertEqual(False, n1.get_property_value(foo))
+        self.assertEqual("hello", n1.get_property_value("bar"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+from typing import List
+
+from fixtures.folders import FolderLanguage, folder, nodes_by_id
+
+from lionweb.model.change_tracking import ChangeCheckpoint
+from lionweb.model.impl.lazy_proxy_node import LazyProxyLoader, LazyProxyNode
+from lionweb.serialization import (create_standard_json_serialization,
+                                   node_content_hash)
+from lionweb.serialization.unavailable_node_policy import UnavailableNodePolicy
+
+
+class LazyProxyNodeTest(unittest.TestCase):
+
+    def setUp(self):
+        root = folder("root")
+        a = folder("a", root)
+        folder("a1", a)
+        folder("b", root)
+        self.server_nodes = nodes_by_id(root)
+
+        self.serialization = create_standard_json_serialization()
+        self.serialization.register_language(FolderLanguage.LANGUAGE)
+        self.serialization.enable_dynamic_nodes()
+        self.serialization.unavailable_parent_policy = UnavailableNodePolicy.PROXY_NODES
+        self.serialization.unavailable_children_policy = (
+            UnavailableNodePolicy.PROXY_NODES
+        )
+        self.requests: List[List[str]] = []
+        self.loader = LazyProxyLoader(self._load, batch_size=10)
+        self.serialization.proxy_factory = self.loader
+
+    def _load(self, ids: List[str]):
+        self.requests.append(ids)
+        nodes = [self.server_nodes[node_id] for node_id in ids]
+        chunk = self.serialization.serialize_nodes_to_json_element(nodes)
+        return [
+            n
+            for n in self.serialization.deserialize_json_to_nodes(chunk)
+            if not isinstance(n, LazyProxyNode)
+        ]
+
+    def test_children_are_loaded_on_first_access_with_their_siblings(self):
+        root = self._load(["root"])[0]
+        a, b = root.get_children()
+        self.assertIsInstance(a, LazyProxyNode)
+        self.assertFalse(a.is_loaded())
+
+        self.assertEqual("a", a.get_property_value(property=FolderLanguage.NAME))
+        self.assertTrue(b.is_loaded())
+        self.assertEqual("b", b.get_property_value(property=FolderLanguage.NAME))
+        self.assertEqual([["root"], ["a", "b"]], self.requests)
+
+        # The loaded nodes take the place of their proxies in the tree
+        self.assertIs(root, a.get_parent())
+        self.assertIs(a.node(), root.get_children()[0])
+
+        a1 = a.get_children()[0]
+        self.assertIsInstance(a1, LazyProxyNode)
+        self.assertEqual("a1", a1.get_property_value(property=FolderLanguage.NAME))
+        self.assertIs(a.node(), a1.get_parent())
+        # Ancestors already loaded are not fetched again
+        self.assertEqual([["root"], ["a", "b"], ["a1"]], self.requests)
+        self.assertEqual(2, self.loader.loads)
+
+    def test_change_tracking_does_not_load_proxies(self):
+        root = self._load(["root"])[0]
+        checkpoint = ChangeCheckpoint([root])
+        self.assertEqual([["root"]], self.requests)
+        self.assertEqual({"root", "a", "b"}, checkpoint.node_ids)
+        self.assertEqual({"a", "b"}, checkpoint.proxy_ids)
+
+        # Loading nodes does not change them
+        a = root.get_children()[0]
+        a.get_children()[0].get_classifier()
+        self.assertEqual([["root"], ["a", "b"], ["a1"]], self.requests)
+        changes = checkpoint.changes([root])
+        self.assertTrue(changes.is_empty())
+        self.assertEqual({"root", "a", "a1", "b"}, changes.node_ids)
+        checkpoint.advance(changes)
+        self.assertEqual(set(), checkpoint.proxy_ids)
+
+        a.set_property_value(property=FolderLanguage.SIZE, value=1)
+        self.assertEqual(["a"], [n.id for n in checkpoint.changes([root]).changed])
+
+    def test_content_hashes_cover_loaded_nodes(self):
+        root = self._load(["root"])[0]
+        expected = node_content_hash(self.server_nodes["root"], self.serialization)
+        self.assertNotEqual(expected, node_content_hash(root, self.serialization))
+
+        # Load a1, hence a and b
+        root.get_children()[0].get_children()[0].get_classifier()
+        self.assertEqual(expected, node_content_hash(root, self.serialization))
+
+    def test_batches_are_bounded(self):
+        self.loader.batch_size = 1
+        root = self._load(["root"])[0]
+        a, b = root.get_children()
+        a.get_classifier()
+
+        self.assertFalse(b.is_loaded())
+        self.assertEqual([["root"], ["a"]], self.requests)
+
+    def test_nodes_which_cannot_be_loaded(self):
+        proxy = self.loader("unknown")
+        self.server_nodes.pop("unknown", None)
+        with self.assertRaises(KeyError):
+            proxy.get_classifier()
+
+        missing = LazyProxyLoader(lambda ids: [])("a")
+        with self.assertRaises(ValueError):
+            missing.get_classifier()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+from fixtures.folders import FolderLanguage, folder, nodes_by_id, note
+
+from lionweb.client import Client
+from lionweb.model.change_tracking import ChangeCheckpoint
+from lionweb.model.reference_value import ReferenceValue
+from lionweb.serialization import create_standard_json_serialization
+
+
+class ChangeTrackingTest(unittest.TestCase):
+
+    def setUp(self):
+        # root contains a, b and c, and each of them contains two folders
+        self.root = folder("root")
+        for name in ("a", "b", "c"):
+            child = folder(name, self.root)
+            for i in range(2):
+                folder(f"{name}{i}", child)
+        self.nodes = nodes_by_id(self.root)
+
+    def test_changes_since_checkpoint(self):
+        checkpoint = ChangeCheckpoint([self.root])
+        self.assertTrue(checkpoint.changes([self.root]).is_empty())
+
+        self.nodes["a0"].set_property_value(property=FolderLanguage.SIZE, value=3)
+        self.nodes["b1"].add_reference_value(
+            FolderLanguage.LINKS, ReferenceValue(self.nodes["a0"], "a0")
+        )
+        folder("a2", self.nodes["a"])
+        self.root.remove_child(child=self.nodes["c"])
+        note("note", self.nodes["b0"])
+
+        changes = checkpoint.changes([self.root])
+        self.assertEqual(
+            ["root", "a", "a0", "a2", "b0", "note", "b1"],
+            [node.id for node in changes.changed],
+        )
+        self.assertEqual(["c", "c0", "c1"], changes.deleted_ids)
+
+        serialization = create_standard_json_serialization()
+        json = serialization.serialize_changes_to_json_element(changes)
+        self.assertEqual(
+            [node.id for node in changes.changed], [n["id"] for n in json["nodes"]]
+        )
+        self.assertEqual(
+            json,
+            serialization.serialize_nodes_to_json_element(changes.changed),
+        )
+
+        checkpoint.advance(changes)
+        self.assertTrue(checkpoint.changes([self.root]).is_empty())
+
+        # Moving a node changes the node, its former parent and its new one
+        self.nodes["b"].remove_child(child=self.nodes["b0"])
+        self.nodes["a"].add_child(FolderLanguage.CHILDREN, self.nodes["b0"])
+        changes = checkpoint.changes([self.root])
+        self.assertEqual(["a", "b0", "b"], [node.id for node in changes.changed])
+        self.assertEqual([], changes.deleted_ids)
+
+    def test_client_stores_only_changes(self):
+        serialization = create_standard_json_serialization()
+        client = Client(serialization=serialization)
+        checkpoint = ChangeCheckpoint([self.root])
+        self.nodes["b1"].set_property_value(property=FolderLanguage.SIZE, value=1)
+
+        response = mock.Mock(status_code=200)
+        with mock.patch(
+            "lionweb.client.client.requests.post", return_value=response
+        ) as post:
+            changes = client.store_changes(checkpoint, [self.root])
+            self.assertEqual(
+                ["b1"], [n["id"] for n in post.call_args.kwargs["json"]["nodes"]]
+            )
+            # Nothing changed since then, so nothing is sent
+            self.assertTrue(client.store_changes(checkpoint, [self.root]).is_empty())
+            self.assertEqual(1, post.call_count)
+        self.assertEqual(["b1"], [node.id for node in changes.changed])
+
+
+if __name__ == "__main__":
+    unittest.main()
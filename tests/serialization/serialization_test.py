@@ -1,9 +1,11 @@
 import unittest
 from typing import TYPE_CHECKING, List
 
-from lionweb.language import Concept, Property
+from lionweb.language import Concept, Language, Property, Reference
+from lionweb.language.lioncore_builtins import LionCoreBuiltins
 from lionweb.model import ClassifierInstance
 from lionweb.model.node import Node
+from lionweb.model.reference_value import ReferenceValue
 from lionweb.serialization.json_utils import JsonArray, JsonObject
 from lionweb.utils.model_comparator import ModelComparator
 
@@ -13,6 +15,39 @@ if TYPE_CHECKING:
 
 class SerializationTest(unittest.TestCase):
 
+    def create_nodes_with_repeated_strings(self):
+        """
+        Create a language with a concept having a string property and a reference, and three instances
+        of it sharing the same property value. The last two refer to the first one, with the same resolve
+        info.
+        """
+        from lionweb.model.impl.dynamic_node import DynamicNode
+
+        language = Language(name="L", id="l-id", key="l-key", version="1")
+        concept = Concept(language=language, name="C", id="c-id", key="c-key")
+        name = Property.create_required(
+            name="name",
+            type=LionCoreBuiltins.get_string(),
+            id="c-name-id",
+            key="c-name-key",
+        )
+        concept.add_feature(name)
+        ref = Reference(
+            name="ref",
+            id="c-ref-id",
+            key="c-ref-key",
+            type=concept,
+            multiple=True,
+            optional=True,
+        )
+        concept.add_feature(ref)
+        nodes = [DynamicNode(f"n{i}", concept) for i in range(3)]
+        for node in nodes:
+            node.set_property_value(property=name, value="repeated")
+        for node in nodes[1:]:
+            node.add_reference_value(ref, ReferenceValue(nodes[0], "first"))
+        return language, nodes
+
     def get_nodes_by_concept(
         self, nodes: JsonArray, concept_key: str
     ) -> List[JsonObject]:
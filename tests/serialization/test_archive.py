@@ -1,14 +1,20 @@
 import random
 import string
 import tempfile
+import threading
 import unittest
 import zipfile
+import zlib
 from pathlib import Path
+from unittest import mock
 
 from lionweb.language import (Concept, Containment, Language, LionCoreBuiltins,
                               Property)
 from lionweb.model.impl.dynamic_node import DynamicNode
-from lionweb.serialization import SerializationChunk
+from lionweb.serialization import (ArchiveReader, IndexedArchiveReader,
+                                   IndexedArchiveWriter, MetaPointer,
+                                   SerializationChunk, load_archive,
+                                   write_archive)
 from lionweb.serialization.serialization_provider import \
     create_standard_protobuf_serialization
 
@@ -403,6 +409,226 @@ class TestArchive(unittest.TestCase):
         finally:
             Path(archive_path).unlink()  # Clean up
 
+    def test_archive_reader(self):
+        """Test random access to stored and compressed entries of an archive."""
+        documents = self._generate_random_model(num_documents=3)
+        expected = {}
+        with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as temp_file:
+            archive_path = temp_file.name
+
+        try:
+            with zipfile.ZipFile(archive_path, "w") as zf:
+                zf.mkdir("chunks")
+                for i, doc in enumerate(documents):
+                    chunk = self.pb_serialization.serialize_tree_to_serialization_chunk(
+                        doc
+                    )
+                    name = f"chunks/chunk_{i}.binpb"
+                    expected[name] = chunk
+                    compression = zipfile.ZIP_DEFLATED if i == 1 else zipfile.ZIP_STORED
+                    zf.writestr(
+                        name,
+                        self.pb_serialization.serialize_chunk_to_bytes(chunk),
+                        compress_type=compression,
+                    )
+
+            with ArchiveReader(archive_path, self.pb_serialization) as reader:
+                self.assertEqual(3, len(reader))
+                self.assertEqual(list(expected.keys()), reader.index.names())
+                self.assertIsInstance(
+                    reader.read_entry("chunks/chunk_0.binpb"), memoryview
+                )
+                self.assertIsInstance(reader.read_entry(1), bytes)
+                self.assertEqual(
+                    expected["chunks/chunk_2.binpb"],
+                    reader.read_chunk("chunks/chunk_2.binpb"),
+                )
+                self.assertEqual(expected, dict(reader.chunks()))
+                with self.assertRaises(KeyError):
+                    reader.read_chunk("chunks/unknown.binpb")
+
+            self.assertEqual(list(expected.values()), load_archive(archive_path))
+
+        finally:
+            Path(archive_path).unlink()  # Clean up
+
+    def test_indexed_archive(self):
+        """Test fetching nodes and partitions through the index of an archive."""
+        documents = self._generate_random_model(num_documents=3)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive_path = Path(temp_dir) / "archive.zip"
+            with IndexedArchiveWriter(archive_path, self.pb_serialization) as writer:
+                # Nodes are shuffled, so children may be stored before their parents
+                all_nodes = []
+                for doc in documents:
+                    self.pb_serialization.collect_self_and_descendants(
+                        doc, True, all_nodes
+                    )
+                random.shuffle(all_nodes)
+                for i in range(0, len(all_nodes), 4):
+                    writer.add_chunk(
+                        self.pb_serialization.serialize_nodes_to_serialization_chunk(
+                            all_nodes[i : i + 4]
+                        )
+                    )
+            self.assertTrue(Path(f"{archive_path}.index").exists())
+
+            with IndexedArchiveReader(archive_path, self.pb_serialization) as reader:
+                position = all_nodes.index(documents[1])
+                self.assertEqual(
+                    (f"chunk_{position // 4:06d}.binpb", position % 4),
+                    reader.locate("doc_1"),
+                )
+                self.assertIsNone(reader.locate("unknown"))
+
+                ids = [documents[2].get_children()[0].id, "doc_0"]
+                chunk = reader.read_nodes(ids)
+                self.assertEqual(ids, [n.id for n in chunk.classifier_instances])
+                self.assertIn(
+                    self.language.get_key(), [lv.key for lv in chunk.languages]
+                )
+                with self.assertRaises(KeyError):
+                    reader.read_nodes(["doc_0", "unknown"])
+
+                self.assertEqual({"doc_0", "doc_1", "doc_2"}, set(reader.partitions()))
+                doc = documents[2]
+                partition_nodes = []
+                self.pb_serialization.collect_self_and_descendants(
+                    doc, True, partition_nodes
+                )
+                partition_chunk = reader.read_partition("doc_2")
+                self.assertEqual(
+                    {n.id for n in partition_nodes},
+                    {n.id for n in partition_chunk.classifier_instances},
+                )
+                self.assertEqual(
+                    sorted(
+                        {
+                            f"chunk_{all_nodes.index(n) // 4:06d}.binpb"
+                            for n in partition_nodes
+                        }
+                    ),
+                    reader.partition_entries("doc_2"),
+                )
+                nodes = self.pb_serialization.deserialize_serialization_chunk(
+                    partition_chunk
+                )
+                self.assertEqual(len(partition_nodes), len(nodes))
+
+                document_entries = reader.classifier_entries(
+                    MetaPointer.from_language_entity(
+                        self.language.require_concept_by_name("Document")
+                    )
+                )
+                self.assertEqual(
+                    sorted(
+                        {
+                            f"chunk_{all_nodes.index(d) // 4:06d}.binpb"
+                            for d in documents
+                        }
+                    ),
+                    document_entries,
+                )
+
+    def test_write_archive(self):
+        """Test writing archives with entries encoded in parallel."""
+        documents = self._generate_random_model(num_documents=4)
+        chunks = [
+            self.pb_serialization.serialize_tree_to_serialization_chunk(doc)
+            for doc in documents
+        ]
+        all_ids = [
+            instance.id for chunk in chunks for instance in chunk.classifier_instances
+        ]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                for use_processes in (False, True):
+                    archive_path = Path(temp_dir) / f"{compression}{use_processes}.zip"
+                    entries = write_archive(
+                        iter(chunks),
+                        archive_path,
+                        self.pb_serialization,
+                        compression=compression,
+                        max_nodes_per_entry=2,
+                        max_workers=2,
+                        use_processes=use_processes,
+                    )
+                    with zipfile.ZipFile(archive_path) as zf:
+                        self.assertIsNone(zf.testzip())
+                        self.assertEqual(entries, len(zf.namelist()))
+                    loaded = load_archive(archive_path)
+                    self.assertEqual(entries, len(loaded))
+                    self.assertTrue(
+                        all(len(c.classifier_instances) <= 2 for c in loaded)
+                    )
+                    self.assertEqual(
+                        all_ids,
+                        [i.id for chunk in loaded for i in chunk.classifier_instances],
+                    )
+
+            archive_path = Path(temp_dir) / "indexed.zip"
+            write_archive(chunks, archive_path, self.pb_serialization, index=True)
+            with IndexedArchiveReader(archive_path, self.pb_serialization) as reader:
+                self.assertEqual(len(chunks), len(reader))
+                self.assertEqual(
+                    [instance.id for instance in chunks[3].classifier_instances],
+                    [
+                        instance.id
+                        for instance in reader.read_partition(
+                            "doc_3"
+                        ).classifier_instances
+                    ],
+                )
+
+            # Other methods than deflate are left to zipfile, so any of its methods can be used
+            archive_path = Path(temp_dir) / "lzma.zip"
+            write_archive(
+                chunks,
+                archive_path,
+                self.pb_serialization,
+                compression=zipfile.ZIP_LZMA,
+            )
+            with zipfile.ZipFile(archive_path) as zf:
+                self.assertIsNone(zf.testzip())
+            self.assertEqual(len(chunks), len(load_archive(archive_path)))
+
+    def test_write_archive_compresses_in_the_workers(self):
+        documents = self._generate_random_model(num_documents=4)
+        chunks = [
+            self.pb_serialization.serialize_tree_to_serialization_chunk(doc)
+            for doc in documents
+        ]
+        compressor_threads = []
+        compressobj = zlib.compressobj
+
+        def record_thread(*args, **kwargs):
+            compressor_threads.append(threading.current_thread())
+            return compressobj(*args, **kwargs)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            archive_path = Path(temp_dir) / "deflated.zip"
+            with mock.patch("zlib.compressobj", side_effect=record_thread):
+                write_archive(
+                    chunks,
+                    archive_path,
+                    self.pb_serialization,
+                    compression=zipfile.ZIP_DEFLATED,
+                    max_workers=2,
+                )
+            with zipfile.ZipFile(archive_path) as zf:
+                self.assertIsNone(zf.testzip())
+                self.assertTrue(
+                    all(
+                        info.compress_type == zipfile.ZIP_DEFLATED
+                        and info.compress_size < info.file_size
+                        for info in zf.infolist()
+                    )
+                )
+            self.assertEqual(len(chunks), len(load_archive(archive_path)))
+        # Each entry is compressed once, by a worker
+        self.assertEqual(len(chunks), len(compressor_threads))
+        self.assertNotIn(threading.main_thread(), compressor_threads)
+
 
 if __name__ == "__main__":
     unittest.main()
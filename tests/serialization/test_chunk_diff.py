@@ -0,0 +1,83 @@
+import unittest
+
+from fixtures.folders import FolderLanguage, folder, nodes_by_id, note
+
+from lionweb.model.reference_value import ReferenceValue
+from lionweb.serialization import create_standard_json_serialization
+from lionweb.serialization.chunk_diff import (AnnotationsChanged,
+                                              ChildrenChanged, NodeAdded,
+                                              NodeMoved, NodeRemoved,
+                                              PropertyChanged,
+                                              ReferenceChanged, diff_chunks)
+from lionweb.serialization.data import MetaPointer
+from lionweb.serialization.data.serialized_reference_value import \
+    SerializedReferenceValueEntry
+
+
+class ChunkDiffTest(unittest.TestCase):
+
+    def setUp(self):
+        self.serialization = create_standard_json_serialization()
+        self.root = folder("root")
+        for name in ("a", "b", "c"):
+            folder(name, self.root)
+        self.nodes = nodes_by_id(self.root)
+
+    def _chunk(self):
+        return self.serialization.serialize_nodes_to_serialization_chunk(
+            list(nodes_by_id(self.root).values())
+        )
+
+    def test_identical_chunks(self):
+        self.assertEqual([], diff_chunks(self._chunk(), self._chunk()))
+
+    def test_changes(self):
+        before = self._chunk()
+        self.nodes["a"].set_property_value(property=FolderLanguage.NAME, value="A")
+        self.nodes["a"].set_property_value(property=FolderLanguage.SIZE, value=2)
+        self.root.remove_child(child=self.nodes["b"])
+        self.nodes["a"].add_child(FolderLanguage.CHILDREN, self.nodes["b"])
+        self.root.remove_child(child=self.nodes["c"])
+        d = folder("d", self.root)
+        d.add_reference_value(
+            FolderLanguage.LINKS, ReferenceValue(self.nodes["a"], "A")
+        )
+        note("note", self.nodes["b"])
+        after = self._chunk()
+
+        name = MetaPointer.from_feature(FolderLanguage.NAME)
+        size = MetaPointer.from_feature(FolderLanguage.SIZE)
+        children = MetaPointer.from_feature(FolderLanguage.CHILDREN)
+        changes = diff_chunks(before, after)
+        self.assertEqual(
+            [
+                ChildrenChanged("root", children, ("a", "b", "c"), ("a", "d")),
+                PropertyChanged("a", name, "a", "A"),
+                PropertyChanged("a", size, None, "2"),
+                ChildrenChanged("a", children, (), ("b",)),
+                NodeMoved("b", "root", "a"),
+                AnnotationsChanged("b", (), ("note",)),
+                NodeAdded("note", after.get_instance_by_id("note")),
+                NodeAdded("d", after.get_instance_by_id("d")),
+                NodeRemoved("c", before.get_instance_by_id("c")),
+            ],
+            changes,
+        )
+
+        before = after
+        d.set_reference_values(FolderLanguage.LINKS, [])
+        self.assertEqual(
+            [
+                ReferenceChanged(
+                    "d",
+                    MetaPointer.from_feature(FolderLanguage.LINKS),
+                    (SerializedReferenceValueEntry("A", "a"),),
+                    (),
+                )
+            ],
+            diff_chunks(before, self._chunk()),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from fixtures.folders import FolderLanguage, folder, nodes_by_id, note
+
+from lionweb.model.reference_value import ReferenceValue
+from lionweb.serialization import (chunk_content_hashes,
+                                   create_standard_json_serialization,
+                                   node_content_hash)
+
+
+class ContentHashTest(unittest.TestCase):
+
+    def setUp(self):
+        self.serialization = create_standard_json_serialization()
+
+    def _tree(self, prefix):
+        # root contains a and b, and a contains c
+        root = folder(f"{prefix}root", name="root")
+        a = folder(f"{prefix}a", root, name="a")
+        folder(f"{prefix}b", root, name="b")
+        folder(f"{prefix}c", a, name="c")
+        return root
+
+    def _hash(self, node):
+        return node_content_hash(node, self.serialization)
+
+    def test_copies_have_the_same_hash(self):
+        first = self._tree("x-")
+        second = self._tree("y-")
+        self.assertEqual(self._hash(first), self._hash(second))
+        self.assertNotEqual(self._hash(first), self._hash(first.get_children()[0]))
+
+    def test_mutations_invalidate_ancestors(self):
+        root = self._tree("")
+        a = root.get_children()[0]
+        b = root.get_children()[1]
+        c = a.get_children()[0]
+        before = {n.id: self._hash(n) for n in (root, a, b, c)}
+
+        c.set_property_value(property=FolderLanguage.SIZE, value=1)
+        self.assertNotEqual(before["root"], self._hash(root))
+        self.assertNotEqual(before["a"], self._hash(a))
+        self.assertNotEqual(before["c"], self._hash(c))
+        self.assertEqual(before["b"], self._hash(b))
+
+        c.set_property_value(property=FolderLanguage.SIZE, value=None)
+        self.assertEqual(before["root"], self._hash(root))
+
+        b.add_reference_value(FolderLanguage.LINKS, ReferenceValue(c, "c"))
+        self.assertNotEqual(before["root"], self._hash(root))
+        b.set_reference_values(FolderLanguage.LINKS, [])
+        self.assertEqual(before["root"], self._hash(root))
+
+        note("note", c)
+        self.assertNotEqual(before["root"], self._hash(root))
+        self.assertEqual(before["b"], self._hash(b))
+
+    def test_hashes_are_cached_per_serialization(self):
+        root = self._tree("")
+        root.set_property_value(property=FolderLanguage.SIZE, value=1)
+        before = self._hash(root)
+
+        other = create_standard_json_serialization()
+        other.primitive_values_serialization.register_serializer(
+            FolderLanguage.SIZE.type.id, lambda value: f"size {value}"
+        )
+        self.assertNotEqual(before, node_content_hash(root, other))
+        self.assertEqual(before, self._hash(root))
+
+    def test_chunk_hashes_match_node_hashes(self):
+        root = self._tree("")
+        note("note", root.get_children()[1])
+        nodes = list(nodes_by_id(root).values())
+        chunk = self.serialization.serialize_nodes_to_serialization_chunk(nodes)
+        hashes = chunk_content_hashes(chunk)
+        self.assertEqual({n.id: self._hash(n) for n in nodes}, hashes)
+
+        # A partial chunk identifies the missing children by id
+        partial = self.serialization.serialize_nodes_to_serialization_chunk(nodes[:1])
+        self.assertNotEqual(hashes["root"], chunk_content_hashes(partial)["root"])
+
+
+if __name__ == "__main__":
+    unittest.main()
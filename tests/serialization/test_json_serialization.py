@@ -3,6 +3,8 @@ import unittest
 from enum import Enum
 from pathlib import Path
 
+from lionweb.api.local_classifier_instance_resolver import \
+    LocalClassifierInstanceResolver
 from lionweb.api.unresolved_classifier_instance_exception import \
     UnresolvedClassifierInstanceException
 from lionweb.language import Annotation, Concept, Language, Property
@@ -31,6 +33,7 @@ from .library.book import Book
 from .library.guide_book_writer import GuideBookWriter
 from .library.library import Library
 from .library.library_language import LibraryLanguage
+from .my_node_with_properties import MyNodeWithProperties
 from .refsmm.container_node import ContainerNode
 from .refsmm.ref_node import RefNode
 from .refsmm.refs_language import RefsLanguage
@@ -887,6 +890,46 @@ class JsonSerializationTest(SerializationTest):
 
         self.assertTrue(all(not isinstance(n, ProxyNode) for n in nodes if n != pp1))
 
+    def test_deserialize_partial_tree_with_parent_known_to_the_instance_resolver(
+        self,
+    ):
+        js = create_standard_json_serialization(LionWebVersion.V2023_1)
+        language_is = open(
+            Path(__file__).parent.parent
+            / "resources"
+            / "serialization"
+            / "propertiesLanguage.json",
+            "r",
+        )
+        properties_language = js.deserialize_json_to_nodes(json.load(language_is))[0]
+        js.register_language(properties_language)
+        is_ = open(
+            Path(__file__).parent.parent
+            / "resources"
+            / "serialization"
+            / "partialTree.json",
+            "r",
+        )
+        partial_tree = json.load(is_)
+
+        js.enable_dynamic_nodes()
+        js.unavailable_parent_policy = UnavailableNodePolicy.PROXY_NODES
+        pp1 = DynamicNode("pp1", Concept())
+        js.instance_resolver.add(pp1)
+        nodes = js.deserialize_json_to_nodes(partial_tree)
+        self.assertEqual(4, len(nodes))
+        self.assertTrue(all(not isinstance(n, ProxyNode) for n in nodes))
+        pf1 = next(n for n in nodes if n.id == "pf1")
+        self.assertIs(pp1, pf1.get_parent())
+
+        # The resolver can also be given for a single deserialization
+        other_pp1 = DynamicNode("pp1", Concept())
+        nodes = js.deserialize_json_to_nodes(
+            partial_tree, LocalClassifierInstanceResolver(other_pp1)
+        )
+        pf1 = next(n for n in nodes if n.id == "pf1")
+        self.assertIs(other_pp1, pf1.get_parent())
+
     def test_deserialize_tree_with_external_references_throw_error_policy(self):
         js = create_standard_json_serialization(LionWebVersion.V2023_1)
         language_is = open(
@@ -1042,6 +1085,217 @@ class JsonSerializationTest(SerializationTest):
             prerequisite_todo0,
         )
 
+    def test_deserialize_with_instantiator_applying_properties(self):
+        node = MyNodeWithProperties("n1")
+        node.set_p2(10)
+        node.set_p3("serialized")
+        js = create_standard_json_serialization()
+        js.register_language(MyNodeWithProperties.LANGUAGE)
+        serialized = js.serialize_nodes_to_json_element([node])
+
+        def instantiate(concept, serialized_node, deserialized_nodes_by_id, values):
+            instance = MyNodeWithProperties(serialized_node.id)
+            instance.set_p2(values[concept.get_property_by_name("p2")])
+            instance.set_p3("set by the instantiator")
+            return instance
+
+        js.instantiator.register_custom_deserializer(
+            MyNodeWithProperties.CONCEPT.id, instantiate
+        )
+        deserialized = js.deserialize_json_to_nodes(serialized)[0]
+        self.assertEqual(10, deserialized.get_p2())
+        self.assertEqual("serialized", deserialized.get_p3())
+
+        js.instantiator.register_custom_deserializer(
+            MyNodeWithProperties.CONCEPT.id, instantiate, applies_properties=True
+        )
+        deserialized = js.deserialize_json_to_nodes(serialized)[0]
+        self.assertEqual(10, deserialized.get_p2())
+        self.assertEqual("set by the instantiator", deserialized.get_p3())
+
+    def test_dynamic_nodes_are_instantiated_with_their_properties(self):
+        node = MyNodeWithProperties("n1")
+        node.set_p1(True)
+        node.set_p3("foo")
+        js = create_standard_json_serialization()
+        js.register_language(MyNodeWithProperties.LANGUAGE)
+        js.enable_dynamic_nodes()
+        self.assertTrue(
+            js.instantiator.applies_properties(MyNodeWithProperties.CONCEPT)
+        )
+
+        deserialized = js.deserialize_json_to_nodes(
+            js.serialize_nodes_to_json_element([node])
+        )[0]
+        self.assertIs(DynamicNode, type(deserialized))
+        self.assertEqual({"p1": True, "p3": "foo"}, deserialized.property_values)
+
+    def test_deserialization_plans_are_reused_and_refreshed(self):
+        n1 = MyNodeWithProperties("n1")
+        n1.set_p3("foo")
+        n2 = MyNodeWithProperties("n2")
+        n2.set_p3("bar")
+        js = create_standard_json_serialization()
+        js.register_language(MyNodeWithProperties.LANGUAGE)
+        js.enable_dynamic_nodes()
+        serialized = js.serialize_nodes_to_json_element([n1, n2])
+
+        deserialized = js.deserialize_json_to_nodes(serialized)
+        self.assertEqual(
+            ["foo", "bar"], [n.property_values["p3"] for n in deserialized]
+        )
+        self.assertEqual(1, len(js._deserialization_plans))
+        plan = js._deserialization_plans[
+            MetaPointer.from_language_entity(MyNodeWithProperties.CONCEPT)
+        ]
+
+        js.deserialize_json_to_nodes(serialized)
+        self.assertIs(
+            plan,
+            js._deserialization_plans[
+                MetaPointer.from_language_entity(MyNodeWithProperties.CONCEPT)
+            ],
+        )
+
+        # Registrations done after a deserialization must be taken into account
+        js.instantiator.register_custom_deserializer(
+            MyNodeWithProperties.CONCEPT.id,
+            lambda classifier, serialized_node, deserialized_by_id, properties_values: MyNodeWithProperties(
+                serialized_node.id
+            ),
+        )
+        deserialized = js.deserialize_json_to_nodes(serialized)
+        self.assertEqual([MyNodeWithProperties] * 2, [type(n) for n in deserialized])
+        self.assertEqual(["foo", "bar"], [n.get_p3() for n in deserialized])
+
+    def test_serialization_plans_are_reused_and_refreshed(self):
+        language = Language(
+            lion_web_version=LionWebVersion.V2023_1,
+            name="l",
+            id="l-id",
+            key="l-key",
+            version="1",
+        )
+        concept = Concept(
+            lion_web_version=LionWebVersion.V2023_1,
+            language=language,
+            name="C",
+            id="c-id",
+            key="c-key",
+        )
+        p1 = Property(
+            lion_web_version=LionWebVersion.V2023_1,
+            name="p1",
+            container=concept,
+            id="p1-id",
+            key="p1-key",
+            type=LionCoreBuiltins.get_string(LionWebVersion.V2023_1),
+        )
+        concept.add_feature(p1)
+        n1 = DynamicNode("n1", concept)
+        n1.set_property_value(property=p1, value="a")
+        n2 = DynamicNode("n2", concept)
+        n2.set_property_value(property=p1, value="b")
+        js = create_standard_json_serialization(LionWebVersion.V2023_1)
+
+        chunk = js.serialize_nodes_to_serialization_chunk([n1, n2])
+        self.assertEqual(
+            ["a", "b"],
+            [n.properties[0].value for n in chunk.classifier_instances],
+        )
+        self.assertEqual(1, len(js._serialization_plans))
+        plan = js._serialization_plans[id(concept)]
+        js.serialize_nodes_to_serialization_chunk([n1])
+        self.assertIs(plan, js._serialization_plans[id(concept)])
+
+        # Features added after a serialization must be taken into account
+        p2 = Property(
+            lion_web_version=LionWebVersion.V2023_1,
+            name="p2",
+            container=concept,
+            id="p2-id",
+            key="p2-key",
+            type=LionCoreBuiltins.get_integer(LionWebVersion.V2023_1),
+        )
+        concept.add_feature(p2)
+        n1.set_property_value(property=p2, value=3)
+        chunk = js.serialize_nodes_to_serialization_chunk([n1])
+        self.assertEqual(
+            [("p1-key", "a"), ("p2-key", "3")],
+            [
+                (p.meta_pointer.key, p.value)
+                for p in chunk.classifier_instances[0].properties
+            ],
+        )
+
+    def test_string_interning(self):
+        language, nodes = self.create_nodes_with_repeated_strings()
+        serialization = create_standard_json_serialization()
+        serialization.register_language(language)
+        serialization.enable_dynamic_nodes()
+        serialized = serialization.serialize_trees_to_json_element(nodes)
+
+        string_interner = serialization.enable_string_interning(max_size=10)
+        deserialized = serialization.deserialize_json_to_nodes(serialized)
+        self.assertEqual(nodes, deserialized)
+        name_values = [n.get_property_value(property="name") for n in deserialized]
+        ref = language.get_elements()[0].get_reference_by_name("ref")
+        resolve_infos = [
+            rv.get_resolve_info()
+            for n in deserialized
+            for rv in n.get_reference_values(ref)
+        ]
+        self.assertTrue(all(v is name_values[0] for v in name_values))
+        self.assertTrue(all(v is resolve_infos[0] for v in resolve_infos))
+        self.assertEqual(2, string_interner.size())
+        self.assertEqual(2, string_interner.misses)
+        self.assertEqual(3, string_interner.hits)
+
+    def test_instrumentation(self):
+        language, nodes = self.create_nodes_with_repeated_strings()
+        serialization = create_standard_json_serialization()
+        serialization.register_language(language)
+        serialization.enable_dynamic_nodes()
+
+        with serialization.instrumented() as instrumentation:
+            json_string = serialization.serialize_trees_to_json_string(nodes)
+            serialization.deserialize_string_to_nodes(json_string)
+        self.assertIsNone(serialization.instrumentation)
+
+        for phase in [
+            "serialization.nodes",
+            "serialization.json_element",
+            "serialization.json_writing",
+            "deserialization.json_parsing",
+            "deserialization.chunk_reading",
+            "deserialization.sorting",
+            "deserialization.instantiation",
+            "deserialization.population",
+            "deserialization.reference_resolution",
+        ]:
+            self.assertEqual(1, instrumentation.calls[phase], phase)
+        self.assertEqual(
+            {
+                "serialization.nodes": 3,
+                "serialization.bytes_out": len(json_string),
+                "deserialization.bytes_in": len(json_string),
+                "deserialization.nodes": 3,
+                "deserialization.properties": 3,
+                "deserialization.containments": 0,
+                "deserialization.references": 3,
+                "deserialization.proxies": 0,
+            },
+            instrumentation.counters,
+        )
+
+        # Sizes are in bytes, as for protobuf and the client, not in characters
+        non_ascii = json_string.replace('"repeated"', '"répété"')
+        with serialization.instrumented() as instrumentation:
+            serialization.deserialize_string_to_nodes(non_ascii)
+        bytes_in = instrumentation.counters["deserialization.bytes_in"]
+        self.assertEqual(len(non_ascii.encode("utf-8")), bytes_in)
+        self.assertGreater(bytes_in, len(non_ascii))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -179,6 +179,41 @@ class NodePopulatorTest(unittest.TestCase):
             get_only_reference_value_by_reference_name(node, "type").get_referred(),
         )
 
+    def test_auto_resolve_map_is_shared_per_version(self):
+        serialization = create_standard_json_serialization(LionWebVersion.V2024_1)
+        deserialization_status = DeserializationStatus(
+            [], serialization.instance_resolver
+        )
+        populator1 = NodePopulator(
+            serialization,
+            serialization.instance_resolver,
+            deserialization_status,
+            LionWebVersion.V2024_1,
+        )
+        populator2 = NodePopulator(
+            serialization,
+            serialization.instance_resolver,
+            deserialization_status,
+            LionWebVersion.V2024_1,
+        )
+        populator2023 = NodePopulator(
+            serialization,
+            serialization.instance_resolver,
+            deserialization_status,
+            LionWebVersion.V2023_1,
+        )
+
+        self.assertIs(populator1.auto_resolve_map, populator2.auto_resolve_map)
+        self.assertIsNot(populator1.auto_resolve_map, populator2023.auto_resolve_map)
+        self.assertIs(
+            LionCoreBuiltins.get_boolean(LionWebVersion.V2024_1),
+            populator1.auto_resolve_map["LionWeb.LionCore_builtins.Boolean"],
+        )
+        self.assertIs(
+            LionCoreBuiltins.get_boolean(LionWebVersion.V2023_1),
+            populator2023.auto_resolve_map["LionWeb.LionCore_builtins.Boolean"],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
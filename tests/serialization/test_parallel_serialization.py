@@ -0,0 +1,78 @@
+import pickle
+import unittest
+from unittest import mock
+
+from fixtures.folders import FolderLanguage, count_nodes, generate_folders
+
+from lionweb.serialization import (create_standard_json_serialization,
+                                   create_standard_protobuf_serialization)
+from lionweb.serialization.data import LanguageVersion, MetaPointer
+from lionweb.serialization.data.serialized_property_value import \
+    SerializedPropertyValue
+from lionweb.serialization.parallel_serialization import \
+    parallel_serialization_available
+from lionweb.utils import Instrumentation
+
+
+@unittest.skipUnless(
+    parallel_serialization_available(), "Worker processes cannot be forked"
+)
+class ParallelSerializationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.roots = generate_folders(
+            size=300, depth=3, fan_out=5, annotation_density=0.3
+        )
+        # Split even this small model across the workers
+        patcher = mock.patch(
+            "lionweb.serialization.parallel_serialization.MIN_NODES_PER_TASK", 10
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_json_serialization_in_parallel_is_deterministic(self):
+        serialization = create_standard_json_serialization()
+        sequential = serialization.serialize_trees_to_json_element(self.roots)
+        # The second root appears twice, but its nodes are serialized once
+        roots = self.roots + [self.roots[1]]
+        instrumentation = Instrumentation()
+        serialization.instrumentation = instrumentation
+        for max_workers in (1, 2, 3):
+            self.assertEqual(
+                sequential,
+                serialization.serialize_trees_to_json_element(
+                    roots, max_workers=max_workers
+                ),
+            )
+        self.assertEqual(3, instrumentation.calls["serialization.nodes"])
+        self.assertEqual(
+            [{"key": "folders", "version": "1"}],
+            [
+                language
+                for language in sequential["languages"]
+                if language["key"] == "folders"
+            ],
+        )
+
+    def test_protobuf_serialization_in_parallel(self):
+        serialization = create_standard_protobuf_serialization()
+        serialized = serialization.serialize_trees_to_bytes(self.roots, max_workers=2)
+        self.assertEqual(serialization.serialize_trees_to_bytes(self.roots), serialized)
+
+        serialization.register_language(FolderLanguage.LANGUAGE)
+        serialization.enable_dynamic_nodes()
+        nodes = serialization.deserialize_bytes_to_nodes(serialized)
+        self.assertEqual(count_nodes(self.roots), len(nodes))
+
+    def test_interned_data_is_pickled_to_interned_instances(self):
+        language_version = LanguageVersion.of("folders", "1")
+        meta_pointer = MetaPointer.of(language_version, "folder-name")
+        property_value = SerializedPropertyValue.of(meta_pointer, "a")
+        self.assertIs(language_version, pickle.loads(pickle.dumps(language_version)))
+        self.assertIs(meta_pointer, pickle.loads(pickle.dumps(meta_pointer)))
+        self.assertIs(property_value, pickle.loads(pickle.dumps(property_value)))
+        self.assertIsNone(MetaPointer.of().key)
+
+
+if __name__ == "__main__":
+    unittest.main()
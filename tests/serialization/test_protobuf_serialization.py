@@ -331,6 +331,29 @@ class ProtobufSerializationTest(SerializationTest):
             )
         )
 
+    def test_string_interning(self):
+        language, nodes = self.create_nodes_with_repeated_strings()
+        serialization = create_standard_protobuf_serialization()
+        serialization.register_language(language)
+        serialization.enable_dynamic_nodes()
+        serialized = serialization.serialize_trees_to_bytes(nodes)
+
+        string_interner = serialization.enable_string_interning(max_size=10)
+        deserialized = serialization.deserialize_bytes_to_nodes(serialized)
+        self.assertEqual(nodes, deserialized)
+        name_values = [n.get_property_value(property="name") for n in deserialized]
+        ref = language.get_elements()[0].get_reference_by_name("ref")
+        resolve_infos = [
+            rv.get_resolve_info()
+            for n in deserialized
+            for rv in n.get_reference_values(ref)
+        ]
+        self.assertTrue(all(v is name_values[0] for v in name_values))
+        self.assertTrue(all(v is resolve_infos[0] for v in resolve_infos))
+        self.assertEqual(2, string_interner.size())
+        self.assertEqual(2, string_interner.misses)
+        self.assertEqual(3, string_interner.hits)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,17 @@
 import json
 import unittest
 
+from lionweb.language import Language
+from lionweb.language.field import Field
+from lionweb.language.lioncore_builtins import LionCoreBuiltins
+from lionweb.language.structured_data_type import StructuredDataType
 from lionweb.lionweb_version import LionWebVersion
+from lionweb.model.impl.dynamic_structured_datype_instance import \
+    DynamicStructuredDataTypeInstance
 from lionweb.serialization import create_standard_json_serialization
 from lionweb.serialization.json_utils import JsonArray
+from lionweb.serialization.primitives_values_serialization import \
+    PrimitiveValuesSerialization
 from lionweb.serialization.serialized_json_comparison_utils import \
     SerializedJsonComparisonUtils
 
@@ -329,6 +337,85 @@ class TestSerializationOfPrimitiveValues(SerializationTest):
         deserialized = json_serialization.deserialize_json_to_nodes(serialized)
         assert deserialized == [node]
 
+    def _structured_data_types(self):
+        language = Language(id="l-id", key="l-key", name="L", version="1")
+        point = (
+            StructuredDataType(id="point-id", key="point-key", name="Point")
+            .add_field(Field("x", LionCoreBuiltins.get_integer(), "x-id", "x-key"))
+            .add_field(Field("y", LionCoreBuiltins.get_integer(), "y-id", "y-key"))
+        )
+        span = (
+            StructuredDataType(id="span-id", key="span-key", name="Span")
+            .add_field(Field("start", point, "start-id", "start-key"))
+            .add_field(Field("end", point, "end-id", "end-key"))
+        )
+        language.add_element(point)
+        language.add_element(span)
+        primitive_values_serialization = PrimitiveValuesSerialization()
+        primitive_values_serialization.register_lion_builtins_primitive_serializers_and_deserializers(
+            LionWebVersion.current_version()
+        )
+        primitive_values_serialization.register_language(language)
+        primitive_values_serialization.enable_dynamic_nodes()
+        return primitive_values_serialization, point, span
+
+    def test_serialize_and_deserialize_nested_structured_data_types(self):
+        primitive_values_serialization, point, span = self._structured_data_types()
+        start = DynamicStructuredDataTypeInstance(point)
+        start.set_field_value("x", 1)
+        start.set_field_value("y", 2)
+        value = DynamicStructuredDataTypeInstance(span)
+        value.set_field_value("start", start)
+        value.set_field_value("end", None)
+
+        serialized = primitive_values_serialization.serialize(span.id, value)
+        self.assertEqual(
+            {"start-key": {"x-key": "1", "y-key": "2"}, "end-key": None},
+            json.loads(serialized),
+        )
+        deserialized = primitive_values_serialization.deserialize(span, serialized)
+        self.assertEqual(value, deserialized)
+        self.assertEqual(
+            1,
+            deserialized.get_field_value(span.get_fields()[0]).get_field_value(
+                point.get_fields()[0]
+            ),
+        )
+
+        # Fields added after a value was decoded must be taken into account
+        point.add_field(Field("z", LionCoreBuiltins.get_integer(), "z-id", "z-key"))
+        deserialized = primitive_values_serialization.deserialize(
+            span, '{"start-key": {"x-key": "1", "y-key": "2", "z-key": "3"}}'
+        )
+        self.assertEqual(
+            3,
+            deserialized.get_field_value(span.get_fields()[0]).get_field_value(
+                point.get_fields()[2]
+            ),
+        )
+
+    def test_cache_structured_data_type_values(self):
+        primitive_values_serialization, point, _ = self._structured_data_types()
+        serialized = '{"x-key": "1", "y-key": "2"}'
+        self.assertIsNot(
+            primitive_values_serialization.deserialize(point, serialized),
+            primitive_values_serialization.deserialize(point, serialized),
+        )
+
+        primitive_values_serialization.cache_structured_data_type_values(max_size=1)
+        first = primitive_values_serialization.deserialize(point, serialized)
+        self.assertIs(
+            first, primitive_values_serialization.deserialize(point, serialized)
+        )
+        other = primitive_values_serialization.deserialize(
+            point, '{"x-key": "3", "y-key": "4"}'
+        )
+        self.assertEqual(3, other.get_field_value(point.get_fields()[0]))
+        # The cache is bounded, so the first value has been evicted
+        self.assertIsNot(
+            first, primitive_values_serialization.deserialize(point, serialized)
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
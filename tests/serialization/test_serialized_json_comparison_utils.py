@@ -0,0 +1,95 @@
+import copy
+import unittest
+
+from lionweb.serialization import SerializedJsonComparisonUtils
+
+
+def _node(node_id, value, children=()):
+    return {
+        "id": node_id,
+        "classifier": {"language": "l", "version": "1", "key": "Folder"},
+        "properties": [
+            {
+                "property": {"language": "l", "version": "1", "key": "name"},
+                "value": value,
+            },
+            {
+                "property": {"language": "l", "version": "1", "key": "size"},
+                "value": None,
+            },
+        ],
+        "containments": [
+            {
+                "containment": {"language": "l", "version": "1", "key": "children"},
+                "children": list(children),
+            }
+        ],
+        "references": [],
+        "annotations": [],
+        "parent": None,
+    }
+
+
+class SerializedJsonComparisonUtilsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.expected = {
+            "serializationFormatVersion": "2023.1",
+            "languages": [{"key": "l", "version": "1"}],
+            "nodes": [_node("root", "root", [f"n{i}" for i in range(1000)])]
+            + [_node(f"n{i}", f"n{i}") for i in range(1000)],
+        }
+
+    def test_equivalent_documents(self):
+        actual = copy.deepcopy(self.expected)
+        actual["nodes"].reverse()
+        for node in actual["nodes"]:
+            node["properties"].reverse()
+            # Properties without value are equivalent to missing ones
+            node["properties"][0].pop("value")
+        SerializedJsonComparisonUtils.assert_equivalent_lionweb_json(
+            self.expected, actual
+        )
+        self.assertEqual(
+            [], SerializedJsonComparisonUtils.find_differences(self.expected, actual)
+        )
+
+    def test_differences_are_bounded(self):
+        actual = copy.deepcopy(self.expected)
+        for node in actual["nodes"][1:]:
+            node["properties"][0]["value"] = "changed"
+        actual["nodes"][0]["containments"][0]["children"].reverse()
+
+        differences = SerializedJsonComparisonUtils.find_differences(
+            self.expected, actual, max_differences=5
+        )
+        self.assertEqual(5, len(differences))
+        self.assertTrue(differences[0].startswith("Containments of Node root"))
+        self.assertTrue(differences[2].startswith("Properties of Node n0"))
+        self.assertEqual(
+            2002,
+            len(
+                SerializedJsonComparisonUtils.find_differences(
+                    self.expected, actual, max_differences=10000
+                )
+            ),
+        )
+        with self.assertRaises(AssertionError):
+            SerializedJsonComparisonUtils.assert_equivalent_lionweb_json(
+                self.expected, actual
+            )
+
+    def test_missing_and_unexpected_nodes(self):
+        actual = copy.deepcopy(self.expected)
+        actual["nodes"][1]["id"] = "other"
+        self.assertEqual(
+            [
+                "Unexpected ID found: other",
+                "Missing ID found: n0",
+            ],
+            SerializedJsonComparisonUtils.find_differences(self.expected, actual),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
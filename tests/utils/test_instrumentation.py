@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+
+from lionweb.client import Client
+from lionweb.utils import Instrumentation
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    def test_measures_are_accumulated_and_notified(self):
+        instrumentation = Instrumentation()
+        notified = []
+        instrumentation.add_listener(
+            lambda kind, name, value: notified.append((kind, name))
+        )
+
+        with instrumentation.phase("a"):
+            pass
+        with instrumentation.phase("a"):
+            pass
+        laps = instrumentation.laps()
+        laps.lap("b")
+        laps.lap("c")
+        instrumentation.count("nodes", 3)
+        instrumentation.count("nodes", 2)
+
+        snapshot = instrumentation.snapshot()
+        self.assertEqual({"a": 2, "b": 1, "c": 1}, snapshot["calls"])
+        self.assertEqual({"a", "b", "c"}, set(snapshot["timings"].keys()))
+        self.assertEqual({"nodes": 5}, snapshot["counters"])
+        self.assertEqual(
+            [
+                ("time", "a"),
+                ("time", "a"),
+                ("time", "b"),
+                ("time", "c"),
+                ("count", "nodes"),
+                ("count", "nodes"),
+            ],
+            notified,
+        )
+
+        with self.assertLogs("lionweb.utils.instrumentation", level="INFO") as logs:
+            instrumentation.log()
+        self.assertEqual(4, len(logs.records))
+
+        instrumentation.reset()
+        self.assertEqual(
+            {"timings": {}, "calls": {}, "counters": {}}, instrumentation.snapshot()
+        )
+
+    def test_client_requests_are_measured(self):
+        client = Client()
+        response = mock.Mock(status_code=200, content=b'{"ids": ["a", "b"]}')
+        response.json.return_value = {"ids": ["a", "b"]}
+        response.request.body = None
+
+        with mock.patch("lionweb.client.client.requests.post", return_value=response):
+            client.ids(2)
+            with client.instrumented() as instrumentation:
+                self.assertIs(instrumentation, client.serialization().instrumentation)
+                self.assertEqual(["a", "b"], client.ids(2))
+        self.assertIsNone(client.instrumentation())
+        self.assertIsNone(client.serialization().instrumentation)
+
+        self.assertEqual({"client.ids": 1}, instrumentation.calls)
+        self.assertEqual(
+            {"client.bytes_out": 0, "client.bytes_in": 19}, instrumentation.counters
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()